@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.member_stats import backfill_member_stats
+
+async def main():
+    """Rebuild the member_stats collection from existing transactions and cash pickups."""
+    member_count = await backfill_member_stats()
+    print(f"Member stats rebuilt for {member_count} members")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.pickup_index import backfill_pickup_index
+
+async def main():
+    """Index the pickup codes of existing transactions, prepaid orders and cash pickups."""
+    code_count = await backfill_pickup_index()
+    print(f"Pickup index rebuilt for {code_count} codes")
+
+if __name__ == "__main__":
+    asyncio.run(main())
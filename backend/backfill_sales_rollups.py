@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.sales_rollups import ROLLUP_CHANNELS, backfill_sales_rollups
+
+async def main():
+    """Rebuild sales rollups from the raw payment collections.
+
+    Usage: backfill_sales_rollups.py [channel ...]  (all channels by default)
+    """
+    channels = sys.argv[1:] or list(ROLLUP_CHANNELS)
+    unknown_channels = [channel for channel in channels if channel not in ROLLUP_CHANNELS]
+    if unknown_channels:
+        print(f"Unknown channel(s): {', '.join(unknown_channels)}. Choose from: {', '.join(ROLLUP_CHANNELS)}")
+        sys.exit(1)
+    
+    result = await backfill_sales_rollups(channels)
+    print(f"Sales rollups rebuilt: {result['rows']} rows across {len(channels)} channels")
+    if result["skipped"]:
+        print(f"Skipped {result['skipped']} documents with no created_at or ObjectId timestamp")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Compare per-request auth overhead of the wictionary premium check before and after
+the decoded-token cache and signed entitlement claims.
+
+before:        jwt.decode + users find_one + admins find_one on every request
+after (db):    cached decode + cached entitlements (tokens without premium claims)
+after (claim): cached decode + signed tier claim, no database read
+
+Inserts one scratch user into users (removed afterwards). Needs a reachable
+MongoDB in MONGO_URL.
+
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_auth.py
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jose import jwt
+from utils.auth import SECRET_KEY, ALGORITHM, create_access_token, decode_token, require_premium_membership
+from utils.database import users_collection, admins_collection
+from utils.user_context import get_claim_entitlements
+
+REQUESTS = 2000
+# Distinct tokens in rotation, like concurrent sessions hitting one worker
+SESSIONS = 200
+
+async def before(token: str):
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    email = claims["sub"]
+    admin = await admins_collection.find_one({"email": email})
+    if not admin:
+        user = await users_collection.find_one({"email": email})
+        require_premium_membership(user)
+
+async def after(token: str):
+    claims = decode_token(token)
+    entitlements = await get_claim_entitlements(claims)
+    if not entitlements["role"]:
+        require_premium_membership(entitlements)
+
+async def measure(check, tokens):
+    latencies = []
+    for i in range(REQUESTS):
+        started = time.perf_counter()
+        await check(tokens[i % len(tokens)])
+        latencies.append((time.perf_counter() - started) * 1_000_000)
+    latencies.sort()
+    return latencies
+
+async def main():
+    email = f"bench-auth-{uuid.uuid4().hex[:8]}@example.com"
+    await users_collection.insert_one({"email": email, "membership_tier": "premium", "is_verified": True})
+    try:
+        # Same user, many sessions; the session claim gives every token its own signature
+        plain_tokens = [create_access_token({"sub": email, "session": n}) for n in range(SESSIONS)]
+        claim_tokens = [create_access_token({"sub": email, "session": n, "tier": "premium", "verified": True}) for n in range(SESSIONS)]
+
+        print(f"{REQUESTS} requests over {SESSIONS} tokens (microseconds per request)")
+        print(f"{'path':<14} {'mean':>9} {'p50':>9} {'p95':>9}")
+        for name, check, tokens in [
+            ("before", before, plain_tokens),
+            ("after (db)", after, plain_tokens),
+            ("after (claim)", after, claim_tokens),
+        ]:
+            # Warm-up pass, so the after paths are measured with warm caches
+            for token in tokens:
+                await check(token)
+            latencies = await measure(check, tokens)
+            print(
+                f"{name:<14} {statistics.mean(latencies):>9.1f} {statistics.median(latencies):>9.1f} "
+                f"{latencies[int(len(latencies) * 0.95) - 1]:>9.1f}"
+            )
+    finally:
+        await users_collection.delete_one({"email": email})
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compare skip/limit and keyset (cursor) pagination latency from page 1 to page 1000.
+
+Seeds a scratch collection with one member's transaction history, then times
+fetching selected pages both ways. Needs a reachable MongoDB in MONGO_URL;
+the scratch collection is dropped afterwards.
+
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_keyset_pagination.py
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from utils.database import db
+from utils.pagination import fetch_keyset_page, keyset_sort
+
+PAGE_SIZE = 20
+PAGES = 1000
+SAMPLE_PAGES = [1, 10, 100, 250, 500, 750, 1000]
+REPEATS = 5
+
+async def seed(collection, user_id):
+    await collection.drop()
+    await collection.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+    start = datetime.utcnow()
+    docs = [
+        {"user_id": user_id, "total": 10.0 + i % 50, "created_at": start - timedelta(seconds=i)}
+        for i in range(PAGE_SIZE * PAGES)
+    ]
+    for i in range(0, len(docs), 5000):
+        await collection.insert_many(docs[i:i + 5000])
+
+async def time_skip(collection, query, page):
+    started = time.perf_counter()
+    cursor = collection.find(query).sort(keyset_sort("created_at")).skip((page - 1) * PAGE_SIZE).limit(PAGE_SIZE)
+    await cursor.to_list(length=PAGE_SIZE)
+    return (time.perf_counter() - started) * 1000
+
+async def main():
+    collection = db["bench_keyset_pagination"]
+    user_id = ObjectId()
+    query = {"user_id": user_id}
+    print(f"Seeding {PAGE_SIZE * PAGES} documents...")
+    await seed(collection, user_id)
+
+    # Walk every page once with cursors, timing each fetch
+    keyset_ms = {}
+    cursor = None
+    for page in range(1, PAGES + 1):
+        samples = []
+        for _ in range(REPEATS if page in SAMPLE_PAGES else 1):
+            started = time.perf_counter()
+            _, next_cursor = await fetch_keyset_page(collection, query, "created_at", PAGE_SIZE, cursor=cursor)
+            samples.append((time.perf_counter() - started) * 1000)
+        keyset_ms[page] = statistics.median(samples)
+        cursor = next_cursor
+
+    print(f"{'page':>6} {'skip/limit ms':>14} {'keyset ms':>10}")
+    for page in SAMPLE_PAGES:
+        skip_ms = statistics.median([await time_skip(collection, query, page) for _ in range(REPEATS)])
+        print(f"{page:>6} {skip_ms:>14.2f} {keyset_ms[page]:>10.2f}")
+
+    await collection.drop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
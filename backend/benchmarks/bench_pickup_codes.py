@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Measure pickup code allocation latency at 50% and 90% occupancy of a code window.
+
+Fills a scratch collection with the given share of the current window's code
+space, then times allocations through PickupCodeAllocator (insert and retry on
+DuplicateKeyError). Needs a reachable MongoDB in MONGO_URL; the scratch
+collection is dropped afterwards.
+
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_pickup_codes.py
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from utils.database import db
+from utils.pickup_codes import PickupCodeAllocator, PICKUP_CODE_MAX_ATTEMPTS, RANDOM_DIGITS
+
+PREFIX = "B"
+OCCUPANCIES = [0.5, 0.9]
+ALLOCATIONS = 500
+BATCH_SIZE = 5000
+
+async def fill(collection, window: int, occupancy: float):
+    """Reserve the first share of the window's codes (allocation picks at random, so order doesn't matter)."""
+    await collection.delete_many({})
+    space = 10 ** RANDOM_DIGITS
+    taken = int(space * occupancy)
+    now = datetime.utcnow()
+    for start in range(0, taken, BATCH_SIZE):
+        await collection.insert_many([
+            {"_id": f"{PREFIX}{window}{n:0{RANDOM_DIGITS}d}", "channel": "bench", "window": window, "allocated_at": now}
+            for n in range(start, min(start + BATCH_SIZE, taken))
+        ], ordered=False)
+    return taken
+
+async def measure(allocator: PickupCodeAllocator):
+    latencies = []
+    failures = 0
+    collisions_before = allocator.collisions
+    for _ in range(ALLOCATIONS):
+        started = time.perf_counter()
+        try:
+            code = await allocator.allocate("bench", prefix=PREFIX)
+            # Keep occupancy constant for the next allocation
+            await allocator.discard(code)
+        except HTTPException:
+            failures += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+    attempts = (allocator.collisions - collisions_before + ALLOCATIONS - failures) / ALLOCATIONS
+    return latencies, attempts, failures
+
+async def main():
+    collection = db.bench_pickup_codes
+    allocator = PickupCodeAllocator(collection)
+    window = allocator.current_window()
+
+    print(f"{ALLOCATIONS} allocations per run, {10 ** RANDOM_DIGITS} codes per window, up to {PICKUP_CODE_MAX_ATTEMPTS} attempts")
+    print(f"{'occupancy':>10} {'attempts':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'failed':>7}")
+    try:
+        for occupancy in OCCUPANCIES:
+            await fill(collection, window, occupancy)
+            latencies, attempts, failures = await measure(allocator)
+            latencies.sort()
+            print(
+                f"{occupancy:>10.0%} {attempts:>9.2f} {statistics.median(latencies):>8.2f} "
+                f"{latencies[int(len(latencies) * 0.95) - 1]:>8.2f} {latencies[-1]:>8.2f} {failures:>7}"
+            )
+    finally:
+        await collection.drop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
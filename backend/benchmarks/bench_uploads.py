@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Measure API latency while large deal videos upload concurrently.
+
+Probes GET /api/products/ at a fixed interval, first on an idle server and then
+while UPLOADS concurrent MP4 uploads of UPLOAD_MB each go to
+POST /api/admin/daily-deals. Uploads stream from one scratch file on disk; the
+created deals are deleted afterwards. Needs a running API (BASE_URL) and admin
+credentials; raise UPLOAD_MAX_VIDEO_BYTES on the server above UPLOAD_MB.
+
+    UPLOAD_MAX_VIDEO_BYTES=300000000 uvicorn server:app --port 8001
+    BASE_URL=http://127.0.0.1:8001 python benchmarks/bench_uploads.py
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+BASE_URL = os.environ.get("BASE_URL", "http://127.0.0.1:8001")
+ADMIN_EMAIL = os.environ.get("ADMIN_EMAIL", "admin@statusxsmoakland.com")
+ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "Admin123!")
+UPLOADS = int(os.environ.get("UPLOADS", "10"))
+UPLOAD_MB = int(os.environ.get("UPLOAD_MB", "200"))
+PROBE_INTERVAL_SECONDS = 0.05
+IDLE_PROBE_SECONDS = 5
+
+def write_scratch_video(path: str):
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for _ in range(UPLOAD_MB):
+            f.write(block)
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event) -> list:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/api/products/")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+    return latencies
+
+async def upload(client: httpx.AsyncClient, headers: dict, path: str, n: int) -> tuple:
+    started = time.perf_counter()
+    with open(path, "rb") as video:
+        response = await client.post(
+            "/api/admin/daily-deals",
+            headers=headers,
+            data={
+                "category": "flower",
+                "title": f"bench upload {n}",
+                "message": "benchmark",
+                "expires_at": (datetime.utcnow() + timedelta(hours=1)).isoformat()
+            },
+            files={"video": (f"bench-{n}.mp4", video, "video/mp4")}
+        )
+    response.raise_for_status()
+    return response.json()["deal_id"], time.perf_counter() - started
+
+def summarize(name: str, latencies: list):
+    latencies = sorted(latencies)
+    print(
+        f"{name:<16} {len(latencies):>7} {statistics.median(latencies):>9.1f} "
+        f"{latencies[int(len(latencies) * 0.95) - 1]:>9.1f} {latencies[-1]:>9.1f}"
+    )
+
+async def main():
+    timeout = httpx.Timeout(600.0, connect=10.0)
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=timeout) as client:
+        login = await client.post("/api/admin-auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        with tempfile.TemporaryDirectory() as scratch:
+            path = os.path.join(scratch, "bench.mp4")
+            write_scratch_video(path)
+
+            stop = asyncio.Event()
+            idle_probe = asyncio.create_task(probe(client, stop))
+            await asyncio.sleep(IDLE_PROBE_SECONDS)
+            stop.set()
+            idle = await idle_probe
+
+            stop = asyncio.Event()
+            busy_probe = asyncio.create_task(probe(client, stop))
+            started = time.perf_counter()
+            results = await asyncio.gather(*[upload(client, headers, path, n) for n in range(UPLOADS)])
+            elapsed = time.perf_counter() - started
+            stop.set()
+            busy = await busy_probe
+
+        for deal_id, _ in results:
+            await client.delete(f"/api/admin/daily-deals/{deal_id}", headers=headers)
+
+    print(f"{UPLOADS} concurrent uploads of {UPLOAD_MB} MB in {elapsed:.1f}s "
+          f"({UPLOADS * UPLOAD_MB / elapsed:.0f} MB/s); slowest {max(t for _, t in results):.1f}s")
+    print(f"{'GET /api/products/':<16} {'probes':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    summarize("idle", idle)
+    summarize("during uploads", busy)
+
+if __name__ == "__main__":
+    asyncio.run(main())
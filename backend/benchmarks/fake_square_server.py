@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Square Connect API, for load tests.
+
+Implements the endpoints the payment routes call (create order, create/get
+payment, list locations) with a configurable response delay, so concurrency
+through the shared Square client can be measured without touching Square.
+
+    python benchmarks/fake_square_server.py --port 8089 --latency-ms 300
+    SQUARE_BASE_URL=http://127.0.0.1:8089 SQUARE_ACCESS_TOKEN=fake \
+        SQUARE_LOCATION_ID=FAKE_LOCATION uvicorn server:app
+"""
+
+import argparse
+import asyncio
+import random
+import uuid
+from datetime import datetime, timezone
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LOCATION_ID = "FAKE_LOCATION"
+
+app = FastAPI(title="Fake Square API")
+app.state.latency_ms = 0.0
+app.state.jitter_ms = 0.0
+app.state.payments = {}
+
+async def simulate_latency():
+    delay_ms = app.state.latency_ms + random.uniform(0, app.state.jitter_ms)
+    if delay_ms > 0:
+        await asyncio.sleep(delay_ms / 1000)
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+@app.post("/v2/orders")
+async def create_order(request: Request):
+    body = await request.json()
+    await simulate_latency()
+    order = body.get("order", {})
+    return {
+        "order": {
+            "id": uuid.uuid4().hex,
+            "location_id": order.get("location_id", LOCATION_ID),
+            "reference_id": order.get("reference_id"),
+            "line_items": order.get("line_items", []),
+            "state": "OPEN",
+            "created_at": now_iso()
+        }
+    }
+
+@app.post("/v2/payments")
+async def create_payment(request: Request):
+    body = await request.json()
+    await simulate_latency()
+    payment_id = uuid.uuid4().hex
+    payment = {
+        "id": payment_id,
+        "status": "COMPLETED",
+        "amount_money": body.get("amount_money"),
+        "location_id": body.get("location_id", LOCATION_ID),
+        "order_id": body.get("order_id"),
+        "receipt_url": f"https://squareup.example/receipt/{payment_id}",
+        "created_at": now_iso()
+    }
+    app.state.payments[payment_id] = payment
+    return {"payment": payment}
+
+@app.get("/v2/payments/{payment_id}")
+async def get_payment(payment_id: str):
+    await simulate_latency()
+    payment = app.state.payments.get(payment_id)
+    if payment is None:
+        return JSONResponse(
+            status_code=404,
+            content={"errors": [{"category": "INVALID_REQUEST_ERROR", "code": "NOT_FOUND", "detail": "Payment not found"}]}
+        )
+    return {"payment": payment}
+
+@app.get("/v2/locations")
+async def list_locations():
+    await simulate_latency()
+    return {"locations": [{"id": LOCATION_ID, "name": "Fake Location", "status": "ACTIVE"}]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=250.0, help="fixed delay added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=50.0, help="extra random delay, 0..jitter")
+    args = parser.parse_args()
+
+    app.state.latency_ms = args.latency_ms
+    app.state.jitter_ms = args.jitter_ms
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Bulk-load a deterministic synthetic dataset for load testing.
+
+Members, the full product catalog from seed_complete_inventory.py, orders,
+transactions, prepaid and cash pickups and ratings, followed by the derived
+collections (rating aggregates, member stats, sales rollups, pickup index) and
+the registry indexes. The same LOAD_SEED, LOAD_EPOCH and sizes always produce the
+same documents and ids, so runs are comparable between commits. Default sizes are
+production scale (500k members, 5M transactions, 20k ratings per product); shrink
+them with the LOAD_* variables for a quick local run.
+
+Writes into DB_NAME, which must be set and must not be the default database:
+every loaded collection is dropped first. Also writes LOAD_MANIFEST, which
+benchmarks/load_test.py reads for credentials, product ids and pickup codes.
+
+    DB_NAME=statusxsmoakland_load MONGO_URL=mongodb://localhost:27017 python benchmarks/generate_load_data.py
+    DB_NAME=statusxsmoakland_load LOAD_MEMBERS=5000 LOAD_TRANSACTIONS=50000 LOAD_RATINGS_PER_PRODUCT=200 python benchmarks/generate_load_data.py
+"""
+
+import asyncio
+import importlib.util
+import json
+import math
+import os
+import random
+import struct
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND))
+
+from bson import ObjectId
+
+LOAD_SEED = int(os.environ.get("LOAD_SEED", "1337"))
+LOAD_MEMBERS = int(os.environ.get("LOAD_MEMBERS", "500000"))
+LOAD_TRANSACTIONS = int(os.environ.get("LOAD_TRANSACTIONS", "5000000"))
+LOAD_ORDERS = int(os.environ.get("LOAD_ORDERS", "500000"))
+LOAD_PREPAID_ORDERS = int(os.environ.get("LOAD_PREPAID_ORDERS", "200000"))
+LOAD_CASH_PICKUPS = int(os.environ.get("LOAD_CASH_PICKUPS", "100000"))
+LOAD_RATINGS_PER_PRODUCT = int(os.environ.get("LOAD_RATINGS_PER_PRODUCT", "20000"))
+LOAD_HISTORY_DAYS = int(os.environ.get("LOAD_HISTORY_DAYS", "365"))
+LOAD_BATCH_SIZE = int(os.environ.get("LOAD_BATCH_SIZE", "5000"))
+LOAD_WRITE_CONCURRENCY = int(os.environ.get("LOAD_WRITE_CONCURRENCY", "4"))
+LOAD_MANIFEST = os.environ.get("LOAD_MANIFEST", "load_manifest.json")
+LOAD_MEMBER_PASSWORD = os.environ.get("LOAD_MEMBER_PASSWORD", "LoadTest123!")
+LOAD_ADMIN_EMAIL = os.environ.get("LOAD_ADMIN_EMAIL", "load-admin@loadtest.example")
+LOAD_ADMIN_PASSWORD = os.environ.get("LOAD_ADMIN_PASSWORD", "LoadAdmin123!")
+# Pickup codes per channel, and verified members, written to the manifest for the load driver
+MANIFEST_PICKUP_CODES = 1000
+MANIFEST_SHOPPERS = 2000
+
+DEFAULT_DB_NAME = "statusxsmoakland"
+LOADED_COLLECTIONS = [
+    "users", "admins", "products", "orders", "transactions", "prepaid_orders", "cash_pickup_orders",
+    "ratings", "carts", "member_stats", "sales_rollups", "pickup_index"
+]
+
+# End of the generated history: the current hour unless pinned, so "today" dashboards
+# have data. Reuse the manifest's epoch as LOAD_EPOCH to regenerate identical documents.
+LOAD_EPOCH = os.environ.get("LOAD_EPOCH")
+EPOCH = datetime.fromisoformat(LOAD_EPOCH) if LOAD_EPOCH else datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+# Kind byte inside generated ObjectIds, so ids are stable and never collide across collections
+KIND_MEMBER, KIND_PRODUCT, KIND_ORDER, KIND_TRANSACTION, KIND_RATING = range(1, 6)
+
+def stable_object_id(kind: int, n: int, created_at: datetime) -> ObjectId:
+    """ObjectId with created_at's timestamp and (kind, n) in place of the random/counter bytes."""
+    seconds = int((created_at - datetime(1970, 1, 1)).total_seconds())
+    return ObjectId(struct.pack(">IB", seconds, kind) + n.to_bytes(7, "big"))
+
+def member_email(n: int) -> str:
+    return f"member{n:07d}@loadtest.example"
+
+# Generated codes carry an "L" so they can never collide with live 6-digit codes
+def transaction_code(n: int) -> str:
+    return f"L{n:07d}"
+
+def prepaid_code(n: int) -> str:
+    return f"PL{n:07d}"
+
+def cash_code(n: int) -> str:
+    return f"CL{n:07d}"
+
+def is_verified_member(n: int) -> bool:
+    # One member in twenty is still awaiting ID verification
+    return n % 20 != 19
+
+def member_created_at(n: int) -> datetime:
+    # Membership grows over the history window; older members have lower numbers
+    return EPOCH - timedelta(days=LOAD_HISTORY_DAYS * (1 - n / max(LOAD_MEMBERS, 1)) + 30)
+
+def event_time(rng: random.Random) -> datetime:
+    """A moment in the history window, skewed towards the recent end like real traffic."""
+    age_days = LOAD_HISTORY_DAYS * (rng.random() ** 2)
+    return EPOCH - timedelta(days=age_days)
+
+def pick_member(rng: random.Random) -> int:
+    """Heavy-tailed member choice: a few regulars place most of the orders."""
+    return min(int(LOAD_MEMBERS * (rng.random() ** 3)), LOAD_MEMBERS - 1)
+
+def load_catalog() -> list:
+    """Product documents from seed_complete_inventory.py at the repository root."""
+    path = BACKEND.parent / "seed_complete_inventory.py"
+    spec = importlib.util.spec_from_file_location("seed_complete_inventory", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return [dict(product) for product in module.complete_inventory]
+
+class BatchWriter:
+    """insert_many in LOAD_BATCH_SIZE batches with LOAD_WRITE_CONCURRENCY batches in flight."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.batch = []
+        self.pending = set()
+        self.semaphore = asyncio.Semaphore(LOAD_WRITE_CONCURRENCY)
+        self.written = 0
+
+    async def _insert(self, documents: list):
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+            self.written += len(documents)
+        finally:
+            self.semaphore.release()
+
+    async def add(self, document: dict):
+        self.batch.append(document)
+        if len(self.batch) >= LOAD_BATCH_SIZE:
+            await self.flush()
+
+    async def flush(self):
+        if not self.batch:
+            return
+        documents, self.batch = self.batch, []
+        await self.semaphore.acquire()
+        task = asyncio.create_task(self._insert(documents))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def close(self) -> int:
+        await self.flush()
+        if self.pending:
+            await asyncio.gather(*self.pending)
+        return self.written
+
+def line_items(rng: random.Random, products: list) -> list:
+    chosen = rng.sample(products, k=min(len(products), rng.choice((1, 1, 2, 2, 3))))
+    return [
+        {
+            "product_id": product["_id"],
+            "product_name": product["name"],
+            "tier": product.get("tier"),
+            "quantity": rng.choice((1, 1, 1, 2, 3)),
+            "price": product["price"]
+        }
+        for product in chosen
+    ]
+
+def order_total(items: list) -> float:
+    return round(sum(item["price"] * item["quantity"] for item in items), 2)
+
+async def load_members(db, password_hash: str) -> int:
+    rng = random.Random(f"{LOAD_SEED}:members")
+    writer = BatchWriter(db.users)
+    for n in range(LOAD_MEMBERS):
+        created_at = member_created_at(n)
+        tier = "premium" if rng.random() < 0.3 else "basic"
+        verified = is_verified_member(n)
+        await writer.add({
+            "_id": stable_object_id(KIND_MEMBER, n, created_at),
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "username": f"member{n:07d}",
+            "email": member_email(n),
+            "password_hash": password_hash,
+            "full_name": f"Load Member {n}",
+            "date_of_birth": f"{1960 + rng.randrange(40)}-{1 + rng.randrange(12):02d}-{1 + rng.randrange(28):02d}",
+            "membership_tier": tier,
+            "is_verified": verified,
+            "is_active": True,
+            "verification_status": "approved" if verified else "pending",
+            "wictionary_access": tier == "premium",
+            "preferences": {},
+            "id_verification": {"verification_status": "approved" if verified else "pending", "requires_medical": False},
+            "profile": {"address": None, "phone": None, "profile_photo_url": None, "purchases_count": 0, "tokens_balance": 0},
+            "member_since": created_at,
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+    return await writer.close()
+
+async def load_products(db) -> list:
+    catalog = load_catalog()
+    created_at = EPOCH - timedelta(days=LOAD_HISTORY_DAYS + 60)
+    for n, product in enumerate(catalog):
+        product["_id"] = stable_object_id(KIND_PRODUCT, n, created_at)
+        product["created_at"] = created_at
+        product["updated_at"] = created_at
+    await db.products.insert_many(catalog)
+    return catalog
+
+async def load_orders(db, products: list) -> int:
+    rng = random.Random(f"{LOAD_SEED}:orders")
+    writer = BatchWriter(db.orders)
+    for n in range(LOAD_ORDERS):
+        created_at = event_time(rng)
+        member = pick_member(rng)
+        items = line_items(rng, products)
+        await writer.add({
+            "_id": stable_object_id(KIND_ORDER, n, created_at),
+            "user_id": stable_object_id(KIND_MEMBER, member, member_created_at(member)),
+            "items": items,
+            "total": order_total(items),
+            "payment_method": rng.choice(("cash", "in_app")),
+            "status": "completed" if created_at < EPOCH - timedelta(days=2) else rng.choice(("pending", "confirmed", "ready_for_pickup")),
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+    return await writer.close()
+
+async def load_transactions(db, products: list) -> int:
+    rng = random.Random(f"{LOAD_SEED}:transactions")
+    writer = BatchWriter(db.transactions)
+    for n in range(LOAD_TRANSACTIONS):
+        created_at = event_time(rng)
+        member = pick_member(rng)
+        items = line_items(rng, products)
+        payment_method = "in_app" if rng.random() < 0.7 else "cash_in_store"
+        recent = created_at > EPOCH - timedelta(days=2)
+        if recent:
+            status = "paid_in_app" if payment_method == "in_app" else "pending"
+        else:
+            status = "picked_up" if payment_method == "in_app" else "cash_paid_in_store"
+        await writer.add({
+            "_id": stable_object_id(KIND_TRANSACTION, n, created_at),
+            "user_id": stable_object_id(KIND_MEMBER, member, member_created_at(member)),
+            "user_email": member_email(member),
+            "items": items,
+            "total": order_total(items),
+            "payment_method": payment_method,
+            "payment_code": transaction_code(n),
+            "status": status,
+            "notes": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "picked_up_at": None if recent else created_at + timedelta(hours=rng.randrange(1, 48)),
+            "admin_who_processed": None if recent else LOAD_ADMIN_EMAIL
+        })
+    return await writer.close()
+
+def pickup_items(items: list) -> list:
+    # The Square and cash flows store line items as plain JSON from the client
+    return [{**item, "product_id": str(item["product_id"])} for item in items]
+
+async def load_prepaid_orders(db, products: list) -> int:
+    rng = random.Random(f"{LOAD_SEED}:prepaid")
+    writer = BatchWriter(db.prepaid_orders)
+    for n in range(LOAD_PREPAID_ORDERS):
+        created_at = event_time(rng)
+        member = pick_member(rng)
+        items = line_items(rng, products)
+        picked_up = created_at < EPOCH - timedelta(days=2)
+        await writer.add({
+            "_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "user_id": str(stable_object_id(KIND_MEMBER, member, member_created_at(member))),
+            "user_email": member_email(member),
+            "pickup_code": prepaid_code(n),
+            "order_id": f"load-square-{n}",
+            "payment_id": f"load-payment-{n}",
+            "items": pickup_items(items),
+            "total_amount": order_total(items),
+            "payment_method": "square",
+            "status": "picked_up" if picked_up else "ready_for_pickup",
+            "created_at": created_at.isoformat(),
+            "pickup_completed_at": (created_at + timedelta(hours=3)).isoformat() if picked_up else None,
+            "completed_by": LOAD_ADMIN_EMAIL if picked_up else None,
+            "pickup_notes": None
+        })
+    return await writer.close()
+
+async def load_cash_pickups(db, products: list) -> int:
+    rng = random.Random(f"{LOAD_SEED}:cash")
+    writer = BatchWriter(db.cash_pickup_orders)
+    for n in range(LOAD_CASH_PICKUPS):
+        created_at = event_time(rng)
+        member = pick_member(rng)
+        items = line_items(rng, products)
+        processed = created_at < EPOCH - timedelta(days=2)
+        await writer.add({
+            "_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "user_id": str(stable_object_id(KIND_MEMBER, member, member_created_at(member))),
+            "user_email": member_email(member),
+            "pickup_code": cash_code(n),
+            "order_id": f"load-cash-{n}",
+            "items": pickup_items(items),
+            "total_amount": order_total(items),
+            "payment_method": "cash_pickup",
+            "status": "completed" if processed else "pending_pickup",
+            "created_at": created_at.isoformat(),
+            "processed_at": (created_at + timedelta(hours=2)).isoformat() if processed else None,
+            "processed_by": LOAD_ADMIN_EMAIL if processed else None
+        })
+    return await writer.close()
+
+async def load_ratings(db, products: list) -> int:
+    """LOAD_RATINGS_PER_PRODUCT ratings per product, each from a different member."""
+    rng = random.Random(f"{LOAD_SEED}:ratings")
+    per_product = min(LOAD_RATINGS_PER_PRODUCT, LOAD_MEMBERS)
+    # Walking the members with a stride coprime to their count visits each one once
+    stride = 7919
+    while math.gcd(stride, LOAD_MEMBERS) != 1:
+        stride += 2
+    writer = BatchWriter(db.ratings)
+    n = 0
+    for p, product in enumerate(products):
+        offset = rng.randrange(LOAD_MEMBERS)
+        for k in range(per_product):
+            member = (offset + k * stride) % LOAD_MEMBERS
+            created_at = max(event_time(rng), member_created_at(member))
+            has_review = rng.random() < 0.3
+            await writer.add({
+                "_id": stable_object_id(KIND_RATING, n, created_at),
+                "product_id": product["_id"],
+                "user_id": stable_object_id(KIND_MEMBER, member, member_created_at(member)),
+                "rating": rng.choices((1, 2, 3, 4, 5), weights=(3, 4, 13, 35, 45))[0],
+                "review": f"Load review {n} for {product['name']}" if has_review else None,
+                "experience": rng.choice(("relaxed", "uplifted", "creative", "sleepy")) if has_review and rng.random() < 0.5 else None,
+                "created_at": created_at,
+                "updated_at": created_at
+            })
+            n += 1
+    return await writer.close()
+
+async def load_admin(db):
+    from utils.passwords import password_hasher
+    await db.admins.insert_one({
+        "username": "load-admin",
+        "email": LOAD_ADMIN_EMAIL,
+        "password_hash": await password_hasher.hash(LOAD_ADMIN_PASSWORD),
+        "full_name": "Load Test Admin",
+        "role": "super_admin",
+        "is_active": True,
+        "created_at": EPOCH,
+        "updated_at": EPOCH
+    })
+
+async def timed(label: str, coro):
+    started = time.perf_counter()
+    result = await coro
+    count = len(result) if isinstance(result, list) else result if isinstance(result, int) else ""
+    print(f"{label:<22} {count:>10} {time.perf_counter() - started:>8.1f}s")
+    return result
+
+def write_manifest(products: list):
+    in_stock = [str(product["_id"]) for product in products if product.get("in_stock")]
+    manifest = {
+        "seed": LOAD_SEED,
+        "epoch": EPOCH.isoformat(),
+        "db_name": os.environ["DB_NAME"],
+        "generated_at": datetime.utcnow().isoformat(),
+        "counts": {
+            "members": LOAD_MEMBERS, "products": len(products), "orders": LOAD_ORDERS,
+            "transactions": LOAD_TRANSACTIONS, "prepaid_orders": LOAD_PREPAID_ORDERS,
+            "cash_pickup_orders": LOAD_CASH_PICKUPS, "ratings_per_product": min(LOAD_RATINGS_PER_PRODUCT, LOAD_MEMBERS)
+        },
+        # Spread over the population, so shoppers include regulars and one-time buyers
+        "shopper_emails": [
+            member_email(n) for n in range(0, LOAD_MEMBERS, max(LOAD_MEMBERS // MANIFEST_SHOPPERS, 1))
+            if is_verified_member(n)
+        ],
+        "member_password": LOAD_MEMBER_PASSWORD,
+        "admin_email": LOAD_ADMIN_EMAIL,
+        "admin_password": LOAD_ADMIN_PASSWORD,
+        "in_stock_product_ids": in_stock,
+        "pickup_codes": {
+            "transactions": [transaction_code(n) for n in range(0, LOAD_TRANSACTIONS, max(LOAD_TRANSACTIONS // MANIFEST_PICKUP_CODES, 1))],
+            "prepaid_orders": [prepaid_code(n) for n in range(0, LOAD_PREPAID_ORDERS, max(LOAD_PREPAID_ORDERS // MANIFEST_PICKUP_CODES, 1))],
+            "cash_pickup_orders": [cash_code(n) for n in range(0, LOAD_CASH_PICKUPS, max(LOAD_CASH_PICKUPS // MANIFEST_PICKUP_CODES, 1))]
+        }
+    }
+    Path(LOAD_MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+async def main():
+    """Drop and regenerate the load-test dataset in DB_NAME, then rebuild derived data and indexes."""
+    db_name = os.environ.get("DB_NAME")
+    if not db_name or db_name == DEFAULT_DB_NAME:
+        print("Set DB_NAME to a scratch database; this script drops the collections it loads.")
+        sys.exit(1)
+
+    from utils.database import db
+    from utils.indexes import ensure_indexes
+    from utils.member_stats import backfill_member_stats
+    from utils.passwords import password_hasher
+    from utils.pickup_index import backfill_pickup_index
+    from utils.rating_stats import repair_rating_stats
+    from utils.sales_rollups import ROLLUP_CHANNELS, backfill_sales_rollups
+
+    print(f"Generating into {db_name} (seed {LOAD_SEED})")
+    await asyncio.gather(*[db[name].drop() for name in LOADED_COLLECTIONS])
+
+    # One hash for every member keeps generation fast; logins still run the real KDF
+    password_hash = await password_hasher.hash(LOAD_MEMBER_PASSWORD)
+    products = await timed("products", load_products(db))
+    sellable = [product for product in products if product.get("in_stock")] or products
+    await load_admin(db)
+    await timed("members", load_members(db, password_hash))
+    await timed("orders", load_orders(db, sellable))
+    await timed("transactions", load_transactions(db, sellable))
+    await timed("prepaid orders", load_prepaid_orders(db, sellable))
+    await timed("cash pickups", load_cash_pickups(db, sellable))
+    await timed("ratings", load_ratings(db, products))
+
+    # Indexes after the bulk load (faster than maintaining them per insert), before the backfills that query them
+    status = await timed("indexes", ensure_indexes())
+    for name, error in status["errors"].items():
+        print(f"Error building indexes on {name}: {error}")
+    await timed("rating aggregates", repair_rating_stats())
+    await timed("member stats", backfill_member_stats())
+    await timed("sales rollups", backfill_sales_rollups(list(ROLLUP_CHANNELS)))
+    await timed("pickup index", backfill_pickup_index())
+
+    write_manifest(products)
+    print(f"Manifest written to {LOAD_MANIFEST}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Replay realistic traffic against a running API and report per-endpoint latency.
+
+Three kinds of virtual user run concurrently for DURATION_SECONDS:
+  shoppers  browse the catalog, fill a cart and check out (POST /api/transactions/)
+  admins    poll the dashboard, pickup and rating stats every ADMIN_POLL_SECONDS
+  counters  look up pickup codes from the dataset (plus a share of unknown codes)
+
+Credentials, products and pickup codes come from the manifest written by
+benchmarks/generate_load_data.py. The report (REPORT_PATH) has throughput, error
+counts and p50/p95/p99 per endpoint template, sorted keys, so reports from two
+commits diff cleanly. Checkouts write real transactions, so point it at the load
+database only.
+
+    DB_NAME=statusxsmoakland_load uvicorn server:app --port 8001 --workers 4
+    BASE_URL=http://127.0.0.1:8001 LOAD_MANIFEST=load_manifest.json python benchmarks/load_test.py
+"""
+
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+BASE_URL = os.environ.get("BASE_URL", "http://127.0.0.1:8001")
+LOAD_MANIFEST = os.environ.get("LOAD_MANIFEST", "load_manifest.json")
+REPORT_PATH = os.environ.get("REPORT_PATH", "load_report.json")
+LOAD_SEED = int(os.environ.get("LOAD_SEED", "1337"))
+DURATION_SECONDS = float(os.environ.get("DURATION_SECONDS", "60"))
+WARMUP_SECONDS = float(os.environ.get("WARMUP_SECONDS", "5"))
+SHOPPERS = int(os.environ.get("SHOPPERS", "50"))
+ADMINS = int(os.environ.get("ADMINS", "3"))
+COUNTERS = int(os.environ.get("COUNTERS", "10"))
+ADMIN_POLL_SECONDS = float(os.environ.get("ADMIN_POLL_SECONDS", "5"))
+# Pause between a shopper's steps, in seconds (uniform between the two)
+THINK_TIME = (float(os.environ.get("THINK_MIN_SECONDS", "0.05")), float(os.environ.get("THINK_MAX_SECONDS", "0.5")))
+# Share of counter lookups for codes that don't exist (typos at the till)
+UNKNOWN_CODE_SHARE = 0.1
+REQUEST_TIMEOUT_SECONDS = 30
+
+class Recorder:
+    """Latencies and outcomes per endpoint template, ignoring the warm-up period."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies = defaultdict(list)
+        self.status_codes = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.scenarios = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, method: str, template: str, url: str = None,
+                      expected=(200,), **kwargs) -> httpx.Response:
+        """Send one request, recorded under "METHOD template" (e.g. GET /api/products/{product_id})."""
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url or template, **kwargs)
+            status_code = response.status_code
+        except httpx.HTTPError as e:
+            response = None
+            status_code = type(e).__name__
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if started >= self.measure_from:
+            label = f"{method} {template}"
+            self.latencies[label].append(elapsed_ms)
+            self.status_codes[label][str(status_code)] += 1
+            if status_code not in expected:
+                self.errors[label] += 1
+        return response
+
+    def scenario_done(self, name: str):
+        if time.perf_counter() >= self.measure_from:
+            self.scenarios[name] += 1
+
+def percentile(sorted_values: list, share: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(share * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+async def think(rng: random.Random):
+    await asyncio.sleep(rng.uniform(*THINK_TIME))
+
+async def login(client: httpx.AsyncClient, recorder: Recorder, path: str, email: str, password: str) -> dict:
+    response = await recorder.request(client, "POST", path, json={"email": email, "password": password})
+    if response is None or response.status_code != 200:
+        raise RuntimeError(f"Login failed for {email}: {response.status_code if response else 'no response'}")
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def shopper(client: httpx.AsyncClient, recorder: Recorder, manifest: dict, n: int, deadline: float):
+    """Browse -> cart -> checkout, repeated until the deadline."""
+    rng = random.Random(f"{LOAD_SEED}:shopper:{n}")
+    email = manifest["shopper_emails"][n % len(manifest["shopper_emails"])]
+    headers = await login(client, recorder, "/api/auth/login", email, manifest["member_password"])
+    products = manifest["in_stock_product_ids"]
+
+    while time.perf_counter() < deadline:
+        await recorder.request(client, "GET", "/api/products/", headers=headers)
+        await think(rng)
+        category = rng.choice(("flower", "edibles", "vapes", "pre-rolls"))
+        await recorder.request(client, "GET", "/api/products/", params={"category": category}, headers=headers)
+        await think(rng)
+
+        basket = rng.sample(products, k=min(len(products), rng.choice((1, 2, 3))))
+        for product_id in basket:
+            await recorder.request(client, "GET", "/api/products/{product_id}", f"/api/products/{product_id}", headers=headers)
+            await think(rng)
+            await recorder.request(
+                client, "POST", "/api/cart/add", headers=headers,
+                json={"product_id": product_id, "quantity": rng.choice((1, 1, 2))}
+            )
+        await recorder.request(client, "GET", "/api/cart/details", headers=headers)
+        await think(rng)
+
+        # Most visits end in a checkout; the rest abandon the cart
+        if rng.random() < 0.7:
+            cart = await recorder.request(client, "GET", "/api/cart/", headers=headers)
+            items = [{"product_id": item["product_id"], "quantity": item["quantity"]} for item in (cart.json() if cart is not None and cart.status_code == 200 else [])]
+            if items:
+                await recorder.request(
+                    client, "POST", "/api/transactions/", headers=headers,
+                    json={"items": items, "payment_method": "in_app"}
+                )
+            await recorder.request(client, "GET", "/api/transactions/my-history", headers=headers)
+        await recorder.request(client, "DELETE", "/api/cart/", headers=headers)
+        recorder.scenario_done("browse_cart_checkout")
+        await think(rng)
+
+async def admin_poller(client: httpx.AsyncClient, recorder: Recorder, manifest: dict, n: int, deadline: float):
+    """The admin dashboard's polling loop."""
+    rng = random.Random(f"{LOAD_SEED}:admin:{n}")
+    headers = await login(client, recorder, "/api/admin-auth/login", manifest["admin_email"], manifest["admin_password"])
+    # Stagger the pollers so they don't fire in lockstep
+    await asyncio.sleep(rng.uniform(0, ADMIN_POLL_SECONDS))
+
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            recorder.request(client, "GET", path, headers=headers)
+            for path in (
+                "/api/admin/dashboard/stats",
+                "/api/admin/prepaid-orders/stats",
+                "/api/admin/cash-pickups/stats",
+                "/api/admin/reports/quick-stats/today",
+                "/api/admin/verification/stats"
+            )
+        ])
+        await recorder.request(client, "GET", "/api/admin/members", headers=headers, params={"limit": 50})
+        await recorder.request(client, "GET", "/api/admin/ratings/stats", headers=headers, params={"limit": 20})
+        recorder.scenario_done("admin_dashboard_poll")
+        await asyncio.sleep(max(ADMIN_POLL_SECONDS - (time.perf_counter() - started), 0))
+
+async def counter(client: httpx.AsyncClient, recorder: Recorder, manifest: dict, n: int, deadline: float):
+    """A pickup counter tablet resolving codes as customers arrive."""
+    rng = random.Random(f"{LOAD_SEED}:counter:{n}")
+    headers = await login(client, recorder, "/api/admin-auth/login", manifest["admin_email"], manifest["admin_password"])
+    codes = [code for channel_codes in manifest["pickup_codes"].values() for code in channel_codes]
+
+    while time.perf_counter() < deadline:
+        if rng.random() < UNKNOWN_CODE_SHARE or not codes:
+            code = f"{rng.randrange(10 ** 6):06d}"
+        else:
+            code = rng.choice(codes)
+        await recorder.request(
+            client, "GET", "/api/admin/pickup-lookup/{code}", f"/api/admin/pickup-lookup/{code}",
+            expected=(200, 404), headers=headers
+        )
+        recorder.scenario_done("counter_pickup_lookup")
+        await asyncio.sleep(rng.uniform(0.5, 2.0))
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def build_report(recorder: Recorder, manifest: dict, measured_seconds: float) -> dict:
+    endpoints = {}
+    for label, latencies in recorder.latencies.items():
+        latencies.sort()
+        endpoints[label] = {
+            "requests": len(latencies),
+            "errors": recorder.errors[label],
+            "throughput_rps": round(len(latencies) / measured_seconds, 2),
+            "mean_ms": round(sum(latencies) / len(latencies), 2),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "status_codes": dict(recorder.status_codes[label])
+        }
+    total_requests = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "commit": git_commit(),
+        "started_at": datetime.utcnow().isoformat(),
+        "base_url": BASE_URL,
+        "config": {
+            "duration_seconds": DURATION_SECONDS, "warmup_seconds": WARMUP_SECONDS, "shoppers": SHOPPERS,
+            "admins": ADMINS, "counters": COUNTERS, "admin_poll_seconds": ADMIN_POLL_SECONDS, "seed": LOAD_SEED
+        },
+        "dataset": {"seed": manifest.get("seed"), "epoch": manifest.get("epoch"), "counts": manifest.get("counts")},
+        "totals": {
+            "requests": total_requests,
+            "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+            "throughput_rps": round(total_requests / measured_seconds, 2)
+        },
+        "scenarios": {name: {"completed": count, "per_second": round(count / measured_seconds, 2)} for name, count in recorder.scenarios.items()},
+        "endpoints": endpoints
+    }
+
+async def main():
+    """Run every virtual user until the deadline, then write and print the report."""
+    manifest = json.loads(Path(LOAD_MANIFEST).read_text())
+    started = time.perf_counter()
+    measure_from = started + WARMUP_SECONDS
+    deadline = measure_from + DURATION_SECONDS
+    recorder = Recorder(measure_from)
+
+    limits = httpx.Limits(max_connections=SHOPPERS + ADMINS * 8 + COUNTERS)
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=REQUEST_TIMEOUT_SECONDS, limits=limits) as client:
+        print(f"{SHOPPERS} shoppers, {ADMINS} admins, {COUNTERS} counters for {DURATION_SECONDS:.0f}s (+{WARMUP_SECONDS:.0f}s warm-up) against {BASE_URL}")
+        await asyncio.gather(
+            *[shopper(client, recorder, manifest, n, deadline) for n in range(SHOPPERS)],
+            *[admin_poller(client, recorder, manifest, n, deadline) for n in range(ADMINS)],
+            *[counter(client, recorder, manifest, n, deadline) for n in range(COUNTERS)]
+        )
+
+    measured_seconds = max(time.perf_counter() - measure_from, 1e-9)
+    report = build_report(recorder, manifest, measured_seconds)
+    Path(REPORT_PATH).write_text(json.dumps(report, indent=2, sort_keys=True))
+
+    print(f"{'endpoint':<48} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for label, endpoint in sorted(report["endpoints"].items()):
+        print(
+            f"{label:<48} {endpoint['requests']:>7} {endpoint['errors']:>5} {endpoint['throughput_rps']:>8.2f} "
+            f"{endpoint['p50_ms']:>8.1f} {endpoint['p95_ms']:>8.1f} {endpoint['p99_ms']:>8.1f}"
+        )
+    print(f"Total {report['totals']['requests']} requests, {report['totals']['errors']} errors, "
+          f"{report['totals']['throughput_rps']:.1f} req/s. Report written to {REPORT_PATH}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.blob_store import blob_store, private_blob_store
+
+async def main():
+    """Delete unreferenced upload blobs past the grace period (run from cron)."""
+    for name, store in (("public", blob_store), ("private", private_blob_store)):
+        result = await store.collect_garbage()
+        print(f"Deleted {result['deleted_blobs']} unreferenced {name} blobs, freed {result['bytes_freed']} bytes")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,6 +8,8 @@ class OrderItem(BaseModel):
     product_id: PyObjectId
     quantity: int = Field(..., gt=0)
     price: float = Field(..., gt=0)
+    product_name: Optional[str] = None  # Denormalized at order time
+    tier: Optional[str] = None  # za, deps, lows
 
 class OrderItemCreate(BaseModel):
     product_id: str
@@ -19,6 +21,7 @@ class OrderItemResponse(BaseModel):
     quantity: int
     price: float
     product_name: Optional[str] = None
+    tier: Optional[str] = None
 
 class OrderBase(BaseModel):
     user_id: PyObjectId
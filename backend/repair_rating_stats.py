@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.rating_stats import repair_rating_stats
+
+async def main():
+    """Recompute every product's rating aggregates from the ratings collection."""
+    product_count = await repair_rating_stats()
+    print(f"Rating stats repaired for {product_count} products")
+
+if __name__ == "__main__":
+    asyncio.run(main())
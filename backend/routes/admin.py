@@ -1,18 +1,34 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import List, Optional
 from datetime import datetime, timedelta
+import asyncio
+import os
+import time
 from models.user import UserResponse
 from models.transaction import TransactionResponse, AdminTransactionUpdate
 from models.product import Product, ProductCreate, ProductUpdate, ProductResponse
 from models.rating import ProductRatingStats, UserRatingHistory
 from .admin_auth import verify_admin_token, get_admin_data
-from utils.database import users_collection, transactions_collection, products_collection, ratings_collection, convert_object_id
+from utils.database import users_collection, transactions_collection, products_collection, convert_object_id
 from utils.file_upload import get_file_url
+from utils.catalog_cache import catalog_cache
+from utils.passwords import password_hasher
+from utils.blob_store import blob_store, private_blob_store
+from utils.indexes import index_drift, start_index_build, index_build_status
+from utils.pagination import fetch_keyset_page, set_next_cursor
+from utils.member_stats import get_member_stats_map
+from utils.rating_stats import RATING_VALUES
+from utils.pickup_index import lookup_pickup
+from utils.pickup_state import complete_pickup
+from utils.user_context import invalidate_user, revoke_user_claims
 from bson import ObjectId
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Reviews shown per product, and ratings per member, on the admin rating pages
+RECENT_REVIEWS_LIMIT = 5
+
 class VerificationUpdate(BaseModel):
     user_id: str
     status: str  # "approved", "rejected"
@@ -81,21 +97,12 @@ async def get_all_members(
     cursor = users_collection.find(query).skip(skip).limit(limit)
     users = await cursor.to_list(length=limit)
     
+    # Spending summaries for the whole page in one query
+    stats_by_member = await get_member_stats_map(user["_id"] for user in users)
+    
     member_profiles = []
     for user in users:
-        # Get transaction summary for this user (before converting ObjectId)
-        transaction_pipeline = [
-            {"$match": {"user_id": user["_id"]}},
-            {"$group": {
-                "_id": None,
-                "total_spent": {"$sum": "$total"},
-                "order_count": {"$sum": 1},
-                "last_order": {"$max": "$created_at"}
-            }}
-        ]
-        
-        transaction_summary = await transactions_collection.aggregate(transaction_pipeline).to_list(length=1)
-        summary = transaction_summary[0] if transaction_summary else {}
+        summary = stats_by_member.get(str(user["_id"]), {})
         
         # Now convert ObjectId for response
         user_data = convert_object_id(user)
@@ -123,9 +130,11 @@ async def get_all_members(
 @router.get("/members/{user_id}/transactions", response_model=List[TransactionResponse])
 async def get_member_transactions(
     user_id: str,
+    response: Response,
     admin = Depends(get_admin_data),
     skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=50)
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; takes precedence over skip")
 ):
     """Get all transactions for a specific member."""
     
@@ -143,10 +152,11 @@ async def get_member_transactions(
             detail="Member not found"
         )
     
-    # Get transactions
-    cursor = transactions_collection.find({"user_id": ObjectId(user_id)})
-    cursor = cursor.sort("created_at", -1).skip(skip).limit(limit)
-    transactions = await cursor.to_list(length=limit)
+    # Get transactions, most recent first
+    transactions, next_cursor = await fetch_keyset_page(
+        transactions_collection, {"user_id": ObjectId(user_id)}, "created_at", limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
     transaction_responses = []
     for transaction in transactions:
@@ -233,16 +243,22 @@ async def update_verification_status(
     if verification_update.rejected_reason:
         update_data["id_verification.rejected_reason"] = verification_update.rejected_reason
     
-    result = await users_collection.update_one(
+    updated_user = await users_collection.find_one_and_update(
         {"_id": ObjectId(verification_update.user_id)},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"email": 1}
     )
     
-    if result.matched_count == 0:
+    if updated_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    if verification_update.status == "approved":
+        invalidate_user(updated_user["email"])
+    else:
+        # The user's tokens may carry a verified claim
+        await revoke_user_claims(updated_user["email"])
     
     return {
         "message": f"User verification {verification_update.status}",
@@ -279,6 +295,22 @@ async def get_verification_stats(admin = Depends(get_admin_data)):
 
 # ===== PICKUP VERIFICATION =====
 
+@router.get("/pickup-lookup/{code}")
+async def pickup_lookup(
+    code: str,
+    admin = Depends(get_admin_data)
+):
+    """Resolve any pickup code (in-app, Square/wallet prepaid or cash) from pickup_index."""
+
+    entry = await lookup_pickup(code)
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invalid pickup code"
+        )
+
+    return entry
+
 @router.get("/pickup/{payment_code}", response_model=TransactionResponse)
 async def get_pickup_details(
     payment_code: str,
@@ -312,14 +344,6 @@ async def process_pickup(
 ):
     """Process pickup - mark as picked up or cash paid."""
     
-    # Find transaction by payment code
-    transaction = await transactions_collection.find_one({"payment_code": update_data.payment_code})
-    if not transaction:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transaction not found with this payment code"
-        )
-    
     # Update based on action
     update_fields = {
         "updated_at": datetime.utcnow(),
@@ -332,23 +356,14 @@ async def process_pickup(
     
     if update_data.action == "mark_picked_up":
         # For in-app payments, mark as picked up
-        update_fields["status"] = "picked_up"
+        new_status = "picked_up"
         
     elif update_data.action == "mark_cash_paid":
         # For cash payments, mark as cash paid in store
-        update_fields["status"] = "cash_paid_in_store"
-    
-    # Update transaction
-    result = await transactions_collection.update_one(
-        {"payment_code": update_data.payment_code},
-        {"$set": update_fields}
-    )
+        new_status = "cash_paid_in_store"
     
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transaction not found"
-        )
+    # One guarded update; a second tablet completing the same code gets a 400
+    await complete_pickup("transactions", update_data.payment_code, new_status, update_fields)
     
     return {
         "message": f"Pickup processed successfully",
@@ -406,6 +421,7 @@ async def add_product(
     product_dict["updated_at"] = datetime.utcnow()
     
     result = await products_collection.insert_one(product_dict)
+    catalog_cache.invalidate()
     
     # Get created product
     created_product = await products_collection.find_one({"_id": result.inserted_id})
@@ -442,6 +458,8 @@ async def update_product(
             detail="Product not found"
         )
     
+    catalog_cache.invalidate()
+    
     # Get updated product
     updated_product = await products_collection.find_one({"_id": ObjectId(product_id)})
     product_response_data = convert_object_id(updated_product)
@@ -469,69 +487,152 @@ async def delete_product(
             detail="Product not found"
         )
     
+    catalog_cache.invalidate()
+    
     return {"message": "Product deleted successfully", "product_id": product_id}
 
+@router.get("/catalog-cache/stats")
+async def get_catalog_cache_stats(admin = Depends(get_admin_data)):
+    """Get catalog snapshot cache counters (hits, misses, rebuild times)."""
+    return catalog_cache.stats()
+
+@router.get("/password-hashing/stats")
+async def get_password_hashing_stats(admin = Depends(get_admin_data)):
+    """Get password KDF latency, queueing and rehash counters."""
+    return password_hasher.stats()
+
+@router.get("/blob-store/stats")
+async def get_blob_store_stats(admin = Depends(get_admin_data)):
+    """Get upload blob counts, deduplication savings and disk usage."""
+    return await blob_store.stats()
+
+@router.post("/blob-store/gc")
+async def collect_blob_garbage(admin = Depends(get_admin_data)):
+    """Delete uploads no strain, deal or user has referenced for BLOB_GC_GRACE_SECONDS."""
+    return {
+        "public": await blob_store.collect_garbage(),
+        "private": await private_blob_store.collect_garbage()
+    }
+
+@router.get("/indexes")
+async def get_index_drift(admin = Depends(get_admin_data)):
+    """Compare live indexes with the index registry (missing, extra, mismatched options)."""
+    return await index_drift()
+
+@router.post("/indexes/build")
+async def build_indexes(admin = Depends(get_admin_data)):
+    """Start a background build of any missing registry indexes."""
+    start_index_build()
+    return index_build_status
+
 # ===== DASHBOARD STATS =====
 
-@router.get("/dashboard/stats")
-async def get_dashboard_stats(admin = Depends(get_admin_data)):
-    """Get admin dashboard statistics."""
-    
-    # User statistics
-    total_users = await users_collection.count_documents({})
-    verified_users = await users_collection.count_documents({"is_verified": True})
-    pending_verifications = await users_collection.count_documents({
-        "id_verification.verification_status": {"$in": ["pending", "needs_medical"]}
-    })
-    
-    # Transaction statistics
-    total_transactions = await transactions_collection.count_documents({})
-    pending_pickups = await transactions_collection.count_documents({
-        "status": {"$in": ["pending", "paid_in_app", "awaiting_pickup"]}
-    })
-    
+# The dashboard polls this constantly; serve a recent result unless ?fresh=1 is passed
+DASHBOARD_STATS_TTL_SECONDS = float(os.environ.get("DASHBOARD_STATS_TTL_SECONDS", "15"))
+_dashboard_stats_cache = {"stats": None, "expires_at": 0.0}
+_dashboard_stats_lock = asyncio.Lock()
+
+def _facet_count(facet_result: dict, name: str) -> int:
+    """Read a {"$count": "n"} facet, which is empty when nothing matched."""
+    rows = facet_result.get(name) or []
+    return rows[0]["n"] if rows else 0
+
+# Every rating across products, from the aggregates utils.rating_stats keeps on each product
+RATING_TOTALS_GROUP = {"$group": {"_id": None, "rating_sum": {"$sum": "$rating_sum"}, "rating_count": {"$sum": "$rating_count"}}}
+
+async def _run_facet(collection, facets: dict) -> dict:
+    result = await collection.aggregate([{"$facet": facets}]).to_list(length=1)
+    return result[0] if result else {}
+
+async def compute_dashboard_stats() -> dict:
+    """Build dashboard statistics with one aggregation per collection, run concurrently."""
     # Revenue statistics (last 30 days)
     thirty_days_ago = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     thirty_days_ago = thirty_days_ago - timedelta(days=30)
     
-    revenue_pipeline = [
-        {"$match": {
-            "status": {"$in": ["picked_up", "cash_paid_in_store"]},
-            "created_at": {"$gte": thirty_days_ago}
-        }},
-        {"$group": {"_id": None, "total_revenue": {"$sum": "$total"}}}
-    ]
+    user_facets = {
+        "total": [{"$count": "n"}],
+        "verified": [{"$match": {"is_verified": True}}, {"$count": "n"}],
+        "pending_verification": [
+            {"$match": {"id_verification.verification_status": {"$in": ["pending", "needs_medical"]}}},
+            {"$count": "n"}
+        ]
+    }
+    transaction_facets = {
+        "total": [{"$count": "n"}],
+        "pending_pickups": [
+            {"$match": {"status": {"$in": ["pending", "paid_in_app", "awaiting_pickup"]}}},
+            {"$count": "n"}
+        ],
+        "monthly_revenue": [
+            {"$match": {
+                "status": {"$in": ["picked_up", "cash_paid_in_store"]},
+                "created_at": {"$gte": thirty_days_ago}
+            }},
+            {"$group": {"_id": None, "total_revenue": {"$sum": "$total"}}}
+        ]
+    }
+    product_facets = {
+        "total": [{"$count": "n"}],
+        "out_of_stock": [{"$match": {"in_stock": False}}, {"$count": "n"}],
+        # Rating totals from the per-product aggregates, never a pass over ratings
+        "ratings": [RATING_TOTALS_GROUP]
+    }
     
-    revenue_result = await transactions_collection.aggregate(revenue_pipeline).to_list(length=1)
-    monthly_revenue = revenue_result[0]["total_revenue"] if revenue_result else 0.0
+    users, transactions, products = await asyncio.gather(
+        _run_facet(users_collection, user_facets),
+        _run_facet(transactions_collection, transaction_facets),
+        _run_facet(products_collection, product_facets)
+    )
     
-    # Product statistics
-    total_products = await products_collection.count_documents({})
-    out_of_stock = await products_collection.count_documents({"in_stock": False})
+    revenue_result = transactions.get("monthly_revenue") or []
+    monthly_revenue = revenue_result[0]["total_revenue"] if revenue_result else 0.0
+    rating_summary = (products.get("ratings") or [{}])[0]
+    total_ratings = rating_summary.get("rating_count", 0)
     
     return {
         "users": {
-            "total": total_users,
-            "verified": verified_users,
-            "pending_verification": pending_verifications
+            "total": _facet_count(users, "total"),
+            "verified": _facet_count(users, "verified"),
+            "pending_verification": _facet_count(users, "pending_verification")
         },
         "transactions": {
-            "total": total_transactions,
-            "pending_pickups": pending_pickups
+            "total": _facet_count(transactions, "total"),
+            "pending_pickups": _facet_count(transactions, "pending_pickups")
         },
         "revenue": {
             "monthly": round(monthly_revenue, 2)
         },
         "inventory": {
-            "total_products": total_products,
-            "out_of_stock": out_of_stock
+            "total_products": _facet_count(products, "total"),
+            "out_of_stock": _facet_count(products, "out_of_stock")
         },
         "ratings": {
-            "total_ratings": await ratings_collection.count_documents({}),
-            "avg_rating_all_products": await get_overall_average_rating()
+            "total_ratings": total_ratings,
+            "avg_rating_all_products": round(rating_summary["rating_sum"] / total_ratings, 2) if total_ratings else 0.0
         }
     }
 
+@router.get("/dashboard/stats")
+async def get_dashboard_stats(
+    admin = Depends(get_admin_data),
+    fresh: bool = Query(False, description="Bypass the short-lived stats cache")
+):
+    """Get admin dashboard statistics."""
+    
+    if not fresh and _dashboard_stats_cache["stats"] is not None and time.monotonic() < _dashboard_stats_cache["expires_at"]:
+        return _dashboard_stats_cache["stats"]
+    
+    async with _dashboard_stats_lock:
+        # Another poll may have refreshed the cache while we waited
+        if not fresh and _dashboard_stats_cache["stats"] is not None and time.monotonic() < _dashboard_stats_cache["expires_at"]:
+            return _dashboard_stats_cache["stats"]
+        
+        stats = await compute_dashboard_stats()
+        _dashboard_stats_cache["stats"] = stats
+        _dashboard_stats_cache["expires_at"] = time.monotonic() + DASHBOARD_STATS_TTL_SECONDS
+        return stats
+
 @router.get("/ratings/stats", response_model=List[ProductRatingStats])
 async def get_product_rating_stats(
     admin = Depends(get_admin_data),
@@ -540,46 +641,54 @@ async def get_product_rating_stats(
 ):
     """Get detailed rating statistics for all products."""
     
-    # Get products with their rating stats
+    # Rating aggregates are maintained on the product (see utils.rating_stats); the
+    # latest reviews come back in the same aggregate, each $lookup walking the
+    # (product_id, created_at) ratings index and stopping after RECENT_REVIEWS_LIMIT
     pipeline = [
+        {"$sort": {"rating_count": -1, "_id": 1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": {"name": 1, "rating_sum": 1, "rating_count": 1, "rating_histogram": 1}},
         {"$lookup": {
             "from": "ratings",
-            "localField": "_id",
-            "foreignField": "product_id",
-            "as": "product_ratings"
-        }},
-        {"$addFields": {
-            "total_ratings": {"$size": "$product_ratings"},
-            "average_rating": {
-                "$cond": {
-                    "if": {"$gt": [{"$size": "$product_ratings"}, 0]},
-                    "then": {"$avg": "$product_ratings.rating"},
-                    "else": 0
-                }
-            }
-        }},
-        {"$sort": {"total_ratings": -1}},
-        {"$skip": skip},
-        {"$limit": limit}
+            "let": {"product_id": "$_id"},
+            "pipeline": [
+                {"$match": {
+                    "$expr": {"$eq": ["$product_id", "$$product_id"]},
+                    "$or": [{"review": {"$ne": None}}, {"experience": {"$ne": None}}]
+                }},
+                {"$sort": {"created_at": -1}},
+                {"$limit": RECENT_REVIEWS_LIMIT},
+                {"$project": {"user_id": 1, "rating": 1, "review": 1, "experience": 1, "created_at": 1}}
+            ],
+            "as": "recent_reviews"
+        }}
     ]
-    
     products = await products_collection.aggregate(pipeline).to_list(length=limit)
     
+    # One username lookup for every review on the page
+    usernames = await get_usernames(
+        review["user_id"] for product in products for review in product["recent_reviews"]
+    )
+    
     rating_stats = []
     for product in products:
-        # Get rating distribution
-        rating_distribution = await get_rating_distribution(product["_id"])
-        
-        # Get recent reviews
-        recent_reviews = await get_recent_reviews(product["_id"], limit=5)
-        
         stats = ProductRatingStats(
             product_id=str(product["_id"]),
             product_name=product.get("name", "Unknown"),
-            total_ratings=product.get("total_ratings", 0),
-            average_rating=round(product.get("average_rating", 0), 2),
-            rating_distribution=rating_distribution,
-            recent_reviews=recent_reviews
+            total_ratings=product.get("rating_count", 0),
+            average_rating=round(product.get("rating_sum", 0) / product["rating_count"], 2) if product.get("rating_count") else 0.0,
+            rating_distribution=get_rating_distribution(product),
+            recent_reviews=[
+                {
+                    "username": usernames.get(review["user_id"], "Anonymous"),
+                    "rating": review["rating"],
+                    "review": review.get("review"),
+                    "experience": review.get("experience"),
+                    "created_at": review["created_at"]
+                }
+                for review in product["recent_reviews"]
+            ]
         )
         rating_stats.append(stats)
     
@@ -614,29 +723,36 @@ async def get_user_rating_history(
         {"$match": {"total_ratings_given": {"$gt": 0}}},
         {"$sort": {"total_ratings_given": -1}},
         {"$skip": skip},
-        {"$limit": limit}
+        {"$limit": limit},
+        {"$project": {
+            "username": 1, "total_ratings_given": 1, "average_rating_given": 1,
+            "user_ratings.product_id": 1, "user_ratings.rating": 1, "user_ratings.review": 1,
+            "user_ratings.experience": 1, "user_ratings.created_at": 1
+        }}
     ]
     
     users = await users_collection.aggregate(pipeline).to_list(length=limit)
     
+    # The $lookup already returned every rating of these users; take the latest few
+    # from it and resolve all their product names in one query
+    for user in users:
+        user["recent_ratings"] = sorted(user["user_ratings"], key=lambda rating: rating["created_at"], reverse=True)[:RECENT_REVIEWS_LIMIT]
+    product_names = await get_product_names(
+        rating["product_id"] for user in users for rating in user["recent_ratings"]
+    )
+    
     user_histories = []
     for user in users:
-        # Get recent ratings
-        recent_ratings = await ratings_collection.find(
-            {"user_id": user["_id"]}
-        ).sort("created_at", -1).limit(5).to_list(length=5)
-        
-        # Convert recent ratings for response
-        recent_ratings_data = []
-        for rating in recent_ratings:
-            product = await products_collection.find_one({"_id": rating["product_id"]})
-            recent_ratings_data.append({
-                "product_name": product.get("name", "Unknown") if product else "Unknown",
+        recent_ratings_data = [
+            {
+                "product_name": product_names.get(rating["product_id"], "Unknown"),
                 "rating": rating["rating"],
                 "review": rating.get("review"),
                 "experience": rating.get("experience"),
                 "created_at": rating["created_at"]
-            })
+            }
+            for rating in user["recent_ratings"]
+        ]
         
         history = UserRatingHistory(
             user_id=str(user["_id"]),
@@ -651,54 +767,31 @@ async def get_user_rating_history(
 
 async def get_overall_average_rating():
     """Get overall average rating across all products."""
-    pipeline = [
-        {"$group": {
-            "_id": None,
-            "overall_average": {"$avg": "$rating"}
-        }}
-    ]
-    
-    result = await ratings_collection.aggregate(pipeline).to_list(length=1)
-    return round(result[0]["overall_average"], 2) if result else 0.0
+    result = await products_collection.aggregate([RATING_TOTALS_GROUP]).to_list(length=1)
+    if not result or not result[0]["rating_count"]:
+        return 0.0
+    return round(result[0]["rating_sum"] / result[0]["rating_count"], 2)
 
-async def get_rating_distribution(product_id):
-    """Get rating distribution (1-5 stars) for a product."""
-    pipeline = [
-        {"$match": {"product_id": product_id}},
-        {"$group": {
-            "_id": "$rating",
-            "count": {"$sum": 1}
-        }}
-    ]
-    
-    result = await ratings_collection.aggregate(pipeline).to_list(length=None)
-    distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-    
-    for item in result:
-        distribution[item["_id"]] = item["count"]
-    
-    return distribution
+def get_rating_distribution(product):
+    """Get rating distribution (1-5 stars) for a product from its stored histogram."""
+    histogram = product.get("rating_histogram") or {}
+    return {value: histogram.get(str(value), 0) for value in RATING_VALUES}
 
-async def get_recent_reviews(product_id, limit=5):
-    """Get recent reviews for a product."""
-    cursor = ratings_collection.find(
-        {"product_id": product_id, "$or": [{"review": {"$ne": None}}, {"experience": {"$ne": None}}]}
-    ).sort("created_at", -1).limit(limit)
-    
-    reviews = await cursor.to_list(length=limit)
-    recent_reviews = []
-    
-    for review in reviews:
-        user = await users_collection.find_one({"_id": review["user_id"]})
-        recent_reviews.append({
-            "username": user.get("username", "Anonymous") if user else "Anonymous",
-            "rating": review["rating"],
-            "review": review["review"],
-            "experience": review.get("experience"),
-            "created_at": review["created_at"]
-        })
-    
-    return recent_reviews
+async def get_usernames(user_ids) -> dict:
+    """{user _id: username} for the given ids, in one query."""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    cursor = users_collection.find({"_id": {"$in": user_ids}}, {"username": 1})
+    return {user["_id"]: user.get("username", "Anonymous") async for user in cursor}
+
+async def get_product_names(product_ids) -> dict:
+    """{product _id: name} for the given ids, in one query."""
+    product_ids = list(set(product_ids))
+    if not product_ids:
+        return {}
+    cursor = products_collection.find({"_id": {"$in": product_ids}}, {"name": 1})
+    return {product["_id"]: product.get("name", "Unknown") async for product in cursor}
 
 @router.post("/seed-database")
 async def seed_database():
@@ -716,16 +809,16 @@ async def seed_database():
         
         # Always update admin password to ensure it works
         if demo_admin:
-            from utils.auth import get_password_hash
+            from utils.passwords import password_hasher
             await admins_collection.update_one(
                 {"email": "admin@statusxsmoakland.com"},
-                {"$set": {"password_hash": get_password_hash("Admin123!")}}
+                {"$set": {"password_hash": await password_hasher.hash("Admin123!")}}
             )
         
         # Always ensure admin user is in users collection for regular login
         admin_in_users = await users_collection.find_one({"email": "admin@statusxsmoakland.com"})
         if not admin_in_users:
-            from utils.auth import get_password_hash
+            from utils.passwords import password_hasher
             from datetime import datetime
             import uuid
             
@@ -733,8 +826,8 @@ async def seed_database():
                 "id": str(uuid.uuid4()),
                 "username": "admin",
                 "email": "admin@statusxsmoakland.com",
-                "password": get_password_hash("Admin123!"),
-                "re_entry_code_hash": get_password_hash("1234"),
+                "password": await password_hasher.hash("Admin123!"),
+                "re_entry_code_hash": await password_hasher.hash("1234"),
                 "full_name": "System Administrator",
                 "date_of_birth": "1980-01-01",
                 "membership_tier": "premium",  # Give admin premium access
@@ -771,13 +864,13 @@ async def seed_database():
         # Force seed admin user (remove existing check)
         existing_admin = await admins_collection.find_one({"email": "admin@statusxsmoakland.com"})
         if not existing_admin:
-            from utils.auth import get_password_hash
+            from utils.passwords import password_hasher
             from datetime import datetime
             
             admin_user = {
                 "username": "admin",
                 "email": "admin@statusxsmoakland.com",
-                "password_hash": get_password_hash("Admin123!"),
+                "password_hash": await password_hasher.hash("Admin123!"),
                 "full_name": "System Administrator",
                 "role": "super_admin",
                 "is_active": True,
@@ -788,16 +881,16 @@ async def seed_database():
             await admins_collection.insert_one(admin_user)
         else:
             # Update existing admin with correct password hash if needed
-            from utils.auth import get_password_hash
+            from utils.passwords import password_hasher
             await admins_collection.update_one(
                 {"email": "admin@statusxsmoakland.com"},
-                {"$set": {"password_hash": get_password_hash("Admin123!")}}
+                {"$set": {"password_hash": await password_hasher.hash("Admin123!")}}
             )
         
         # Force seed demo users (remove existing check)
         existing_user = await users_collection.find_one({"email": "premium@demo.com"})
         if not existing_user:
-            from utils.auth import get_password_hash
+            from utils.passwords import password_hasher
             from datetime import datetime
             import uuid
             
@@ -806,8 +899,8 @@ async def seed_database():
                     "id": str(uuid.uuid4()),
                     "username": "premium_demo",
                     "email": "premium@demo.com",
-                    "password": get_password_hash("Premium123!"),
-                    "re_entry_code_hash": get_password_hash("1234"),
+                    "password": await password_hasher.hash("Premium123!"),
+                    "re_entry_code_hash": await password_hasher.hash("1234"),
                     "full_name": "Premium Demo User",
                     "date_of_birth": "1990-01-01",
                     "membership_tier": "premium",
@@ -834,8 +927,8 @@ async def seed_database():
                     "id": str(uuid.uuid4()),
                     "username": "basic_demo",
                     "email": "basic@demo.com",
-                    "password": get_password_hash("Basic123!"),
-                    "re_entry_code_hash": get_password_hash("1234"),
+                    "password": await password_hasher.hash("Basic123!"),
+                    "re_entry_code_hash": await password_hasher.hash("1234"),
                     "full_name": "Basic Demo User",
                     "date_of_birth": "1995-01-01",
                     "membership_tier": "basic",
@@ -862,8 +955,8 @@ async def seed_database():
                     "id": str(uuid.uuid4()),
                     "username": "unverified_demo",
                     "email": "unverified@demo.com",
-                    "password": get_password_hash("Unverified123!"),
-                    "re_entry_code_hash": get_password_hash("1234"),
+                    "password": await password_hasher.hash("Unverified123!"),
+                    "re_entry_code_hash": await password_hasher.hash("1234"),
                     "full_name": "Unverified Demo User",
                     "date_of_birth": "1992-01-01",
                     "membership_tier": "basic",
@@ -893,7 +986,7 @@ async def seed_database():
         # Also add admin user to users collection for regular login
         admin_in_users = await users_collection.find_one({"email": "admin@statusxsmoakland.com"})
         if not admin_in_users:
-            from utils.auth import get_password_hash
+            from utils.passwords import password_hasher
             from datetime import datetime
             import uuid
             
@@ -901,8 +994,8 @@ async def seed_database():
                 "id": str(uuid.uuid4()),
                 "username": "admin",
                 "email": "admin@statusxsmoakland.com",
-                "password": get_password_hash("Admin123!"),
-                "re_entry_code_hash": get_password_hash("1234"),
+                "password": await password_hasher.hash("Admin123!"),
+                "re_entry_code_hash": await password_hasher.hash("1234"),
                 "full_name": "System Administrator",
                 "date_of_birth": "1980-01-01",
                 "membership_tier": "premium",  # Give admin premium access
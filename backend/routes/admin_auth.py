@@ -1,19 +1,20 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from datetime import timedelta, datetime
 from models.admin import AdminCreate, AdminLogin, Admin, AdminResponse, AdminToken
-from utils.auth import verify_password, get_password_hash, create_access_token, verify_token
+from utils.auth import create_access_token, verify_token_claims
 from utils.database import admins_collection, convert_object_id
+from utils.passwords import password_hasher
+from utils.user_context import invalidate_user, get_admin_account
 from bson import ObjectId
 
 router = APIRouter(prefix="/admin-auth", tags=["admin-authentication"])
 
-async def verify_admin_token(token: str = Depends(verify_token)):
+async def verify_admin_token(claims: dict = Depends(verify_token_claims)):
     """Verify admin token and return admin email."""
-    # First verify the token format is valid
-    admin_email = token  # verify_token returns the email
+    admin_email = claims["sub"]
     
-    # Check if this email belongs to an admin
-    admin = await admins_collection.find_one({"email": admin_email})
+    # The admin must still exist and be active, whatever the token claims (short-TTL cache)
+    admin = await get_admin_account(admin_email)
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -29,14 +30,15 @@ async def verify_admin_token(token: str = Depends(verify_token)):
     return admin_email
 
 async def get_admin_data(admin_email: str = Depends(verify_admin_token)):
-    """Get admin data from token."""
-    admin = await admins_collection.find_one({"email": admin_email})
+    """Get admin data from token (an active admin; verify_admin_token checked it)."""
+    admin = await get_admin_account(admin_email)
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Admin not found"
         )
-    return admin
+    # The cached document is shared between requests
+    return dict(admin)
 
 @router.post("/register", response_model=AdminToken)
 async def register_admin(admin_data: AdminCreate):
@@ -53,7 +55,7 @@ async def register_admin(admin_data: AdminCreate):
     admin_dict = {
         "username": admin_data.username,
         "email": admin_data.email,
-        "password_hash": get_password_hash(admin_data.password),
+        "password_hash": await password_hasher.hash(admin_data.password),
         "full_name": admin_data.full_name,
         "role": admin_data.role,
         "is_active": True,
@@ -63,6 +65,7 @@ async def register_admin(admin_data: AdminCreate):
     
     # Insert admin
     result = await admins_collection.insert_one(admin_dict)
+    invalidate_user(admin_data.email)
     
     # Get created admin
     created_admin = await admins_collection.find_one({"_id": result.inserted_id})
@@ -70,7 +73,7 @@ async def register_admin(admin_data: AdminCreate):
     
     # Create access token
     access_token = create_access_token(
-        data={"sub": admin_data.email, "type": "admin"},
+        data={"sub": admin_data.email, "type": "admin", "is_admin": True},
         expires_delta=timedelta(minutes=60 * 8)  # 8 hours
     )
     
@@ -101,11 +104,13 @@ async def login_admin(admin_credentials: AdminLogin):
         )
     
     # Verify password
-    if not verify_password(admin_credentials.password, admin["password_hash"]):
+    matches, new_hash = await password_hasher.verify(admin_credentials.password, admin["password_hash"])
+    if not matches:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
+    await password_hasher.rehash_stored(admins_collection, admin, "password_hash", new_hash)
     
     # Update last login
     await admins_collection.update_one(
@@ -115,7 +120,7 @@ async def login_admin(admin_credentials: AdminLogin):
     
     # Create access token
     access_token = create_access_token(
-        data={"sub": admin_credentials.email, "type": "admin"},
+        data={"sub": admin_credentials.email, "type": "admin", "is_admin": True},
         expires_delta=timedelta(minutes=60 * 8)  # 8 hours
     )
     
@@ -3,14 +3,14 @@ from typing import List, Optional
 from datetime import datetime
 import uuid
 import os
-import shutil
 
 from utils.database import db
 from routes.admin_auth import verify_admin_token
+from utils.blob_store import blob_store
 
 router = APIRouter()
 
-# Upload directory for strain images
+# Strain images uploaded before the blob store (new images live in /app/uploads/blobs)
 UPLOAD_DIR = "/app/uploads/strains"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
@@ -84,23 +84,18 @@ async def create_strain(
         # Handle image upload
         image_url = None
         image_filename = None
+        stored = None
         
         if image and image.filename:
             # Validate file type
             if not image.content_type.startswith('image/'):
                 raise HTTPException(status_code=400, detail="Only image files are allowed")
             
-            # Generate unique filename
-            file_extension = image.filename.split('.')[-1] if '.' in image.filename else 'jpg'
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(UPLOAD_DIR, unique_filename)
+            # Store once per distinct image; the strain holds one reference to the blob
+            stored = await blob_store.put(image, "strain_image", default_extension=".jpg")
             
-            # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            
-            image_filename = unique_filename
-            image_url = f"/api/uploads/strains/{unique_filename}"
+            image_filename = stored["key"]
+            image_url = stored["url"]
         
         # Create strain document
         strain_data = {
@@ -123,8 +118,13 @@ async def create_strain(
             "updated_at": datetime.utcnow()
         }
         
-        # Save to database
-        await db.strains.insert_one(strain_data)
+        # Save to database; a strain that was never written gives its image reference back
+        try:
+            await db.strains.insert_one(strain_data)
+        except BaseException:
+            if stored:
+                await blob_store.release(stored["key"])
+            raise
         
         return {
             "success": True,
@@ -166,26 +166,19 @@ async def update_strain(
         image_url = existing_strain.get("image_url")
         image_filename = existing_strain.get("image_filename")
         
+        replaced_filename = None
+        stored = None
+        
         if image and image.filename:
-            # Delete old image if exists
-            if image_filename:
-                old_file_path = os.path.join(UPLOAD_DIR, image_filename)
-                if os.path.exists(old_file_path):
-                    os.remove(old_file_path)
-            
             # Validate and save new image
             if not image.content_type.startswith('image/'):
                 raise HTTPException(status_code=400, detail="Only image files are allowed")
             
-            file_extension = image.filename.split('.')[-1] if '.' in image.filename else 'jpg'
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(UPLOAD_DIR, unique_filename)
+            stored = await blob_store.put(image, "strain_image", default_extension=".jpg")
             
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            
-            image_filename = unique_filename
-            image_url = f"/api/uploads/strains/{unique_filename}"
+            replaced_filename = image_filename
+            image_filename = stored["key"]
+            image_url = stored["url"]
         
         # Update strain data
         update_data = {
@@ -205,14 +198,26 @@ async def update_strain(
             "updated_at": datetime.utcnow()
         }
         
-        # Update in database
-        result = await db.strains.update_one(
-            {"id": strain_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
-            raise HTTPException(status_code=404, detail="Strain not found")
+        # Update in database; if the strain never takes the new image, give its reference back
+        try:
+            result = await db.strains.update_one(
+                {"id": strain_id},
+                {"$set": update_data}
+            )
+            
+            if result.matched_count == 0:
+                raise HTTPException(status_code=404, detail="Strain not found")
+        except BaseException:
+            if stored:
+                await blob_store.release(stored["key"])
+            raise
+        
+        # Release the old image once the strain no longer points at it
+        if replaced_filename and replaced_filename != image_filename:
+            await blob_store.discard(replaced_filename, UPLOAD_DIR)
+        elif replaced_filename:
+            # Re-uploading the same image took a second reference
+            await blob_store.release(image_filename)
         
         return {
             "success": True,
@@ -237,18 +242,15 @@ async def delete_strain(
         if not strain:
             raise HTTPException(status_code=404, detail="Strain not found")
         
-        # Delete image file if exists
-        if strain.get('image_filename'):
-            image_path = os.path.join(UPLOAD_DIR, strain['image_filename'])
-            if os.path.exists(image_path):
-                os.remove(image_path)
-        
         # Delete from database
         result = await db.strains.delete_one({"id": strain_id})
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Strain not found")
         
+        # Release the image; the file goes once no other strain or deal shares it
+        await blob_store.discard(strain.get('image_filename'), UPLOAD_DIR)
+        
         return {
             "success": True,
             "message": "Strain deleted successfully"
@@ -2,10 +2,13 @@ from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File,
 from datetime import timedelta, datetime
 from typing import Optional
 from models.user import UserCreate, UserLogin, User, UserResponse, Token, ReEntryVerification
-from utils.auth import verify_password, get_password_hash, create_access_token, verify_token
+from utils.auth import create_access_token, entitlement_claims, verify_token
+from utils.passwords import password_hasher
 from utils.database import users_collection, convert_object_id
-from utils.file_upload import save_uploaded_file
+from utils.file_upload import save_uploaded_file, release_uploaded_file
+from utils.user_context import invalidate_user, revoke_user_claims
 from bson import ObjectId
+import asyncio
 import json
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -87,16 +90,28 @@ async def register(
                 detail="Parent/guardian email required for users under 21"
             )
     
-    # Save uploaded files
+    # Hash both secrets off the event loop (before any upload is stored)
+    password_hash, re_entry_code_hash = await asyncio.gather(
+        password_hasher.hash(password),
+        password_hasher.hash(re_entry_code)
+    )
+    
+    # Save uploaded files; each holds a blob reference, given back if the user is never written
+    stored_paths = []
     try:
-        id_front_path = await save_uploaded_file(id_front, f"ids/{email}")
-        id_back_path = await save_uploaded_file(id_back, f"ids/{email}")
+        id_front_path = await save_uploaded_file(id_front)
+        stored_paths.append(id_front_path)
+        id_back_path = await save_uploaded_file(id_back)
+        stored_paths.append(id_back_path)
         
         medical_doc_path = None
         if medical_document and requires_medical:
-            medical_doc_path = await save_uploaded_file(medical_document, f"medical/{email}")
+            medical_doc_path = await save_uploaded_file(medical_document)
+            stored_paths.append(medical_doc_path)
         
     except Exception as e:
+        for path in stored_paths:
+            await release_uploaded_file(path)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File upload failed: {str(e)}"
@@ -109,8 +124,8 @@ async def register(
     user_dict = {
         "username": username,
         "email": email,
-        "password": get_password_hash(password),
-        "re_entry_code_hash": get_password_hash(re_entry_code),
+        "password": password_hash,
+        "re_entry_code_hash": re_entry_code_hash,
         "full_name": full_name,
         "date_of_birth": date_of_birth,
         "membership_tier": membership_tier,
@@ -132,8 +147,13 @@ async def register(
         }
     }
     
-    # Insert user
-    result = await users_collection.insert_one(user_dict)
+    # Insert user (fails on a duplicate email registered meanwhile)
+    try:
+        result = await users_collection.insert_one(user_dict)
+    except BaseException:
+        for path in stored_paths:
+            await release_uploaded_file(path)
+        raise
     
     # Get created user
     created_user = await users_collection.find_one({"_id": result.inserted_id})
@@ -150,7 +170,7 @@ async def register(
     
     # Create access token (limited access until verified)
     access_token = create_access_token(
-        data={"sub": email},
+        data={"sub": email, **entitlement_claims(created_user)},
         expires_delta=timedelta(minutes=60 * 24 * 7)  # 7 days
     )
     
@@ -173,16 +193,20 @@ async def login(user_credentials: UserLogin):
             detail="Invalid email or password"
         )
     
-    # Verify password
-    if not verify_password(user_credentials.password, user.get("password_hash") or user.get("password")):
+    # Verify password (older accounts store it under password_hash)
+    password_field = "password_hash" if user.get("password_hash") else "password"
+    matches, new_hash = await password_hasher.verify(user_credentials.password, user.get(password_field))
+    if not matches:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
+    # Upgrade legacy SHA-256 (or weaker) hashes now that we have the plaintext
+    await password_hasher.rehash_stored(users_collection, user, password_field, new_hash)
     
     # Create access token
     access_token = create_access_token(
-        data={"sub": user_credentials.email},
+        data={"sub": user_credentials.email, **entitlement_claims(user)},
         expires_delta=timedelta(minutes=60 * 24 * 7)  # 7 days
     )
     
@@ -271,6 +295,11 @@ async def update_profile(updates: dict, current_user_email: str = Depends(verify
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    if "membership_tier" in updates and updates["membership_tier"] != "premium":
+        # Tokens signed with a premium tier claim must stop granting premium access
+        await revoke_user_claims(current_user_email)
+    else:
+        invalidate_user(current_user_email)
     
     # Get updated user
     updated_user = await users_collection.find_one({"email": current_user_email})
@@ -299,11 +328,13 @@ async def verify_re_entry_code(verification: ReEntryVerification):
         )
     
     # Verify re-entry code
-    if not verify_password(verification.re_entry_code, user.get("re_entry_code_hash", "")):
+    matches, new_hash = await password_hasher.verify(verification.re_entry_code, user.get("re_entry_code_hash", ""))
+    if not matches:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid re-entry code"
         )
+    await password_hasher.rehash_stored(users_collection, user, "re_entry_code_hash", new_hash)
     
     user_response_data = convert_object_id(user)
     user_response_data["verification_status"] = user.get("id_verification", {}).get("verification_status", "pending")
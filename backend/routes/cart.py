@@ -4,12 +4,13 @@ from pydantic import BaseModel
 from utils.database import products_collection, users_collection
 from utils.auth import verify_token
 from utils.verification import require_verified_user
+from utils.cart_store import create_cart_store
 from bson import ObjectId
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
-# In-memory cart storage (in production, use Redis or database)
-cart_storage: Dict[str, List[dict]] = {}
+# Shared cart backend (Mongo by default, see CART_BACKEND)
+cart_store = create_cart_store()
 
 class CartItem(BaseModel):
     product_id: str
@@ -23,6 +24,47 @@ class CartItemResponse(BaseModel):
     quantity: int
     total: float
 
+class CartDetailsResponse(BaseModel):
+    items: List[CartItemResponse]
+    total_items: int
+    total_price: float
+
+async def hydrate_cart(current_user_email: str) -> CartDetailsResponse:
+    """Load the cart and every product on it with one projected $in query."""
+    user_cart = await cart_store.get_items(current_user_email)
+    
+    product_ids = list({ObjectId(cart_item["product_id"]) for cart_item in user_cart})
+    products = {}
+    if product_ids:
+        products_cursor = products_collection.find(
+            {"_id": {"$in": product_ids}},
+            {"name": 1, "image": 1, "price": 1}
+        )
+        products = {str(product["_id"]): product for product in await products_cursor.to_list(length=len(product_ids))}
+    
+    cart_items = []
+    total_items = 0
+    total_price = 0.0
+    for cart_item in user_cart:
+        product = products.get(cart_item["product_id"])
+        if product:  # Only include items for products that still exist
+            cart_items.append(CartItemResponse(
+                product_id=cart_item["product_id"],
+                product_name=product["name"],
+                product_image=product["image"],
+                price=product["price"],
+                quantity=cart_item["quantity"],
+                total=round(product["price"] * cart_item["quantity"], 2)
+            ))
+            total_items += cart_item["quantity"]
+            total_price += product["price"] * cart_item["quantity"]
+    
+    return CartDetailsResponse(
+        items=cart_items,
+        total_items=total_items,
+        total_price=round(total_price, 2)
+    )
+
 @router.post("/add")
 async def add_to_cart(
     item: CartItem,
@@ -49,26 +91,8 @@ async def add_to_cart(
             detail="Product is out of stock"
         )
     
-    # Initialize cart if doesn't exist
-    if current_user_email not in cart_storage:
-        cart_storage[current_user_email] = []
-    
-    user_cart = cart_storage[current_user_email]
-    
-    # Check if item already in cart
-    existing_item = None
-    for cart_item in user_cart:
-        if cart_item["product_id"] == item.product_id:
-            existing_item = cart_item
-            break
-    
-    if existing_item:
-        existing_item["quantity"] += item.quantity
-    else:
-        user_cart.append({
-            "product_id": item.product_id,
-            "quantity": item.quantity
-        })
+    # Adds a new line or increments an existing one
+    await cart_store.add_item(current_user_email, item.product_id, item.quantity)
     
     return {"message": "Item added to cart successfully"}
 
@@ -77,25 +101,15 @@ async def get_cart(
     current_user_email: str = Depends(require_verified_user)
 ):
     """Get user's cart items."""
-    if current_user_email not in cart_storage:
-        return []
-    
-    user_cart = cart_storage[current_user_email]
-    cart_items = []
-    
-    for cart_item in user_cart:
-        product = await products_collection.find_one({"_id": ObjectId(cart_item["product_id"])})
-        if product:  # Only include items for products that still exist
-            cart_items.append(CartItemResponse(
-                product_id=cart_item["product_id"],
-                product_name=product["name"],
-                product_image=product["image"],
-                price=product["price"],
-                quantity=cart_item["quantity"],
-                total=round(product["price"] * cart_item["quantity"], 2)
-            ))
-    
-    return cart_items
+    cart = await hydrate_cart(current_user_email)
+    return cart.items
+
+@router.get("/details", response_model=CartDetailsResponse)
+async def get_cart_details(
+    current_user_email: str = Depends(require_verified_user)
+):
+    """Get cart items and totals in one response."""
+    return await hydrate_cart(current_user_email)
 
 @router.put("/{product_id}")
 async def update_cart_item(
@@ -116,23 +130,11 @@ async def update_cart_item(
             detail="Quantity cannot be negative"
         )
     
-    if current_user_email not in cart_storage:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Cart not found"
-        )
-    
-    user_cart = cart_storage[current_user_email]
-    
-    # Find and update item
-    for cart_item in user_cart:
-        if cart_item["product_id"] == product_id:
-            if quantity == 0:
-                user_cart.remove(cart_item)
-                return {"message": "Item removed from cart"}
-            else:
-                cart_item["quantity"] = quantity
-                return {"message": "Cart item updated successfully"}
+    if quantity == 0:
+        if await cart_store.remove_item(current_user_email, product_id):
+            return {"message": "Item removed from cart"}
+    elif await cart_store.set_quantity(current_user_email, product_id, quantity):
+        return {"message": "Cart item updated successfully"}
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -151,19 +153,8 @@ async def remove_from_cart(
             detail="Invalid product ID"
         )
     
-    if current_user_email not in cart_storage:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Cart not found"
-        )
-    
-    user_cart = cart_storage[current_user_email]
-    
-    # Find and remove item
-    for cart_item in user_cart:
-        if cart_item["product_id"] == product_id:
-            user_cart.remove(cart_item)
-            return {"message": "Item removed from cart successfully"}
+    if await cart_store.remove_item(current_user_email, product_id):
+        return {"message": "Item removed from cart successfully"}
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -175,8 +166,7 @@ async def clear_cart(
     current_user_email: str = Depends(require_verified_user)
 ):
     """Clear user's cart."""
-    if current_user_email in cart_storage:
-        cart_storage[current_user_email] = []
+    await cart_store.clear(current_user_email)
     
     return {"message": "Cart cleared successfully"}
 
@@ -185,20 +175,9 @@ async def get_cart_summary(
     current_user_email: str = Depends(require_verified_user)
 ):
     """Get cart summary (total items, total price)."""
-    if current_user_email not in cart_storage:
-        return {"total_items": 0, "total_price": 0.0}
-    
-    user_cart = cart_storage[current_user_email]
-    total_items = 0
-    total_price = 0.0
-    
-    for cart_item in user_cart:
-        product = await products_collection.find_one({"_id": ObjectId(cart_item["product_id"])})
-        if product:
-            total_items += cart_item["quantity"]
-            total_price += product["price"] * cart_item["quantity"]
+    cart = await hydrate_cart(current_user_email)
     
     return {
-        "total_items": total_items,
-        "total_price": round(total_price, 2)
+        "total_items": cart.total_items,
+        "total_price": cart.total_price
     }
\ No newline at end of file
@@ -6,6 +6,11 @@ import uuid
 from utils.database import db
 from routes.admin_auth import verify_admin_token
 from utils.auth import verify_token
+from utils.member_stats import record_member_order
+from utils.sales_rollups import record_sale, summarize_rollups, rollup_count, rollup_amount
+from utils.pickup_codes import pickup_codes
+from utils.pickup_index import index_pickup
+from utils.pickup_state import complete_pickup, find_pickup_order
 
 router = APIRouter()
 
@@ -37,8 +42,8 @@ class UserCashPickupRequest(BaseModel):
 async def create_user_cash_pickup(request: UserCashPickupRequest, user_data: dict = Depends(verify_token)):
     """Create cash pickup order for regular users"""
     try:
-        # Generate 6-digit pickup code
-        pickup_code = str(uuid.uuid4().int)[:6].upper()
+        # Reserve a unique 6-digit pickup code
+        pickup_code = await pickup_codes.allocate("cash_pickup")
         order_id = str(uuid.uuid4())
         
         # Create cash pickup order
@@ -57,8 +62,13 @@ async def create_user_cash_pickup(request: UserCashPickupRequest, user_data: dic
             "processed_by": None
         }
         
-        # Store in database
-        await db.cash_pickups.insert_one(cash_pickup_order)
+        # Store in database; a code whose order was never written is freed straight away
+        try:
+            await db.cash_pickups.insert_one(cash_pickup_order)
+        except Exception:
+            await pickup_codes.discard(pickup_code)
+            raise
+        await index_pickup("cash_pickups", cash_pickup_order, customer_name=request.user_name)
         
         return {
             "success": True,
@@ -68,6 +78,8 @@ async def create_user_cash_pickup(request: UserCashPickupRequest, user_data: dic
             "total_amount": request.total_amount
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error creating cash pickup: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create cash pickup: {str(e)}")
@@ -83,8 +95,17 @@ async def create_cash_pickup_order(order: CashPickupOrder, admin_email: str = De
         order_data["_id"] = str(uuid.uuid4())
         order_data["user_id"] = order.user_id
         
-        # Insert order into database
-        await db.cash_pickup_orders.insert_one(order_data)
+        # Admin-supplied codes go through the same uniqueness check as generated ones
+        await pickup_codes.reserve(order.pickup_code, "cash_pickup")
+        
+        # Insert order into database; the reservation goes with it if the insert fails
+        try:
+            await db.cash_pickup_orders.insert_one(order_data)
+        except Exception:
+            await pickup_codes.discard(order.pickup_code)
+            raise
+        await record_sale("cash_pickup_orders", order_data)
+        await index_pickup("cash_pickup_orders", order_data)
         
         return {
             "success": True,
@@ -92,6 +113,8 @@ async def create_cash_pickup_order(order: CashPickupOrder, admin_email: str = De
             "pickup_code": order.pickup_code,
             "order_id": order.order_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error creating cash pickup order: {e}")
         raise HTTPException(status_code=500, detail="Failed to create cash pickup order")
@@ -130,7 +153,8 @@ async def lookup_cash_pickup(pickup_code: str):
     try:
         # db is already imported
         
-        order = await db.cash_pickup_orders.find_one({"pickup_code": pickup_code})
+        # Recycled codes may also match earlier, completed orders
+        order = await find_pickup_order("cash_pickup_orders", pickup_code)
         
         if not order:
             raise HTTPException(status_code=404, detail="Pickup code not found")
@@ -152,27 +176,15 @@ async def process_cash_pickup(request: ProcessPickupRequest):
     try:
         # db is already imported
         
-        # Find the order
-        order = await db.cash_pickup_orders.find_one({"pickup_code": request.pickup_code})
-        
-        if not order:
-            raise HTTPException(status_code=404, detail="Pickup code not found")
-        
-        if order["status"] == "completed":
-            raise HTTPException(status_code=400, detail="Order already completed")
-        
-        # Update order status
-        update_data = {
-            "status": "completed",
+        # Complete the order in one guarded update (404/400 if missing or already completed)
+        order = await complete_pickup("cash_pickup_orders", request.pickup_code, "completed", {
             "processed_at": datetime.now().isoformat(),
             "processed_by": request.processed_by,
             "cash_received": request.cash_received
-        }
+        })
         
-        await db.cash_pickup_orders.update_one(
-            {"pickup_code": request.pickup_code},
-            {"$set": update_data}
-        )
+        # Cash pickups have no transaction, so they count as a purchase once paid
+        await record_member_order(order.get("user_id"), order.get("total_amount"), order.get("created_at"), user_email=order.get("user_email"))
         
         return {
             "success": True,
@@ -192,17 +204,14 @@ async def get_cash_pickup_stats():
     try:
         # db is already imported
         
-        total_orders = await db.cash_pickup_orders.count_documents({})
-        pending_orders = await db.cash_pickup_orders.count_documents({"status": "pending_pickup"})
-        completed_orders = await db.cash_pickup_orders.count_documents({"status": "completed"})
+        # Answered from the daily sales rollups, not the raw orders
+        summary = await summarize_rollups(channels=["cash_pickup_orders"])
+        total_orders = rollup_count(summary)
+        pending_orders = rollup_count(summary, "pending_pickup")
+        completed_orders = rollup_count(summary, "completed")
         
         # Calculate total cash revenue
-        pipeline = [
-            {"$match": {"status": "completed"}},
-            {"$group": {"_id": None, "total_revenue": {"$sum": "$total_amount"}}}
-        ]
-        revenue_result = await db.cash_pickup_orders.aggregate(pipeline).to_list(length=None)
-        total_revenue = revenue_result[0]["total_revenue"] if revenue_result else 0
+        total_revenue = rollup_amount(summary, "completed")
         
         return {
             "total_orders": total_orders,
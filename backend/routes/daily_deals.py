@@ -3,14 +3,13 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import List, Optional
 import json
 import os
-import uuid
 from datetime import datetime, timedelta
-import shutil
 
 from models.daily_deals import DailyDeal, DailyDealCreate, DailyDealResponse, DeliverySignup, DeliverySignupResponse, StructuredDeal
 from utils.database import db
 from utils.auth import verify_token
 from utils.database import admins_collection
+from utils.blob_store import blob_store
 
 router = APIRouter()
 security = HTTPBearer()
@@ -36,7 +35,7 @@ async def verify_admin_token(token: str = Depends(verify_token)):
     
     return admin_email
 
-# Upload directory for videos
+# Deal videos uploaded before the blob store (new videos live in /app/uploads/blobs)
 UPLOAD_DIR = "/app/uploads/videos"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
@@ -72,23 +71,18 @@ async def create_daily_deal(
         # Handle video upload
         video_url = None
         video_filename = None
+        stored = None
         
         if video and video.filename:
             # Validate file type
             if not video.filename.lower().endswith('.mp4'):
                 raise HTTPException(status_code=400, detail="Only MP4 files are allowed")
             
-            # Generate unique filename
-            file_extension = video.filename.split('.')[-1]
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(UPLOAD_DIR, unique_filename)
+            # Store once per distinct video; the deal holds one reference to the blob
+            stored = await blob_store.put(video, "deal_video")
             
-            # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(video.file, buffer)
-            
-            video_filename = unique_filename
-            video_url = f"/api/uploads/videos/{unique_filename}"
+            video_filename = stored["key"]
+            video_url = stored["url"]
         
         # Create daily deal
         daily_deal = DailyDeal(
@@ -102,8 +96,13 @@ async def create_daily_deal(
             created_by=admin_email
         )
         
-        # Save to database
-        await db.daily_deals.insert_one(daily_deal.dict())
+        # Save to database; a deal that was never written gives its video reference back
+        try:
+            await db.daily_deals.insert_one(daily_deal.dict())
+        except BaseException:
+            if stored:
+                await blob_store.release(stored["key"])
+            raise
         
         return {
             "success": True,
@@ -111,6 +110,8 @@ async def create_daily_deal(
             "deal_id": daily_deal.id
         }
         
+    except HTTPException:
+        raise
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid deals JSON format")
     except Exception as e:
@@ -151,18 +152,15 @@ async def delete_daily_deal(
         if not deal:
             raise HTTPException(status_code=404, detail="Deal not found")
         
-        # Delete video file if exists
-        if deal.get('video_filename'):
-            video_path = os.path.join(UPLOAD_DIR, deal['video_filename'])
-            if os.path.exists(video_path):
-                os.remove(video_path)
-        
         # Delete from database
         result = await db.daily_deals.delete_one({"id": deal_id})
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Deal not found")
         
+        # Release the video; the file goes once no other deal shares it
+        await blob_store.discard(deal.get('video_filename'), UPLOAD_DIR)
+        
         return {"success": True, "message": "Deal deleted successfully"}
         
     except Exception as e:
@@ -260,23 +258,21 @@ async def cleanup_expired_deals(
         })
         expired_deals = await expired_deals_cursor.to_list(length=None)
         
-        # Delete video files
+        # Delete deals one by one so each video reference is released exactly once
+        deleted_deals = 0
         deleted_videos = 0
         for deal in expired_deals:
+            result = await db.daily_deals.delete_one({"_id": deal["_id"]})
+            if result.deleted_count == 0:
+                continue
+            deleted_deals += 1
             if deal.get('video_filename'):
-                video_path = os.path.join(UPLOAD_DIR, deal['video_filename'])
-                if os.path.exists(video_path):
-                    os.remove(video_path)
-                    deleted_videos += 1
-        
-        # Delete expired deals from database
-        result = await db.daily_deals.delete_many({
-            "expires_at": {"$lt": current_time}
-        })
+                await blob_store.discard(deal['video_filename'], UPLOAD_DIR)
+                deleted_videos += 1
         
         return {
             "success": True,
-            "deleted_deals": result.deleted_count,
+            "deleted_deals": deleted_deals,
             "deleted_videos": deleted_videos
         }
         
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
 import uuid
 from utils.database import db
 from routes.admin_auth import verify_admin_token
+from utils.sales_rollups import ROLLUP_CHANNELS, day_range, query_rollups, rollup_count, rollup_amount
+from utils.pagination import fetch_keyset_page, set_next_cursor
 
 router = APIRouter()
 
@@ -21,10 +23,43 @@ class SquareSalesReport(BaseModel):
     average_transaction: float
     successful_payments: int
     failed_payments: int
-    transactions: List[dict]
+    source: dict  # where GET /admin/reports/{report_id}/transactions reads line items from
     generated_at: str
     generated_by: str
 
+# Line items are paged from the source collection instead of being embedded in the
+# report, which kept growing toward Mongo's 16 MB document limit on busy days
+REPORT_TRANSACTION_FIELDS = ["transaction_id", "order_id", "amount", "status", "user_email", "created_at", "pickup_code"]
+
+def square_sales_source(report_date: date) -> dict:
+    """Reference to the Square transactions covered by a report day."""
+    day_start, day_end = day_range(report_date)
+    return {
+        "collection": "square_transactions",
+        "payment_method": "square",
+        "start": day_start.isoformat(),
+        "end": day_end.isoformat()
+    }
+
+def square_sales_match(source: dict) -> dict:
+    """Filter for the transactions a report source covers; totals and line items share it."""
+    return {
+        "created_at": {"$gte": source["start"], "$lt": source["end"]},
+        "payment_method": source["payment_method"]
+    }
+
+async def square_sales_totals(source: dict) -> Dict[str, dict]:
+    """Count and amount per status over a report source, grouped in Mongo.
+
+    Shaped like summarize_rollups, so rollup_count/rollup_amount read it.
+    """
+    pipeline = [
+        {"$match": square_sales_match(source)},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}, "amount": {"$sum": {"$ifNull": ["$amount", 0]}}}}
+    ]
+    groups = await db[source["collection"]].aggregate(pipeline).to_list(length=None)
+    return {str(group["_id"]): {"count": group["count"], "amount": group["amount"]} for group in groups}
+
 @router.post("/admin/reports/generate")
 async def generate_daily_report(request: DailyReportRequest, admin_email: str = Depends(verify_admin_token)):
     """Generate daily Square sales report"""
@@ -50,26 +85,17 @@ async def generate_daily_report(request: DailyReportRequest, admin_email: str =
 async def generate_square_sales_report(db, report_date, start_datetime, end_datetime, admin_email):
     """Generate Square sales report for a specific date"""
     
-    # Query Square transactions for the date
     # Note: This assumes you have a square_transactions collection
     # You may need to adjust based on your actual Square transaction storage
     
-    square_transactions_cursor = db.square_transactions.find({
-        "created_at": {
-            "$gte": start_datetime.isoformat(),
-            "$lte": end_datetime.isoformat()
-        },
-        "payment_method": "square"
-    })
-    
-    transactions = await square_transactions_cursor.to_list(length=None)
-    
-    # Calculate statistics
-    total_transactions = len(transactions)
-    successful_payments = len([t for t in transactions if t.get("status") == "completed"])
-    failed_payments = len([t for t in transactions if t.get("status") == "failed"])
+    # Calculate statistics with one $group over the day; no transactions are loaded here
+    source = square_sales_source(report_date)
+    summary = await square_sales_totals(source)
+    total_transactions = rollup_count(summary)
+    successful_payments = rollup_count(summary, "completed")
+    failed_payments = rollup_count(summary, "failed")
     
-    total_amount = sum(t.get("amount", 0) for t in transactions if t.get("status") == "completed")
+    total_amount = rollup_amount(summary, "completed")
     average_transaction = total_amount / successful_payments if successful_payments > 0 else 0
     
     # Create report
@@ -84,17 +110,7 @@ async def generate_square_sales_report(db, report_date, start_datetime, end_date
         "average_transaction": round(average_transaction, 2),
         "successful_payments": successful_payments,
         "failed_payments": failed_payments,
-        "transactions": [
-            {
-                "transaction_id": t.get("transaction_id"),
-                "order_id": t.get("order_id"),
-                "amount": t.get("amount"),
-                "status": t.get("status"),
-                "user_email": t.get("user_email"),
-                "created_at": t.get("created_at"),
-                "pickup_code": t.get("pickup_code")
-            } for t in transactions
-        ],
+        "source": source,
         "generated_at": datetime.now().isoformat(),
         "generated_by": admin_email
     }
@@ -128,8 +144,8 @@ async def get_daily_reports(
                 query["report_date"] = {}
             query["report_date"]["$lte"] = end_date
         
-        # Get reports sorted by date (newest first)
-        reports_cursor = db.daily_reports.find(query).sort("report_date", -1).limit(limit)
+        # Get reports sorted by date (newest first); older reports embedded their line items
+        reports_cursor = db.daily_reports.find(query, {"transactions": 0}).sort("report_date", -1).limit(limit)
         reports = await reports_cursor.to_list(length=None)
         
         # Remove MongoDB _id for JSON serialization
@@ -151,7 +167,7 @@ async def get_daily_report(report_id: str):
     try:
         # db is already imported
         
-        report = await db.daily_reports.find_one({"report_id": report_id})
+        report = await db.daily_reports.find_one({"report_id": report_id}, {"transactions": 0})
         
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
@@ -167,30 +183,51 @@ async def get_daily_report(report_id: str):
         print(f"Error fetching report: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch report")
 
+@router.get("/admin/reports/{report_id}/transactions")
+async def get_daily_report_transactions(
+    report_id: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    admin_email: str = Depends(verify_admin_token)
+):
+    """Page through a report's transactions, oldest first, from the source collection"""
+    try:
+        report = await db.daily_reports.find_one({"report_id": report_id}, {"report_date": 1, "source": 1})
+        
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
+        
+        # Reports generated before line items were paged have no source reference
+        source = report.get("source") or square_sales_source(datetime.strptime(report["report_date"], "%Y-%m-%d").date())
+        rows, next_cursor = await fetch_keyset_page(
+            db[source["collection"]], square_sales_match(source), "created_at", limit, cursor=cursor, direction=1
+        )
+        set_next_cursor(response, next_cursor)
+        
+        return {
+            "report_id": report_id,
+            "transactions": [{field: row.get(field) for field in REPORT_TRANSACTION_FIELDS} for row in rows],
+            "next_cursor": next_cursor
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching report transactions: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch report transactions")
+
 @router.get("/admin/reports/quick-stats/today")
 async def get_today_quick_stats():
     """Get quick stats for today's Square sales"""
     try:
         # db is already imported
         
-        today = date.today()
-        start_datetime = datetime.combine(today, datetime.min.time())
-        end_datetime = datetime.combine(today, datetime.max.time())
-        
-        # Get today's Square transactions
-        transactions_cursor = db.square_transactions.find({
-            "created_at": {
-                "$gte": start_datetime.isoformat(),
-                "$lte": end_datetime.isoformat()
-            },
-            "payment_method": "square",
-            "status": "completed"
-        })
+        today = datetime.utcnow().date()
         
-        transactions = await transactions_cursor.to_list(length=None)
-        
-        total_sales = sum(t.get("amount", 0) for t in transactions)
-        total_transactions = len(transactions)
+        # Today's completed Square sales, grouped in Mongo
+        summary = await square_sales_totals(square_sales_source(today))
+        total_sales = rollup_amount(summary, "completed")
+        total_transactions = rollup_count(summary, "completed")
         
         return {
             "date": today.isoformat(),
@@ -202,6 +239,47 @@ async def get_today_quick_stats():
         print(f"Error getting today's stats: {e}")
         raise HTTPException(status_code=500, detail="Failed to get today's statistics")
 
+@router.get("/admin/sales-rollups")
+async def get_sales_rollups(
+    channel: Optional[List[str]] = Query(None, description=f"Payment channels: {', '.join(ROLLUP_CHANNELS)}"),
+    status: Optional[List[str]] = Query(None),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    end_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    admin_email: str = Depends(verify_admin_token)
+):
+    """Get hourly or daily sales rollups by channel and status"""
+    try:
+        if channel:
+            unknown_channels = [name for name in channel if name not in ROLLUP_CHANNELS]
+            if unknown_channels:
+                raise HTTPException(status_code=400, detail=f"Unknown channel: {unknown_channels[0]}")
+        
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+            end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1) if end_date else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+        
+        rollups = await query_rollups(channels=channel, statuses=status, start=start, end=end, granularity=granularity)
+        
+        totals = {}
+        for row in rollups:
+            entry = totals.setdefault(row["channel"], {}).setdefault(row["status"], {"count": 0, "amount": 0.0})
+            entry["count"] += row["count"]
+            entry["amount"] = round(entry["amount"] + row["amount"], 2)
+        
+        return {
+            "granularity": granularity,
+            "rollups": rollups,
+            "totals": totals
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching sales rollups: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch sales rollups")
+
 @router.delete("/admin/reports/{report_id}")
 async def delete_daily_report(report_id: str, admin_email: str = Depends(verify_admin_token)):
     """Delete a daily report"""
@@ -9,10 +9,12 @@ from datetime import datetime, timezone
 from utils.auth import get_verified_user_data
 from utils.database import db
 from utils.tokens import update_user_purchases_and_tokens
-import random
-import string
+from utils.member_stats import record_member_order
+from utils.sales_rollups import record_sale
+from utils.pickup_codes import pickup_codes
+from utils.pickup_index import index_pickup
 
-from square import Square
+from utils.square_client import get_square_client
 
 router = APIRouter(prefix="/payments", tags=["digital-wallet-payments"])
 
@@ -33,11 +35,6 @@ class DigitalWalletPaymentResponse(BaseModel):
     status: str
     message: str
 
-def generate_payment_code(prefix: str = "P") -> str:
-    """Generate a unique payment code with prefix"""
-    random_part = ''.join(random.choices(string.digits + string.ascii_uppercase, k=6))
-    return f"{prefix}{random_part}"
-
 async def process_digital_wallet_payment(
     payment_request: DigitalWalletPaymentRequest,
     payment_method: str,
@@ -56,19 +53,8 @@ async def process_digital_wallet_payment(
         if not location_id:
             raise HTTPException(status_code=500, detail="Square location ID not configured")
         
-        # Initialize Square client for actual payment processing
-        from square.environment import SquareEnvironment
-        
-        # Convert environment string to Square environment 
-        if square_environment == 'sandbox':
-            env = SquareEnvironment.SANDBOX
-        else:
-            env = SquareEnvironment.PRODUCTION
-        
-        client = Square(
-            token=access_token,
-            environment=env
-        )
+        # Shared Square client for actual payment processing
+        client = get_square_client(default_environment="sandbox")
         
         print(f"🔄 Processing {payment_method} payment...")
         print(f"   Amount: ${payment_request.amount/100:.2f}")
@@ -78,7 +64,7 @@ async def process_digital_wallet_payment(
         # Create payment using Square API
         try:
             payments_api = client.payments
-            payment_result = payments_api.create(
+            payment_result = await payments_api.create(
                 source_id=payment_request.token,
                 idempotency_key=str(uuid.uuid4()),
                 amount_money={
@@ -115,8 +101,6 @@ async def process_digital_wallet_payment(
             print(f"   Payment ID: {payment_id}")
             print(f"   Status: {payment_status}")
         
-        payment_code = generate_payment_code("P")  # P for prepaid
-        
         # Create transaction record
         transaction_data = {
             "_id": str(uuid.uuid4()),
@@ -124,7 +108,7 @@ async def process_digital_wallet_payment(
             "user_email": payment_request.user_email,
             "payment_method": payment_method,
             "payment_id": payment_id,
-            "payment_code": payment_code,
+            "payment_code": None,  # allocated on insert, P for prepaid
             "amount": payment_request.amount / 100,  # Convert back to dollars
             "currency": payment_request.currency,
             "items": payment_request.items,
@@ -134,8 +118,11 @@ async def process_digital_wallet_payment(
             "pickup_verified": False
         }
         
-        # Save transaction to database
-        await db.transactions.insert_one(transaction_data)
+        # Save transaction to database with a unique P-prefixed pickup code
+        payment_code = await pickup_codes.insert_with_code(db.transactions, transaction_data, "payment_code", payment_method, prefix="P")
+        await record_member_order(user.get("id"), transaction_data["amount"], transaction_data["created_at"], user_email=payment_request.user_email)
+        await record_sale("transactions", transaction_data)
+        await index_pickup("transactions", transaction_data)
         
         # Update user purchases and award tokens
         await update_user_purchases_and_tokens(payment_request.user_email, db)
@@ -156,6 +143,8 @@ async def process_digital_wallet_payment(
         }
         
         await db.prepaid_orders.insert_one(prepaid_order)
+        await record_sale("prepaid_orders", prepaid_order)
+        await index_pickup("prepaid_orders", prepaid_order)
         
         return DigitalWalletPaymentResponse(
             success=True,
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException, Request, Query, status
+
+from utils.file_serving import UPLOADS_ROOT, serve_file, resolve_upload_path, verify_file_signature
+
+router = APIRouter(tags=["files"])
+
+# Identity documents (legacy folders and the private blob store) are only reachable
+# through signed /files links
+PRIVATE_UPLOAD_FOLDERS = ("ids", "medical", "private")
+
+@router.api_route("/uploads/{file_path:path}", methods=["GET", "HEAD"])
+async def get_upload(file_path: str, request: Request):
+    """Serve deal videos and strain images (immutable, ETag, byte ranges)."""
+    path = resolve_upload_path(f"uploads/{file_path}")
+    # Checked on the resolved path, so "blobs/../private/..." is refused too
+    if path.relative_to(UPLOADS_ROOT.resolve()).parts[:1] in [(folder,) for folder in PRIVATE_UPLOAD_FOLDERS]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return await serve_file(request, path)
+
+@router.api_route("/files/{file_path:path}", methods=["GET", "HEAD"])
+async def get_signed_file(
+    file_path: str,
+    request: Request,
+    expires: int = Query(...),
+    signature: str = Query(...)
+):
+    """Serve a stored upload through a link signed by get_file_url."""
+    verify_file_signature(file_path, expires, signature)
+    return await serve_file(request, resolve_upload_path(file_path), cache_control="private, max-age=300")
@@ -1,32 +1,78 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import List, Optional
 from models.order import Order, OrderCreate, OrderResponse, OrderItemResponse
 from utils.database import orders_collection, products_collection, users_collection, convert_object_id
 from utils.auth import verify_token
 from utils.verification import require_verified_user, get_verified_user_data
+from utils.pagination import fetch_keyset_page, set_next_cursor
 from bson import ObjectId
 from datetime import datetime
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+async def fetch_product_map(product_ids) -> dict:
+    """Fetch the given products with a single $in query, keyed by ObjectId."""
+    unique_ids = list({product_id for product_id in product_ids})
+    if not unique_ids:
+        return {}
+    
+    products = await products_collection.find(
+        {"_id": {"$in": unique_ids}},
+        {"name": 1, "price": 1, "in_stock": 1, "tier": 1}
+    ).to_list(length=len(unique_ids))
+    return {product["_id"]: product for product in products}
+
+async def build_item_responses(orders: List[dict]) -> List[List[dict]]:
+    """Build response items for a page of orders.
+    
+    Items written since product_name/tier were stored on the order need no
+    product lookup; older items are resolved with one $in query for the page.
+    """
+    missing_ids = [
+        item["product_id"]
+        for order in orders
+        for item in order["items"]
+        if "product_name" not in item
+    ]
+    product_map = await fetch_product_map(missing_ids)
+    
+    responses = []
+    for order in orders:
+        items = []
+        for item in order["items"]:
+            product = product_map.get(item["product_id"])
+            product_name = item.get("product_name") or (product["name"] if product else "Unknown Product")
+            items.append({
+                "product_id": str(item["product_id"]),
+                "quantity": item["quantity"],
+                "price": item["price"],
+                "product_name": product_name,
+                "tier": item.get("tier") or (product.get("tier") if product else None)
+            })
+        responses.append(items)
+    return responses
+
 @router.post("/", response_model=OrderResponse)
 async def create_order(
     order_data: OrderCreate,
     user = Depends(get_verified_user_data)
 ):
     """Create a new order (verified users only)."""
-    # Validate products and calculate total
-    total = 0
-    validated_items = []
-    
     for item in order_data.items:
         if not ObjectId.is_valid(item.product_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid product ID: {item.product_id}"
             )
-        
-        product = await products_collection.find_one({"_id": ObjectId(item.product_id)})
+    
+    product_map = await fetch_product_map(ObjectId(item.product_id) for item in order_data.items)
+    
+    # Validate products and calculate total
+    total = 0
+    validated_items = []
+    
+    for item in order_data.items:
+        product = product_map.get(ObjectId(item.product_id))
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -44,8 +90,11 @@ async def create_order(
         item_total = current_price * item.quantity
         total += item_total
         
+        # Name and tier are denormalized so order history needs no product join
         validated_items.append({
             "product_id": ObjectId(item.product_id),
+            "product_name": product["name"],
+            "tier": product.get("tier"),
             "quantity": item.quantity,
             "price": current_price
         })
@@ -56,7 +105,9 @@ async def create_order(
         "items": validated_items,
         "total": round(total, 2),
         "payment_method": order_data.payment_method,
-        "status": "pending"
+        "status": "pending",
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     }
     
     result = await orders_collection.insert_one(order_dict)
@@ -67,30 +118,20 @@ async def create_order(
         {"$push": {"order_history": result.inserted_id}}
     )
     
-    # Get created order with product names
-    created_order = await orders_collection.find_one({"_id": result.inserted_id})
-    
-    # Add product names to items
-    items_with_names = []
-    for item in created_order["items"]:
-        product = await products_collection.find_one({"_id": item["product_id"]})
-        items_with_names.append({
-            "product_id": str(item["product_id"]),
-            "quantity": item["quantity"],
-            "price": item["price"],
-            "product_name": product["name"] if product else "Unknown Product"
-        })
-    
-    order_response_data = convert_object_id(created_order)
-    order_response_data["items"] = items_with_names
+    # insert_one set order_dict["_id"], so the response needs no re-read
+    [items] = await build_item_responses([order_dict])
+    order_response_data = convert_object_id(order_dict)
+    order_response_data["items"] = items
     
     return OrderResponse(**order_response_data)
 
 @router.get("/", response_model=List[OrderResponse])
 async def get_user_orders(
+    response: Response,
     status: Optional[str] = Query(None, pattern="^(pending|confirmed|preparing|ready_for_pickup|completed|cancelled)$"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; takes precedence over skip"),
     user = Depends(get_verified_user_data)
 ):
     """Get user's orders (verified users only)."""
@@ -100,28 +141,19 @@ async def get_user_orders(
     if status:
         query["status"] = status
     
-    # Get orders
-    cursor = orders_collection.find(query)
-    cursor = cursor.sort("created_at", -1)  # Most recent first
-    cursor = cursor.skip(skip).limit(limit)
-    
-    orders = await cursor.to_list(length=limit)
+    # Get orders, most recent first
+    orders, next_cursor = await fetch_keyset_page(
+        orders_collection, query, "created_at", limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
     # Add product names to orders
+    order_items = await build_item_responses(orders)
+    
     order_responses = []
-    for order in orders:
-        items_with_names = []
-        for item in order["items"]:
-            product = await products_collection.find_one({"_id": item["product_id"]})
-            items_with_names.append({
-                "product_id": str(item["product_id"]),
-                "quantity": item["quantity"],
-                "price": item["price"],
-                "product_name": product["name"] if product else "Unknown Product"
-            })
-        
+    for order, items in zip(orders, order_items):
         order_data = convert_object_id(order)
-        order_data["items"] = items_with_names
+        order_data["items"] = items
         order_responses.append(OrderResponse(**order_data))
     
     return order_responses
@@ -151,18 +183,10 @@ async def get_order(
         )
     
     # Add product names to items
-    items_with_names = []
-    for item in order["items"]:
-        product = await products_collection.find_one({"_id": item["product_id"]})
-        items_with_names.append({
-            "product_id": str(item["product_id"]),
-            "quantity": item["quantity"],
-            "price": item["price"],
-            "product_name": product["name"] if product else "Unknown Product"
-        })
+    [items] = await build_item_responses([order])
     
     order_data = convert_object_id(order)
-    order_data["items"] = items_with_names
+    order_data["items"] = items
     
     return OrderResponse(**order_data)
 
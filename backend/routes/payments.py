@@ -2,7 +2,8 @@ from fastapi import APIRouter, HTTPException, Request, Header
 from fastapi.responses import JSONResponse
 from models.payment import CheckoutRequest, CheckoutResponse, PaymentStatusResponse, PaymentTransaction
 from utils.database import db
-from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionRequest
+from utils.sales_rollups import record_sale, move_sale
+from pymongo import ReturnDocument
 import os
 from dotenv import load_dotenv
 import logging
@@ -23,6 +24,11 @@ CANNABIS_PACKAGES = {
     "premium": {"amount": 200.00, "name": "Premium Package", "description": "VIP package with exclusive benefits"}
 }
 
+def get_stripe_checkout(api_key: str, webhook_url: str):
+    """emergentintegrations pulls in the Stripe SDK, so it is imported on first use, not at startup."""
+    from emergentintegrations.payments.stripe.checkout import StripeCheckout
+    return StripeCheckout(api_key=api_key, webhook_url=webhook_url)
+
 @router.post("/checkout/session", response_model=CheckoutResponse)
 async def create_checkout_session(
     request: CheckoutRequest,
@@ -47,7 +53,7 @@ async def create_checkout_session(
         # Initialize Stripe checkout
         host_url = str(http_request.base_url).rstrip('/')
         webhook_url = f"{host_url}/api/payments/webhook/stripe"
-        stripe_checkout = StripeCheckout(api_key=stripe_api_key, webhook_url=webhook_url)
+        stripe_checkout = get_stripe_checkout(stripe_api_key, webhook_url)
         
         # Build success and cancel URLs
         success_url = f"{request.origin_url}/checkout/success?session_id={{CHECKOUT_SESSION_ID}}"
@@ -62,6 +68,7 @@ async def create_checkout_session(
         }
         
         # Create checkout session request
+        from emergentintegrations.payments.stripe.checkout import CheckoutSessionRequest
         checkout_request = CheckoutSessionRequest(
             amount=amount,
             currency="usd",
@@ -84,7 +91,9 @@ async def create_checkout_session(
             metadata=metadata
         )
         
-        await db.payment_transactions.insert_one(transaction.dict())
+        transaction_data = transaction.dict()
+        await db.payment_transactions.insert_one(transaction_data)
+        await record_sale("payment_transactions", transaction_data)
         
         logger.info(f"Created checkout session {session.session_id} for package {request.package_id}")
         
@@ -107,7 +116,7 @@ async def get_checkout_status(session_id: str):
             raise HTTPException(status_code=500, detail="Payment system not configured")
         
         # Initialize Stripe checkout
-        stripe_checkout = StripeCheckout(api_key=stripe_api_key, webhook_url="")
+        stripe_checkout = get_stripe_checkout(stripe_api_key, "")
         
         # Get status from Stripe
         checkout_status = await stripe_checkout.get_checkout_status(session_id)
@@ -121,7 +130,7 @@ async def get_checkout_status(session_id: str):
             
             # Update transaction status if it has changed
             if transaction["payment_status"] != checkout_status.payment_status:
-                await db.payment_transactions.update_one(
+                previous_transaction = await db.payment_transactions.find_one_and_update(
                     {"session_id": session_id},
                     {
                         "$set": {
@@ -129,8 +138,11 @@ async def get_checkout_status(session_id: str):
                             "transaction_status": "completed" if checkout_status.payment_status == "paid" else "pending",
                             "updated_at": datetime.utcnow()
                         }
-                    }
+                    },
+                    return_document=ReturnDocument.BEFORE
                 )
+                if previous_transaction:
+                    await move_sale("payment_transactions", previous_transaction, checkout_status.payment_status)
             
             return PaymentStatusResponse(
                 status=checkout_status.status,
@@ -160,14 +172,14 @@ async def handle_stripe_webhook(request: Request, stripe_signature: str = Header
             raise HTTPException(status_code=500, detail="Payment system not configured")
         
         # Initialize Stripe checkout
-        stripe_checkout = StripeCheckout(api_key=stripe_api_key, webhook_url="")
+        stripe_checkout = get_stripe_checkout(stripe_api_key, "")
         
         # Handle webhook
         webhook_response = await stripe_checkout.handle_webhook(body, stripe_signature)
         
         # Update database based on webhook event
         if webhook_response.session_id:
-            await db.payment_transactions.update_one(
+            previous_transaction = await db.payment_transactions.find_one_and_update(
                 {"session_id": webhook_response.session_id},
                 {
                     "$set": {
@@ -175,8 +187,11 @@ async def handle_stripe_webhook(request: Request, stripe_signature: str = Header
                         "transaction_status": "completed" if webhook_response.payment_status == "paid" else "pending",
                         "updated_at": datetime.utcnow()
                     }
-                }
+                },
+                return_document=ReturnDocument.BEFORE
             )
+            if previous_transaction:
+                await move_sale("payment_transactions", previous_transaction, webhook_response.payment_status)
             
             logger.info(f"Processed webhook for session {webhook_response.session_id}: {webhook_response.payment_status}")
         
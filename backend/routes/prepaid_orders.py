@@ -5,6 +5,9 @@ from datetime import datetime
 import uuid
 from utils.database import db
 from utils.auth import verify_token
+from utils.sales_rollups import record_sale, summarize_rollups, rollup_count, rollup_amount
+from utils.pickup_index import index_pickup
+from utils.pickup_state import complete_pickup, find_pickup_order
 
 router = APIRouter()
 
@@ -43,6 +46,8 @@ async def create_prepaid_order(order: PrepaidOrder, current_user_email: str = De
         
         # Insert order into database
         await db.prepaid_orders.insert_one(order_data)
+        await record_sale("prepaid_orders", order_data)
+        await index_pickup("prepaid_orders", order_data)
         
         return {
             "success": True,
@@ -90,7 +95,8 @@ async def lookup_prepaid_order(pickup_code: str):
         if not pickup_code.upper().startswith('P'):
             pickup_code = 'P' + pickup_code
         
-        order = await db.prepaid_orders.find_one({"pickup_code": pickup_code.upper()})
+        # Recycled codes may also match earlier, picked-up orders
+        order = await find_pickup_order("prepaid_orders", pickup_code.upper())
         
         if not order:
             raise HTTPException(status_code=404, detail="Pre-paid pickup code not found")
@@ -116,26 +122,11 @@ async def complete_prepaid_pickup(request: CompletePickupRequest):
         if not pickup_code.startswith('P'):
             pickup_code = 'P' + pickup_code
         
-        # Find the order
-        order = await db.prepaid_orders.find_one({"pickup_code": pickup_code})
-        
-        if not order:
-            raise HTTPException(status_code=404, detail="Pre-paid pickup code not found")
-        
-        if order["status"] == "picked_up":
-            raise HTTPException(status_code=400, detail="Order already picked up")
-        
-        # Update order status
-        update_data = {
-            "status": "picked_up",
+        # Complete the order in one guarded update (404/400 if missing or already picked up)
+        order = await complete_pickup("prepaid_orders", pickup_code, "picked_up", {
             "pickup_completed_at": datetime.now().isoformat(),
             "completed_by": request.completed_by
-        }
-        
-        await db.prepaid_orders.update_one(
-            {"pickup_code": pickup_code},
-            {"$set": update_data}
-        )
+        })
         
         return {
             "success": True,
@@ -154,17 +145,14 @@ async def get_prepaid_orders_stats():
     """Get pre-paid orders statistics for admin dashboard"""
     try:
         
-        total_orders = await db.prepaid_orders.count_documents({})
-        pending_pickup = await db.prepaid_orders.count_documents({"status": "ready_for_pickup"})
-        completed_pickups = await db.prepaid_orders.count_documents({"status": "picked_up"})
+        # Answered from the daily sales rollups, not the raw orders
+        summary = await summarize_rollups(channels=["prepaid_orders"])
+        total_orders = rollup_count(summary)
+        pending_pickup = rollup_count(summary, "ready_for_pickup")
+        completed_pickups = rollup_count(summary, "picked_up")
         
         # Calculate total pre-paid revenue
-        pipeline = [
-            {"$match": {"status": "picked_up"}},
-            {"$group": {"_id": None, "total_revenue": {"$sum": "$total_amount"}}}
-        ]
-        revenue_result = await db.prepaid_orders.aggregate(pipeline).to_list(length=None)
-        total_revenue = revenue_result[0]["total_revenue"] if revenue_result else 0
+        total_revenue = rollup_amount(summary, "picked_up")
         
         return {
             "total_orders": total_orders,
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import List, Optional
+from itertools import islice
 from models.product import Product, ProductCreate, ProductUpdate, ProductResponse
 from models.daily_deal import DailyDeal
 from utils.database import products_collection, daily_deals_collection, convert_object_id
 from utils.auth import verify_token
+from utils.catalog_cache import catalog_cache
+from utils.pagination import encode_cursor, decode_cursor, set_next_cursor
 from bson import ObjectId
 from datetime import datetime
 
@@ -11,6 +14,7 @@ router = APIRouter(prefix="/products", tags=["products"])
 
 @router.get("/", response_model=List[ProductResponse])
 async def get_products(
+    response: Response,
     category: Optional[str] = Query(None, pattern="^(flower|edibles|concentrates|vapes|pre-rolls|suppositories)$"),
     tier: Optional[str] = Query(None, pattern="^(za|deps|lows)$"),
     vendor: Optional[str] = None,
@@ -18,47 +22,40 @@ async def get_products(
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100)
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; takes precedence over skip")
 ):
-    """Get products with optional filtering."""
-    # Build filter query
-    query = {}
-    if category:
-        query["category"] = category
-    if tier:
-        query["tier"] = tier
-    if vendor:
-        query["vendor"] = {"$regex": vendor, "$options": "i"}
-    if in_stock is not None:
-        query["in_stock"] = in_stock
-    if min_price is not None:
-        query["price"] = {"$gte": min_price}
-    if max_price is not None:
-        if "price" in query:
-            query["price"]["$lte"] = max_price
-        else:
-            query["price"] = {"$lte": max_price}
-    
-    # Get products
-    cursor = products_collection.find(query).skip(skip).limit(limit)
-    products = await cursor.to_list(length=limit)
-    
-    # Get current daily deals
-    current_deals = await daily_deals_collection.find({
-        "valid_until": {"$gt": datetime.utcnow()},
-        "is_active": True
-    }).to_list(length=None)
-    
-    deal_product_ids = {str(deal["product_id"]) for deal in current_deals}
-    
-    # Convert and add daily deal flag
-    product_responses = []
-    for product in products:
-        product_data = convert_object_id(product)
-        product_data["daily_deal"] = product_data["id"] in deal_product_ids
-        product_responses.append(ProductResponse(**product_data))
-    
-    return product_responses
+    """Get products with optional filtering (served from the in-process catalog snapshot)."""
+    snapshot = await catalog_cache.get_snapshot()
+    
+    start = 0
+    if cursor:
+        _, last_id = decode_cursor(cursor)
+        if not isinstance(last_id, ObjectId):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+        start = snapshot.position_after(last_id)
+        skip = 0
+    
+    matches = snapshot.iter_matching(
+        start=start,
+        category=category,
+        tier=tier,
+        vendor=vendor,
+        in_stock=in_stock,
+        min_price=min_price,
+        max_price=max_price
+    )
+    products = list(islice(matches, skip, skip + limit + 1))
+    
+    if len(products) > limit:
+        products = products[:limit]
+        last_id = ObjectId(products[-1]["id"])
+        set_next_cursor(response, encode_cursor(last_id, last_id))
+    
+    return [ProductResponse(**snapshot.with_deal_flag(product)) for product in products]
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(product_id: str):
@@ -69,24 +66,15 @@ async def get_product(product_id: str):
             detail="Invalid product ID"
         )
     
-    product = await products_collection.find_one({"_id": ObjectId(product_id)})
+    snapshot = await catalog_cache.get_snapshot()
+    product = snapshot.by_id.get(product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    # Check if product has active daily deal
-    deal = await daily_deals_collection.find_one({
-        "product_id": ObjectId(product_id),
-        "valid_until": {"$gt": datetime.utcnow()},
-        "is_active": True
-    })
-    
-    product_data = convert_object_id(product)
-    product_data["daily_deal"] = deal is not None
-    
-    return ProductResponse(**product_data)
+    return ProductResponse(**snapshot.with_deal_flag(product))
 
 # Admin routes
 @router.post("/admin/products", response_model=ProductResponse)
@@ -102,6 +90,7 @@ async def create_product(
         product_dict["original_price"] = product_dict["price"]
     
     result = await products_collection.insert_one(product_dict)
+    catalog_cache.invalidate()
     
     created_product = await products_collection.find_one({"_id": result.inserted_id})
     product_response_data = convert_object_id(created_product)
@@ -145,6 +134,8 @@ async def update_product(
             detail="Product not found"
         )
     
+    catalog_cache.invalidate()
+    
     updated_product = await products_collection.find_one({"_id": ObjectId(product_id)})
     product_data = convert_object_id(updated_product)
     product_data["daily_deal"] = False  # You might want to check for actual deals
@@ -173,4 +164,6 @@ async def delete_product(
             detail="Product not found"
         )
     
+    catalog_cache.invalidate()
+    
     return {"message": "Product deleted successfully"}
\ No newline at end of file
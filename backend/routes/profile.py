@@ -1,7 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
 from typing import List, Optional
-import os
-import uuid
+from pathlib import Path
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel
@@ -11,18 +10,16 @@ from models.transaction import TransactionResponse
 from models.product import ProductResponse
 from utils.auth import get_verified_user_data
 from utils.database import db
+from utils.user_context import invalidate_user
+from utils.blob_store import blob_store, blob_key_from_url, blob_path, is_blob_key
+from utils.file_serving import serve_file
+from pymongo import ReturnDocument
 
 router = APIRouter(prefix="/profile", tags=["profile"])
 
-@router.get("/", response_model=UserResponse)
-async def get_user_profile(
-    current_user: dict = Depends(get_verified_user_data)
-):
-    """Get current user's complete profile"""
-    from utils.database import db
-    user = await db.users.find_one({"email": current_user["email"]})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+def build_profile_response(user: dict) -> UserResponse:
+    """Build the profile response from a user document (raw, or with "id" from get_verified_user_data)."""
+    user = dict(user)
     
     # Ensure profile field exists for backward compatibility
     if "profile" not in user:
@@ -35,7 +32,7 @@ async def get_user_profile(
         }
     
     return UserResponse(
-        id=str(user["_id"]),
+        id=str(user["_id"]) if "_id" in user else user["id"],
         username=user["username"],
         email=user["email"],
         full_name=user["full_name"],
@@ -52,6 +49,14 @@ async def get_user_profile(
         profile=user["profile"]
     )
 
+@router.get("/", response_model=UserResponse)
+async def get_user_profile(
+    current_user: dict = Depends(get_verified_user_data)
+):
+    """Get current user's complete profile"""
+    # get_verified_user_data already loaded the full user document for this request
+    return build_profile_response(current_user)
+
 @router.put("/", response_model=UserResponse)
 async def update_user_profile(
     profile_update: ProfileUpdateRequest,
@@ -68,16 +73,18 @@ async def update_user_profile(
     
     update_data["updated_at"] = datetime.now(timezone.utc)
     
-    result = await db.users.update_one(
+    updated_user = await db.users.find_one_and_update(
         {"email": current_user["email"]},
-        {"$set": update_data}
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if updated_user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_user(current_user["email"])
     
     # Return updated profile
-    return await get_user_profile(current_user)
+    return build_profile_response(updated_user)
 
 @router.post("/photo")
 async def upload_profile_photo(
@@ -89,44 +96,43 @@ async def upload_profile_photo(
     if not photo.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # Create uploads directory if it doesn't exist
-    uploads_dir = "/app/backend/uploads/profile_photos"
-    os.makedirs(uploads_dir, exist_ok=True)
-    
-    # Generate unique filename
-    file_extension = os.path.splitext(photo.filename)[1]
-    filename = f"{current_user['email']}_{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(uploads_dir, filename)
-    
-    # Save the file
-    content = await photo.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    stored = await blob_store.put(photo, "profile_photo")
     
     # Update user's profile with photo URL
-    photo_url = f"/api/profile/photo/{filename}"
-    await db.users.update_one(
-        {"email": current_user["email"]},
-        {
-            "$set": {
-                "profile.profile_photo_url": photo_url,
-                "updated_at": datetime.now(timezone.utc)
-            }
-        }
-    )
+    photo_url = f"/api/profile/photo/{stored['key']}"
+    try:
+        previous = await db.users.find_one_and_update(
+            {"email": current_user["email"]},
+            {
+                "$set": {
+                    "profile.profile_photo_url": photo_url,
+                    "updated_at": datetime.now(timezone.utc)
+                }
+            },
+            projection={"profile.profile_photo_url": 1}
+        )
+    except BaseException:
+        # The user never took the new photo; give its reference back
+        await blob_store.release(stored["key"])
+        raise
+    # Drop the reference held by the photo this one replaces
+    await blob_store.release(blob_key_from_url((previous or {}).get("profile", {}).get("profile_photo_url")))
+    invalidate_user(current_user["email"])
     
     return {"message": "Profile photo uploaded successfully", "photo_url": photo_url}
 
 @router.get("/photo/{filename}")
-async def get_profile_photo(filename: str):
+async def get_profile_photo(filename: str, request: Request):
     """Get user's profile photo"""
-    file_path = f"/app/backend/uploads/profile_photos/{filename}"
+    if is_blob_key(filename):
+        file_path = blob_path(filename)
+    else:
+        file_path = Path("/app/backend/uploads/profile_photos") / filename
     
-    if not os.path.exists(file_path):
+    # Photo names are content hashes or unique per upload, so the response never changes
+    if file_path.name != filename:
         raise HTTPException(status_code=404, detail="Photo not found")
-    
-    from fastapi.responses import FileResponse
-    return FileResponse(file_path)
+    return await serve_file(request, file_path)
 
 @router.get("/tokens", response_model=TokenInfo)
 async def get_token_info(
@@ -134,11 +140,7 @@ async def get_token_info(
     db: AsyncIOMotorDatabase = Depends(lambda: db)
 ):
     """Get user's token balance and purchase information"""
-    user = await db.users.find_one({"email": current_user["email"]})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    profile = user.get("profile", {})
+    profile = current_user.get("profile", {})
     purchases_count = profile.get("purchases_count", 0)
     tokens_balance = profile.get("tokens_balance", 0)
     
@@ -168,11 +170,7 @@ async def redeem_tokens(
     if tokens_to_redeem <= 0 or tokens_to_redeem % 10 != 0:
         raise HTTPException(status_code=400, detail="Can only redeem tokens in multiples of 10")
     
-    user = await db.users.find_one({"email": current_user["email"]})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    current_balance = user.get("profile", {}).get("tokens_balance", 0)
+    current_balance = current_user.get("profile", {}).get("tokens_balance", 0)
     if current_balance < tokens_to_redeem:
         raise HTTPException(status_code=400, detail="Insufficient tokens")
     
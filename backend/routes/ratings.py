@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import List, Optional
 from datetime import datetime, timedelta
 from models.rating import RatingCreate, Rating, RatingResponse, ProductRatingStats, UserRatingHistory
 from models.product import ProductResponse
 from utils.auth import verify_token
-from utils.database import ratings_collection, products_collection, users_collection, convert_object_id
+from utils.database import ratings_collection, products_collection, convert_object_id
+from utils.catalog_cache import catalog_cache
+from utils.pagination import fetch_keyset_page, set_next_cursor
+from utils.rating_stats import apply_rating_change, ensure_rating_stats
+from utils.user_context import get_user_id
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 router = APIRouter(prefix="/ratings", tags=["ratings"])
 
@@ -16,9 +21,9 @@ async def create_rating(
 ):
     """Create or update a product rating by the current user."""
     
-    # Get user ID from email
-    user = await users_collection.find_one({"email": current_user_email})
-    if not user:
+    # Get user ID from email (cached with the user's entitlements)
+    user_id = await get_user_id(current_user_email)
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
@@ -37,11 +42,12 @@ async def create_rating(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
+    await ensure_rating_stats(product["_id"], product)
     
     # Check if user already rated this product
     existing_rating = await ratings_collection.find_one({
         "product_id": ObjectId(rating_data.product_id),
-        "user_id": user["_id"]
+        "user_id": user_id
     })
     
     if existing_rating:
@@ -53,19 +59,26 @@ async def create_rating(
             "updated_at": datetime.utcnow()
         }
         
-        await ratings_collection.update_one(
+        # Read the replaced value atomically so the aggregates get the right delta
+        previous_rating = await ratings_collection.find_one_and_update(
             {"_id": existing_rating["_id"]},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
         )
+        if previous_rating is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Rating not found"
+            )
         
-        updated_rating = await ratings_collection.find_one({"_id": existing_rating["_id"]})
-        rating_response_data = convert_object_id(updated_rating)
+        rating_response_data = convert_object_id({**previous_rating, **update_data})
+        await update_product_rating_stats(rating_data.product_id, added=rating_data.rating, removed=previous_rating["rating"])
         
     else:
         # Create new rating
         rating_dict = {
             "product_id": ObjectId(rating_data.product_id),
-            "user_id": user["_id"],
+            "user_id": user_id,
             "rating": rating_data.rating,
             "review": rating_data.review,
             "experience": rating_data.experience,
@@ -73,20 +86,21 @@ async def create_rating(
             "updated_at": datetime.utcnow()
         }
         
-        result = await ratings_collection.insert_one(rating_dict)
-        created_rating = await ratings_collection.find_one({"_id": result.inserted_id})
-        rating_response_data = convert_object_id(created_rating)
-    
-    # Update product's average rating and review count
-    await update_product_rating_stats(rating_data.product_id)
+        await ratings_collection.insert_one(rating_dict)
+        rating_response_data = convert_object_id(rating_dict)
+        
+        # Update product's average rating and review count
+        await update_product_rating_stats(rating_data.product_id, added=rating_data.rating)
     
     return RatingResponse(**rating_response_data)
 
 @router.get("/product/{product_id}", response_model=List[RatingResponse])
 async def get_product_ratings(
     product_id: str,
+    response: Response,
     skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; takes precedence over skip")
 ):
     """Get all ratings for a specific product."""
     
@@ -96,9 +110,10 @@ async def get_product_ratings(
             detail="Invalid product ID"
         )
     
-    cursor = ratings_collection.find({"product_id": ObjectId(product_id)})
-    cursor = cursor.sort("created_at", -1).skip(skip).limit(limit)
-    ratings = await cursor.to_list(length=limit)
+    ratings, next_cursor = await fetch_keyset_page(
+        ratings_collection, {"product_id": ObjectId(product_id)}, "created_at", limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
     rating_responses = []
     for rating in ratings:
@@ -115,15 +130,15 @@ async def get_my_ratings(
 ):
     """Get all ratings by the current user."""
     
-    # Get user ID from email
-    user = await users_collection.find_one({"email": current_user_email})
-    if not user:
+    # Get user ID from email (cached with the user's entitlements)
+    user_id = await get_user_id(current_user_email)
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    cursor = ratings_collection.find({"user_id": user["_id"]})
+    cursor = ratings_collection.find({"user_id": user_id})
     cursor = cursor.sort("created_at", -1).skip(skip).limit(limit)
     ratings = await cursor.to_list(length=limit)
     
@@ -147,9 +162,9 @@ async def delete_rating(
             detail="Invalid rating ID"
         )
     
-    # Get user ID from email
-    user = await users_collection.find_one({"email": current_user_email})
-    if not user:
+    # Get user ID from email (cached with the user's entitlements)
+    user_id = await get_user_id(current_user_email)
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
@@ -163,7 +178,7 @@ async def delete_rating(
             detail="Rating not found"
         )
     
-    if rating["user_id"] != user["_id"]:
+    if rating["user_id"] != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only delete your own ratings"
@@ -171,41 +186,20 @@ async def delete_rating(
     
     # Delete rating
     product_id = str(rating["product_id"])
-    await ratings_collection.delete_one({"_id": ObjectId(rating_id)})
+    await ensure_rating_stats(product_id)
+    result = await ratings_collection.delete_one({"_id": ObjectId(rating_id)})
     
-    # Update product's rating stats
-    await update_product_rating_stats(product_id)
+    # Update product's rating stats (a concurrent delete may have won the race)
+    if result.deleted_count:
+        await update_product_rating_stats(product_id, removed=rating["rating"])
     
     return {"message": "Rating deleted successfully"}
 
-async def update_product_rating_stats(product_id: str):
+async def update_product_rating_stats(product_id: str, added: Optional[int] = None, removed: Optional[int] = None):
     """Helper function to update product's average rating and review count."""
-    
-    # Calculate new average rating and count
-    pipeline = [
-        {"$match": {"product_id": ObjectId(product_id)}},
-        {"$group": {
-            "_id": None,
-            "average_rating": {"$avg": "$rating"},
-            "review_count": {"$sum": 1}
-        }}
-    ]
-    
-    result = await ratings_collection.aggregate(pipeline).to_list(length=1)
-    
-    if result:
-        avg_rating = round(result[0]["average_rating"], 1)
-        review_count = result[0]["review_count"]
+    rating_fields = await apply_rating_change(product_id, added=added, removed=removed)
+    # Patch the one product in the catalog snapshot instead of rebuilding the whole catalog
+    if rating_fields is not None:
+        catalog_cache.patch_product(product_id, rating_fields)
     else:
-        avg_rating = 0.0
-        review_count = 0
-    
-    # Update product
-    await products_collection.update_one(
-        {"_id": ObjectId(product_id)},
-        {"$set": {
-            "rating": avg_rating,
-            "reviews": review_count,
-            "updated_at": datetime.utcnow()
-        }}
-    )
\ No newline at end of file
+        catalog_cache.invalidate()
@@ -5,8 +5,6 @@ import uuid
 from datetime import datetime
 from typing import List
 
-from square import Square
-
 from models.square_payment import (
     SquarePaymentRequest, 
     SquarePaymentResponse, 
@@ -19,34 +17,22 @@ from models.transaction import Transaction, TransactionItem, PaymentMethod, Tran
 from utils.database import db
 from utils.auth import verify_token, get_verified_user_data
 from utils.tokens import update_user_purchases_and_tokens
-import random
-import string
+from utils.member_stats import record_member_order
+from utils.sales_rollups import record_sale, move_sale
+from utils.square_client import get_square_client
+from utils.pickup_codes import pickup_codes
+from utils.pickup_index import index_pickup, update_pickup_status
+from pymongo import ReturnDocument
 
 router = APIRouter()
 
-# Initialize Square client
-def get_square_client():
-    access_token = os.environ.get('SQUARE_ACCESS_TOKEN')
-    environment = os.environ.get('SQUARE_ENVIRONMENT', 'production')
-    
-    # Initialize Square client
-    from square.environment import SquareEnvironment
-    
-    # Convert environment string to Square environment
-    if environment == 'sandbox':
-        env = SquareEnvironment.SANDBOX
-    else:
-        env = SquareEnvironment.PRODUCTION
-    
-    client = Square(
-        token=access_token,
-        environment=env
-    )
-    return client
+# Square payment statuses that end the order without payment; their pickup codes are released
+SQUARE_FAILED_STATUSES = ("CANCELED", "FAILED")
 
-def generate_payment_code():
-    """Generate a unique 6-digit payment code starting with P for pre-paid orders."""
-    return 'P' + ''.join(random.choices(string.digits, k=6))
+def square_order_status(payment_status: str) -> str:
+    if payment_status == "COMPLETED":
+        return "paid"
+    return "cancelled" if payment_status in SQUARE_FAILED_STATUSES else "pending"
 
 @router.post("/create-order", response_model=SquarePaymentResponse)
 async def create_square_order(
@@ -85,7 +71,7 @@ async def create_square_order(
         }
         
         orders_api = client.orders
-        order_result = orders_api.create(
+        order_result = await orders_api.create(
             order=order_data,
             idempotency_key=idempotency_key
         )
@@ -98,7 +84,7 @@ async def create_square_order(
         payment_idempotency_key = str(uuid.uuid4())
         
         payments_api = client.payments
-        payment_result = payments_api.create(
+        payment_result = await payments_api.create(
             source_id=order_request.payment_source_id,
             idempotency_key=payment_idempotency_key,
             amount_money={
@@ -117,11 +103,6 @@ async def create_square_order(
         payment_status = payment.status
         receipt_url = payment.receipt_url
         
-        # Generate unique pickup code
-        payment_code = generate_payment_code()
-        while await db.transactions.find_one({"payment_code": payment_code}):
-            payment_code = generate_payment_code()
-        
         # Create transaction items as dictionaries (bypass model validation)
         transaction_items = []
         for item in order_request.items:
@@ -140,8 +121,12 @@ async def create_square_order(
             "items": transaction_items,  # Use dict directly
             "total": total_amount / 100,  # Convert from cents to dollars
             "payment_method": PaymentMethod.SQUARE,
-            "payment_code": payment_code,
-            "status": TransactionStatus.PAID if payment_status == "COMPLETED" else TransactionStatus.PENDING,
+            "payment_code": None,  # allocated on insert
+            "status": (
+                TransactionStatus.PAID if payment_status == "COMPLETED"
+                else TransactionStatus.CANCELLED if payment_status in SQUARE_FAILED_STATUSES
+                else TransactionStatus.PENDING
+            ),
             "notes": order_request.pickup_notes,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
@@ -149,8 +134,16 @@ async def create_square_order(
             "square_order_id": square_order_id
         }
         
-        # Save transaction to database
-        await db.transactions.insert_one(transaction_data)
+        # Save transaction to database with a unique P-prefixed pickup code
+        payment_code = await pickup_codes.insert_with_code(db.transactions, transaction_data, "payment_code", "square", prefix="P")
+        # A payment that failed outright never reaches the counter
+        if payment_status in SQUARE_FAILED_STATUSES:
+            await pickup_codes.release(payment_code)
+        # Unpaid orders join the member's stats when the webhook reports the payment completed
+        if payment_status == "COMPLETED":
+            await record_member_order(user["id"], transaction_data["total"], transaction_data["created_at"])
+        await record_sale("transactions", transaction_data)
+        await index_pickup("transactions", transaction_data, order_request.user_email, order_request.user_name)
         
         # Update user purchases and award tokens if payment is successful
         if payment_status == "COMPLETED":
@@ -164,11 +157,13 @@ async def create_square_order(
             user_name=order_request.user_name,
             items=order_request.items,
             total_amount=total_amount,
-            status="paid" if payment_status == "COMPLETED" else "pending",
+            status=square_order_status(payment_status),
             pickup_notes=order_request.pickup_notes
         )
         
-        await db.square_orders.insert_one(db_order.dict())
+        square_order_data = db_order.dict()
+        await db.square_orders.insert_one(square_order_data)
+        await record_sale("square_orders", square_order_data)
         
         # Create prepaid order entry for admin lookup (if payment successful)
         if payment_status == "COMPLETED":
@@ -194,6 +189,8 @@ async def create_square_order(
             }
             
             await db.prepaid_orders.insert_one(prepaid_order)
+            await record_sale("prepaid_orders", prepaid_order)
+            await index_pickup("prepaid_orders", prepaid_order, customer_name=order_request.user_name)
         
         return SquarePaymentResponse(
             success=True,
@@ -273,13 +270,50 @@ async def square_webhook(request: Request):
             
             # Update order status in database
             if payment_id:
-                await db.square_orders.update_one(
+                new_status = square_order_status(payment_status)
+                previous_order = await db.square_orders.find_one_and_update(
                     {"square_payment_id": payment_id},
                     {"$set": {
-                        "status": "paid" if payment_status == "COMPLETED" else "pending",
+                        "status": new_status,
                         "updated_at": datetime.utcnow()
-                    }}
+                    }},
+                    return_document=ReturnDocument.BEFORE
                 )
+                if previous_order:
+                    await move_sale("square_orders", previous_order, new_status)
+                
+                # The pending transaction becomes paid once, however often Square retries the webhook
+                if payment_status == "COMPLETED":
+                    previous_transaction = await db.transactions.find_one_and_update(
+                        {"square_payment_id": payment_id, "status": TransactionStatus.PENDING},
+                        {"$set": {
+                            "status": TransactionStatus.PAID,
+                            "updated_at": datetime.utcnow()
+                        }},
+                        return_document=ReturnDocument.BEFORE
+                    )
+                    if previous_transaction:
+                        await move_sale("transactions", previous_transaction, TransactionStatus.PAID)
+                        await update_pickup_status(previous_transaction.get("payment_code"), "transactions", TransactionStatus.PAID)
+                        await record_member_order(
+                            previous_transaction.get("user_id"),
+                            previous_transaction.get("total"),
+                            previous_transaction.get("created_at")
+                        )
+                elif payment_status in SQUARE_FAILED_STATUSES:
+                    # A pending order whose payment failed or was cancelled frees its pickup code
+                    previous_transaction = await db.transactions.find_one_and_update(
+                        {"square_payment_id": payment_id, "status": TransactionStatus.PENDING},
+                        {"$set": {
+                            "status": TransactionStatus.CANCELLED,
+                            "updated_at": datetime.utcnow()
+                        }},
+                        return_document=ReturnDocument.BEFORE
+                    )
+                    if previous_transaction:
+                        await move_sale("transactions", previous_transaction, TransactionStatus.CANCELLED)
+                        await update_pickup_status(previous_transaction.get("payment_code"), "transactions", TransactionStatus.CANCELLED)
+                        await pickup_codes.release(previous_transaction.get("payment_code"))
         
         return {"status": "success"}
         
@@ -294,7 +328,7 @@ async def get_payment_details(payment_id: str):
         client = get_square_client()
         payments_api = client.payments
         
-        result = payments_api.get(payment_id)
+        result = await payments_api.get(payment_id)
         
         if hasattr(result, 'errors') and result.errors:
             raise HTTPException(status_code=404, detail="Payment not found")
@@ -319,7 +353,7 @@ async def test_square_connection():
         client = get_square_client()
         locations_api = client.locations
         
-        result = locations_api.list()
+        result = await locations_api.list()
         
         # Check if response has errors
         if hasattr(result, 'errors') and result.errors:
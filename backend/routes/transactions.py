@@ -1,13 +1,17 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import List, Optional
 from datetime import datetime
 from models.transaction import Transaction, TransactionCreate, TransactionResponse, AdminTransactionUpdate, PaymentMethod, TransactionStatus
 from utils.database import users_collection, products_collection, transactions_collection, convert_object_id
 from utils.verification import require_verified_user, get_verified_user_data
 from utils.auth import verify_token
+from utils.pagination import fetch_keyset_page, set_next_cursor
+from utils.member_stats import record_member_order
+from utils.sales_rollups import record_sale
+from utils.pickup_codes import pickup_codes
+from utils.pickup_index import index_pickup
+from utils.pickup_state import complete_pickup
 from bson import ObjectId
-import random
-import string
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
@@ -15,10 +19,6 @@ router = APIRouter(prefix="/transactions", tags=["transactions"])
 from utils.database import db
 transactions_collection = db.transactions
 
-def generate_payment_code():
-    """Generate a unique 6-digit payment code."""
-    return ''.join(random.choices(string.digits, k=6))
-
 @router.post("/", response_model=TransactionResponse)
 async def create_transaction(
     transaction_data: TransactionCreate,
@@ -61,11 +61,6 @@ async def create_transaction(
             "tier": product["tier"]
         })
     
-    # Generate unique payment code
-    payment_code = generate_payment_code()
-    while await transactions_collection.find_one({"payment_code": payment_code}):
-        payment_code = generate_payment_code()
-    
     # Determine initial status based on payment method
     initial_status = TransactionStatus.PAID_IN_APP if transaction_data.payment_method == PaymentMethod.IN_APP else TransactionStatus.PENDING
     
@@ -75,34 +70,40 @@ async def create_transaction(
         "items": validated_items,
         "total": round(total, 2),
         "payment_method": transaction_data.payment_method,
-        "payment_code": payment_code,
+        "payment_code": None,  # allocated on insert
         "status": initial_status,
         "notes": transaction_data.notes,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
     
-    result = await transactions_collection.insert_one(transaction_dict)
+    # Insert with a freshly allocated unique payment code
+    await pickup_codes.insert_with_code(transactions_collection, transaction_dict, "payment_code", "in_app")
+    await record_member_order(user["_id"], transaction_dict["total"], transaction_dict["created_at"])
+    await record_sale("transactions", transaction_dict)
+    await index_pickup("transactions", transaction_dict, user.get("email"), user.get("full_name"))
     
     # Get created transaction
-    created_transaction = await transactions_collection.find_one({"_id": result.inserted_id})
+    created_transaction = await transactions_collection.find_one({"_id": transaction_dict["_id"]})
     transaction_response_data = convert_object_id(created_transaction)
     
     return TransactionResponse(**transaction_response_data)
 
 @router.get("/my-history", response_model=List[TransactionResponse])
 async def get_my_transaction_history(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; takes precedence over skip"),
     user = Depends(get_verified_user_data)
 ):
     """Get user's transaction history."""
     
-    cursor = transactions_collection.find({"user_id": user["_id"]})
-    cursor = cursor.sort("created_at", -1)  # Most recent first
-    cursor = cursor.skip(skip).limit(limit)
-    
-    transactions = await cursor.to_list(length=limit)
+    # Most recent first
+    transactions, next_cursor = await fetch_keyset_page(
+        transactions_collection, {"user_id": user["_id"]}, "created_at", limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
     transaction_responses = []
     for transaction in transactions:
@@ -151,14 +152,6 @@ async def process_pickup(
             detail="Admin access required"
         )
     
-    # Find transaction by payment code
-    transaction = await transactions_collection.find_one({"payment_code": update_data.payment_code})
-    if not transaction:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transaction not found with this payment code"
-        )
-    
     # Update based on action
     update_fields = {
         "updated_at": datetime.utcnow(),
@@ -169,31 +162,26 @@ async def process_pickup(
     if update_data.notes:
         update_fields["notes"] = update_data.notes
     
+    guard = None
     if update_data.action == "mark_picked_up":
         # For in-app payments, mark as picked up
-        if transaction["payment_method"] != PaymentMethod.IN_APP:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="This action is only for in-app paid orders"
-            )
-        update_fields["status"] = TransactionStatus.PICKED_UP
+        new_status = TransactionStatus.PICKED_UP
+        guard = {"payment_method": PaymentMethod.IN_APP}
         
     elif update_data.action == "mark_cash_paid":
         # For cash payments, mark as cash paid in store
-        update_fields["status"] = TransactionStatus.CASH_PAID_IN_STORE
-    
-    # Update transaction
-    result = await transactions_collection.update_one(
-        {"payment_code": update_data.payment_code},
-        {"$set": update_fields}
+        new_status = TransactionStatus.CASH_PAID_IN_STORE
+    
+    # One guarded update; a second tablet completing the same code gets a 400
+    await complete_pickup(
+        "transactions",
+        update_data.payment_code,
+        new_status,
+        update_fields,
+        guard=guard,
+        guard_detail="This action is only for in-app paid orders"
     )
     
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transaction not found"
-        )
-    
     return {
         "message": f"Transaction processed successfully",
         "payment_code": update_data.payment_code,
@@ -2,8 +2,9 @@ from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List, Optional
 from datetime import datetime
 from models.wictionary import Wictionary, WictionaryCreate, WictionarySuggest, WictionaryResponse
-from utils.database import wictionary_collection, users_collection, convert_object_id
-from utils.auth import verify_token, require_premium_membership
+from utils.database import wictionary_collection, convert_object_id
+from utils.auth import verify_token, verify_token_claims, require_premium_membership
+from utils.user_context import get_claim_entitlements
 from bson import ObjectId
 
 router = APIRouter(prefix="/wictionary", tags=["wictionary"])
@@ -14,23 +15,19 @@ async def get_wictionary_terms(
     search: Optional[str] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    current_user_email: str = Depends(verify_token)
+    claims: dict = Depends(verify_token_claims)
 ):
     """Get wictionary terms (premium members only)."""
-    # Check if user is admin or has premium membership
-    from utils.database import admins_collection
-    admin = await admins_collection.find_one({"email": current_user_email})
-    
-    if not admin:
-        # Check if user has premium membership
-        user = await users_collection.find_one({"email": current_user_email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        require_premium_membership(user)
+    # Admin or premium, from the token's signed claims when present (no database read)
+    entitlements = await get_claim_entitlements(claims)
+    if not entitlements:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    if not entitlements["role"]:
+        require_premium_membership(entitlements)
     
     # Build query
     query = {}
@@ -60,23 +57,19 @@ async def get_wictionary_terms(
 @router.get("/search", response_model=List[WictionaryResponse])
 async def search_wictionary(
     q: str = Query(..., min_length=1),
-    current_user_email: str = Depends(verify_token)
+    claims: dict = Depends(verify_token_claims)
 ):
     """Search wictionary terms (premium members only)."""
-    # Check if user is admin or has premium membership
-    from utils.database import admins_collection
-    admin = await admins_collection.find_one({"email": current_user_email})
-    
-    if not admin:
-        # Check if user has premium membership
-        user = await users_collection.find_one({"email": current_user_email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        require_premium_membership(user)
+    # Admin or premium, from the token's signed claims when present (no database read)
+    entitlements = await get_claim_entitlements(claims)
+    if not entitlements:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    if not entitlements["role"]:
+        require_premium_membership(entitlements)
     
     # Search in term, definition, and etymology
     query = {
@@ -138,23 +131,19 @@ async def suggest_term(
 
 @router.get("/categories")
 async def get_categories(
-    current_user_email: str = Depends(verify_token)
+    claims: dict = Depends(verify_token_claims)
 ):
     """Get available wictionary categories (premium members only)."""
-    # Check if user is admin or has premium membership
-    from utils.database import admins_collection
-    admin = await admins_collection.find_one({"email": current_user_email})
-    
-    if not admin:
-        # Check if user has premium membership
-        user = await users_collection.find_one({"email": current_user_email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        require_premium_membership(user)
+    # Admin or premium, from the token's signed claims when present (no database read)
+    entitlements = await get_claim_entitlements(claims)
+    if not entitlements:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    if not entitlements["role"]:
+        require_premium_membership(entitlements)
     
     # Get category counts
     pipeline = [
@@ -173,23 +162,19 @@ async def get_categories(
 
 @router.get("/stats")
 async def get_wictionary_stats(
-    current_user_email: str = Depends(verify_token)
+    claims: dict = Depends(verify_token_claims)
 ):
     """Get wictionary statistics (premium members only)."""
-    # Check if user is admin or has premium membership
-    from utils.database import admins_collection
-    admin = await admins_collection.find_one({"email": current_user_email})
-    
-    if not admin:
-        # Check if user has premium membership
-        user = await users_collection.find_one({"email": current_user_email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        require_premium_membership(user)
+    # Admin or premium, from the token's signed claims when present (no database read)
+    entitlements = await get_claim_entitlements(claims)
+    if not entitlements:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    if not entitlements["role"]:
+        require_premium_membership(entitlements)
     
     total_terms = await wictionary_collection.count_documents({})
     
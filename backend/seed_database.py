@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.indexes import ensure_indexes
+from utils.seed import DatabaseSeeder
+
+async def main():
+    """Build indexes and load sample products, wictionary terms, the admin and demo users into empty collections."""
+    status = await ensure_indexes()
+    for name, error in status["errors"].items():
+        print(f"Error building indexes on {name}: {error}")
+    await DatabaseSeeder.seed_if_empty()
+    print("Database seeded")
+
+if __name__ == "__main__":
+    asyncio.run(main())
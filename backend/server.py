@@ -1,5 +1,5 @@
-from fastapi import FastAPI, APIRouter
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
@@ -7,8 +7,11 @@ import logging
 from pathlib import Path
 
 # Import route modules
-from routes import auth, products, daily_deals, wictionary, orders, cart, admin, admin_auth, ratings, payments, transactions, square_payments, admin_health_aid, admin_strains, cash_pickups, daily_reports, prepaid_orders, profile, digital_wallet_payments
+from routes import auth, products, daily_deals, wictionary, orders, cart, admin, admin_auth, ratings, payments, transactions, square_payments, admin_health_aid, admin_strains, cash_pickups, daily_reports, prepaid_orders, profile, digital_wallet_payments, files
 from utils.database import DatabaseManager
+from utils.square_client import close_square_client
+from utils.passwords import password_hasher
+from utils.metrics import MetricsMiddleware, METRICS_TOKEN, metrics
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -32,6 +35,13 @@ async def root():
 async def health_check():
     return {"status": "healthy", "message": "StatusXSmoakland API is operational"}
 
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    """Prometheus scrape endpoint: per-route latency, status counts and Mongo commands per request."""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Include all route modules
 api_router.include_router(auth.router)
 api_router.include_router(products.router)
@@ -52,16 +62,16 @@ api_router.include_router(daily_reports.router)
 api_router.include_router(prepaid_orders.router)
 api_router.include_router(profile.router)
 api_router.include_router(digital_wallet_payments.router)
+api_router.include_router(files.router)
 
 # Include the main router in the app
 app.include_router(api_router)
 
-# Mount static files for video and image uploads
+# Video and image uploads are served by routes/files.py (ETag, byte ranges, immutable caching)
 uploads_dir = "/app/uploads"
 os.makedirs(uploads_dir, exist_ok=True)
 os.makedirs(f"{uploads_dir}/videos", exist_ok=True)
 os.makedirs(f"{uploads_dir}/strains", exist_ok=True)
-app.mount("/api/uploads", StaticFiles(directory=uploads_dir), name="uploads")
 
 # CORS middleware - Production ready configuration
 cors_origins = os.environ.get('CORS_ORIGINS', '*').split(',')
@@ -87,8 +97,12 @@ app.add_middleware(
     allow_origins=cors_origins,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# Added last so it wraps CORS and times the whole request
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -107,4 +121,6 @@ async def startup_event():
 async def shutdown_event():
     """Clean up on shutdown."""
     logger.info("Shutting down StatusXSmoakland API...")
+    await close_square_client()
+    password_hasher.shutdown()
     # Database connection will be closed automatically
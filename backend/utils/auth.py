@@ -1,30 +1,35 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-import hashlib
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
+import threading
+import time
+from utils import passwords
 
 # Security configuration
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# Decoded claims are kept until the token's exp, keyed by its signature
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
 security = HTTPBearer()
 
+_decoded_tokens: "OrderedDict[str, tuple]" = OrderedDict()
+# verify_token is a sync dependency, so FastAPI calls it from worker threads
+_decoded_tokens_lock = threading.Lock()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    # Simple SHA-256 based verification for MVP
-    salt = os.environ.get('PASSWORD_SALT', 'statusxsmoakland_salt_2024')
-    hashed_input = hashlib.sha256((plain_password + salt).encode()).hexdigest()
-    return hashed_input == hashed_password
+    """Verify a password against its hash (blocking; request handlers use password_hasher)."""
+    return passwords.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Hash a password."""
-    # Simple SHA-256 based hashing for MVP
-    salt = os.environ.get('PASSWORD_SALT', 'statusxsmoakland_salt_2024')
-    return hashlib.sha256((password + salt).encode()).hexdigest()
+    """Hash a password (blocking; request handlers use password_hasher)."""
+    return passwords.hash_password(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
@@ -34,16 +39,44 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify JWT token and return user email."""
+def entitlement_claims(user: dict) -> dict:
+    """Signed tier/verified claims, so premium checks can skip the database until they are revoked."""
+    return {
+        "tier": user.get("membership_tier"),
+        "verified": user.get("is_verified", False)
+    }
+
+def decode_token(token: str) -> dict:
+    """jwt.decode with a bounded LRU in front; raises JWTError like jwt.decode."""
+    signature = token.rsplit(".", 1)[-1]
+    now = time.time()
+    with _decoded_tokens_lock:
+        entry = _decoded_tokens.get(signature)
+        # Compare the whole token so a signature can't be replayed onto another payload
+        if entry is not None and entry[0] == token and entry[2] > now:
+            _decoded_tokens.move_to_end(signature)
+            return entry[1]
+    
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    expires_at = claims.get("exp")
+    if isinstance(expires_at, (int, float)) and expires_at > now:
+        with _decoded_tokens_lock:
+            _decoded_tokens[signature] = (token, claims, expires_at)
+            _decoded_tokens.move_to_end(signature)
+            while len(_decoded_tokens) > TOKEN_CACHE_MAX_ENTRIES:
+                _decoded_tokens.popitem(last=False)
+    return claims
+
+def verify_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Verify JWT token and return its claims (shared, don't modify)."""
     token = credentials.credentials
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(
@@ -51,7 +84,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
                 detail="Invalid authentication credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return email
+        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -59,6 +92,10 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def verify_token(claims: dict = Depends(verify_token_claims)):
+    """Verify JWT token and return user email."""
+    return claims["sub"]
+
 def require_premium_membership(user_data: dict):
     """Check if user has premium membership."""
     if user_data.get("membership_tier") != "premium":
@@ -67,14 +104,14 @@ def require_premium_membership(user_data: dict):
             detail="Premium membership required"
         )
 
-async def get_verified_user_data(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_verified_user_data(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify JWT token and return user data from database."""
-    from utils.database import db
+    from utils.user_context import load_request_user
     
     token = credentials.credentials
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(
@@ -83,8 +120,8 @@ async def get_verified_user_data(credentials: HTTPAuthorizationCredentials = Dep
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Get user data from database
-        user = await db.users.find_one({"email": email})
+        # Get user data from database (shared with the rest of the request)
+        user = await load_request_user(request, email)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -93,6 +130,7 @@ async def get_verified_user_data(credentials: HTTPAuthorizationCredentials = Dep
             )
         
         # Convert ObjectId to string for JSON serialization
+        user = dict(user)
         user["id"] = str(user["_id"])
         del user["_id"]
         
@@ -0,0 +1,233 @@
+import asyncio
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from utils.database import blobs_collection, private_blobs_collection
+from utils.file_upload import UPLOAD_DIR, stream_upload
+
+# Uploads are stored once per distinct content, named by SHA-256 plus extension:
+#   /app/uploads/blobs/ab/cd/abcd...ef.mp4
+# and counted in blobs (_id = that file name, the blob key):
+#   {"_id": "abcd...ef.mp4", "size": 1048576, "content_type": "video/mp4", "kind": "deal_video",
+#    "refcount": 2, "created_at": datetime, "zero_since": datetime (while refcount is 0)}
+#
+# Every document that stores a key holds one reference. Blobs at refcount 0 are removed by
+# collect_garbage after BLOB_GC_GRACE_SECONDS; a blob being collected is marked "deleting",
+# and put() waits for the collection to finish before re-creating it.
+BLOB_ROOT = UPLOAD_DIR / "blobs"
+# ID and medical documents live in a separate store (own root, own private_blobs counts),
+# which /api/uploads refuses: they are only served through signed /api/files links.
+PRIVATE_BLOB_ROOT = UPLOAD_DIR / "private"
+BLOB_GC_GRACE_SECONDS = int(os.environ.get("BLOB_GC_GRACE_SECONDS", str(60 * 60)))
+BLOB_PUT_RETRIES = 50
+
+BLOB_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]{1,8})?$")
+
+def is_blob_key(name: Optional[str]) -> bool:
+    return bool(name) and BLOB_KEY_PATTERN.match(name) is not None
+
+def blob_path(key: str) -> Path:
+    """File of a public blob."""
+    return BLOB_ROOT / key[:2] / key[2:4] / key
+
+def blob_key_from_url(url: Optional[str]) -> Optional[str]:
+    """The blob key of a blob URL or path; None for legacy (UUID-named) uploads."""
+    if not url:
+        return None
+    key = url.rsplit("/", 1)[-1]
+    return key if is_blob_key(key) else None
+
+def _normalize_extension(filename: Optional[str], default: str = "") -> str:
+    extension = Path(filename or "").suffix.lower()
+    return extension if re.match(r"^\.[a-z0-9]{1,8}$", extension) else default
+
+def _remove_file(path: Path) -> int:
+    try:
+        size = path.stat().st_size
+        path.unlink()
+        return size
+    except FileNotFoundError:
+        return 0
+
+class BlobStore:
+    """Content-addressed upload storage with reference counts in Mongo."""
+
+    def __init__(self, collection, root: Path, public: bool = True):
+        self.collection = collection
+        self.root = root
+        self.public = public
+        self.staging_dir = root / ".staging"
+        self.deduplicated = 0
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    def relative_path(self, key: str) -> str:
+        """Path under /app, as stored on the owning document (e.g. uploads/private/ab/cd/<key>)."""
+        return f"{self.root.relative_to(UPLOAD_DIR.parent).as_posix()}/{key[:2]}/{key[2:4]}/{key}"
+
+    def url(self, key: str) -> Optional[str]:
+        # Private blobs have no public URL; sign their path with file_upload.get_file_url
+        return f"/api/{self.relative_path(key)}" if self.public else None
+
+    async def _add_reference(self, key: str, upload: dict, content_type: Optional[str], kind: str):
+        for _ in range(BLOB_PUT_RETRIES):
+            try:
+                return await self.collection.find_one_and_update(
+                    {"_id": key, "deleting": {"$ne": True}},
+                    {
+                        "$inc": {"refcount": 1},
+                        "$unset": {"zero_since": ""},
+                        "$setOnInsert": {
+                            "size": upload["size"],
+                            "content_type": content_type,
+                            "kind": kind,
+                            "created_at": datetime.utcnow()
+                        }
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.BEFORE
+                )
+            except DuplicateKeyError:
+                # collect_garbage is removing this blob right now; re-create it once it is gone
+                await asyncio.sleep(0.1)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Upload storage is busy, please retry"
+        )
+
+    async def put(self, file: UploadFile, kind: str, default_extension: str = "") -> dict:
+        """Store an upload (size-limited per kind) and take one reference to it.
+
+        Returns {"key", "path", "url", "size", "sha256", "deduplicated"}; keep the key on the
+        owning document and release() it when that document stops using the file.
+        """
+        staged = self.staging_dir / uuid.uuid4().hex
+        upload = await stream_upload(file, staged, kind)
+        try:
+            key = f"{upload['sha256']}{_normalize_extension(file.filename, default_extension)}"
+            previous = await self._add_reference(key, upload, file.content_type, kind)
+            try:
+                destination = self.path(key)
+                # Referenced blobs are never collected, so an existing file is the same content
+                if previous is not None and await asyncio.to_thread(destination.exists):
+                    self.deduplicated += 1
+                else:
+                    await asyncio.to_thread(destination.parent.mkdir, parents=True, exist_ok=True)
+                    await asyncio.to_thread(os.replace, staged, destination)
+            except Exception:
+                await self.release(key)
+                raise
+        finally:
+            await asyncio.to_thread(staged.unlink, missing_ok=True)
+
+        return {
+            "key": key,
+            "path": self.relative_path(key),
+            "url": self.url(key),
+            "size": upload["size"],
+            "sha256": upload["sha256"],
+            "deduplicated": previous is not None
+        }
+
+    async def release(self, key: Optional[str]):
+        """Drop one reference; the blob becomes collectable when none are left."""
+        if not is_blob_key(key):
+            return
+        blob = await self.collection.find_one_and_update(
+            {"_id": key, "refcount": {"$gt": 0}},
+            {"$inc": {"refcount": -1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob is not None and blob["refcount"] == 0:
+            await self.collection.update_one(
+                {"_id": key, "refcount": 0, "zero_since": {"$exists": False}},
+                {"$set": {"zero_since": datetime.utcnow()}}
+            )
+
+    async def discard(self, name: Optional[str], legacy_dir: str):
+        """Release a stored upload: blob keys lose a reference, legacy UUID files are deleted."""
+        if not name:
+            return
+        if is_blob_key(name):
+            await self.release(name)
+        else:
+            await asyncio.to_thread(_remove_file, Path(legacy_dir) / name)
+
+    async def collect_garbage(self, grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> dict:
+        """Delete blobs unreferenced for longer than grace_seconds, plus stale staging files."""
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        deleted = 0
+        bytes_freed = 0
+
+        # Interrupted collections ("deleting" left set) are finished on the next run
+        candidates = await self.collection.find(
+            {"refcount": 0, "$or": [{"zero_since": {"$lt": cutoff}}, {"deleting": True}]},
+            {"_id": 1}
+        ).to_list(length=None)
+        for candidate in candidates:
+            claimed = await self.collection.find_one_and_update(
+                {"_id": candidate["_id"], "refcount": 0},
+                {"$set": {"deleting": True}}
+            )
+            if claimed is None:
+                continue
+            bytes_freed += await asyncio.to_thread(_remove_file, self.path(candidate["_id"]))
+            await self.collection.delete_one({"_id": candidate["_id"], "deleting": True})
+            deleted += 1
+
+        # Staged uploads left behind by crashed workers
+        staging_cutoff = time.time() - grace_seconds
+        def sweep_staging() -> int:
+            freed = 0
+            if self.staging_dir.exists():
+                for staged in self.staging_dir.iterdir():
+                    if staged.stat().st_mtime < staging_cutoff:
+                        freed += _remove_file(staged)
+            return freed
+        bytes_freed += await asyncio.to_thread(sweep_staging)
+
+        return {"deleted_blobs": deleted, "bytes_freed": bytes_freed}
+
+    async def stats(self) -> dict:
+        """Blob counts, stored vs referenced bytes and disk usage for the admin stats endpoint."""
+        pipeline = [
+            {"$group": {
+                "_id": {"$gt": ["$refcount", 0]},
+                "blobs": {"$sum": 1},
+                "bytes": {"$sum": "$size"},
+                "logical_bytes": {"$sum": {"$multiply": ["$size", "$refcount"]}},
+                "references": {"$sum": "$refcount"}
+            }}
+        ]
+        groups = {group["_id"]: group for group in await self.collection.aggregate(pipeline).to_list(length=None)}
+        referenced = groups.get(True, {})
+        unreferenced = groups.get(False, {})
+        disk = await asyncio.to_thread(shutil.disk_usage, UPLOAD_DIR)
+        return {
+            "blobs": referenced.get("blobs", 0) + unreferenced.get("blobs", 0),
+            "references": referenced.get("references", 0),
+            "stored_bytes": referenced.get("bytes", 0) + unreferenced.get("bytes", 0),
+            # What the same uploads would take without deduplication
+            "logical_bytes": referenced.get("logical_bytes", 0),
+            "saved_bytes": referenced.get("logical_bytes", 0) - referenced.get("bytes", 0),
+            "unreferenced_blobs": unreferenced.get("blobs", 0),
+            "unreferenced_bytes": unreferenced.get("bytes", 0),
+            "deduplicated_uploads": self.deduplicated,
+            "disk_total_bytes": disk.total,
+            "disk_free_bytes": disk.free
+        }
+
+# Shared per-process stores
+blob_store = BlobStore(blobs_collection, BLOB_ROOT)
+private_blob_store = BlobStore(private_blobs_collection, PRIVATE_BLOB_ROOT, public=False)
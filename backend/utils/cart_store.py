@@ -0,0 +1,134 @@
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo.errors import DuplicateKeyError
+
+# Carts untouched for this long are removed by the TTL index on carts.updated_at
+CART_TTL_SECONDS = int(os.environ.get("CART_TTL_SECONDS", str(60 * 60 * 24 * 30)))
+
+class CartStore(ABC):
+    """Interface for cart backends. Items are {"product_id": str, "quantity": int} dicts."""
+
+    @abstractmethod
+    async def get_items(self, user_email: str) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def add_item(self, user_email: str, product_id: str, quantity: int):
+        """Add quantity of a product, merging with an existing line."""
+
+    @abstractmethod
+    async def set_quantity(self, user_email: str, product_id: str, quantity: int) -> bool:
+        """Set the quantity of an existing line. Returns False if the product is not in the cart."""
+
+    @abstractmethod
+    async def remove_item(self, user_email: str, product_id: str) -> bool:
+        """Remove a line. Returns False if the product is not in the cart."""
+
+    @abstractmethod
+    async def clear(self, user_email: str):
+        ...
+
+class InMemoryCartStore(CartStore):
+    """Process-local cart store for tests and single-worker development."""
+
+    def __init__(self):
+        self.carts: Dict[str, List[dict]] = {}
+
+    async def get_items(self, user_email: str) -> List[dict]:
+        return [dict(item) for item in self.carts.get(user_email, [])]
+
+    async def add_item(self, user_email: str, product_id: str, quantity: int):
+        user_cart = self.carts.setdefault(user_email, [])
+        for cart_item in user_cart:
+            if cart_item["product_id"] == product_id:
+                cart_item["quantity"] += quantity
+                return
+        user_cart.append({"product_id": product_id, "quantity": quantity})
+
+    async def set_quantity(self, user_email: str, product_id: str, quantity: int) -> bool:
+        for cart_item in self.carts.get(user_email, []):
+            if cart_item["product_id"] == product_id:
+                cart_item["quantity"] = quantity
+                return True
+        return False
+
+    async def remove_item(self, user_email: str, product_id: str) -> bool:
+        user_cart = self.carts.get(user_email, [])
+        for cart_item in user_cart:
+            if cart_item["product_id"] == product_id:
+                user_cart.remove(cart_item)
+                return True
+        return False
+
+    async def clear(self, user_email: str):
+        self.carts.pop(user_email, None)
+
+class MongoCartStore(CartStore):
+    """Shared cart store: one document per user in the carts collection.
+
+    Every item operation is a single atomic update, so concurrent requests
+    landing on different workers see a consistent cart.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get_items(self, user_email: str) -> List[dict]:
+        cart = await self.collection.find_one({"_id": user_email}, {"items": 1})
+        return cart.get("items", []) if cart else []
+
+    async def add_item(self, user_email: str, product_id: str, quantity: int):
+        now = datetime.utcnow()
+        while True:
+            # Existing line: bump its quantity in place
+            result = await self.collection.update_one(
+                {"_id": user_email, "items.product_id": product_id},
+                {"$inc": {"items.$.quantity": quantity}, "$set": {"updated_at": now}}
+            )
+            if result.matched_count:
+                return
+
+            # New line: push it, creating the cart document if needed
+            try:
+                await self.collection.update_one(
+                    {"_id": user_email, "items.product_id": {"$ne": product_id}},
+                    {
+                        "$push": {"items": {"product_id": product_id, "quantity": quantity}},
+                        "$set": {"updated_at": now}
+                    },
+                    upsert=True
+                )
+                return
+            except DuplicateKeyError:
+                # Another request added the same product first; retry the $inc
+                continue
+
+    async def set_quantity(self, user_email: str, product_id: str, quantity: int) -> bool:
+        result = await self.collection.update_one(
+            {"_id": user_email, "items.product_id": product_id},
+            {"$set": {"items.$.quantity": quantity, "updated_at": datetime.utcnow()}}
+        )
+        return result.matched_count > 0
+
+    async def remove_item(self, user_email: str, product_id: str) -> bool:
+        result = await self.collection.update_one(
+            {"_id": user_email, "items.product_id": product_id},
+            {"$pull": {"items": {"product_id": product_id}}, "$set": {"updated_at": datetime.utcnow()}}
+        )
+        return result.modified_count > 0
+
+    async def clear(self, user_email: str):
+        await self.collection.delete_one({"_id": user_email})
+
+def create_cart_store() -> CartStore:
+    """Build the cart backend selected by CART_BACKEND ("mongo" or "memory")."""
+    backend = os.environ.get("CART_BACKEND", "mongo")
+    if backend == "memory":
+        return InMemoryCartStore()
+    if backend == "mongo":
+        from utils.database import carts_collection
+        return MongoCartStore(carts_collection)
+    raise ValueError(f"Unknown CART_BACKEND: {backend}")
@@ -0,0 +1,189 @@
+import asyncio
+import bisect
+import os
+import re
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set
+
+from bson import ObjectId
+
+from utils.database import products_collection, daily_deals_collection, convert_object_id
+
+# Safety net for writes that bypass the API (seed scripts, other workers)
+CATALOG_CACHE_TTL_SECONDS = float(os.environ.get("CATALOG_CACHE_TTL_SECONDS", "60"))
+
+class CatalogSnapshot:
+    """Point-in-time view of the catalog: products plus the ids of products with an active deal.
+
+    Only CatalogCache.patch_product changes it, by swapping in a new product dict.
+    """
+
+    def __init__(self, version: int, products: List[dict], deal_product_ids: Set[str], deals_expire_at: Optional[datetime]):
+        self.version = version
+        self.products = products
+        self.by_id: Dict[str, dict] = {product["id"]: product for product in products}
+        # Products are loaded in _id order, so this list is sorted for keyset lookups
+        self.object_ids = [ObjectId(product["id"]) for product in products]
+        self.deal_product_ids = deal_product_ids
+        self.deals_expire_at = deals_expire_at
+        self.built_at = time.monotonic()
+
+    def is_fresh(self, version: int) -> bool:
+        """Check the snapshot against the cache version, its TTL and the earliest deal expiry."""
+        if self.version != version:
+            return False
+        if time.monotonic() - self.built_at > CATALOG_CACHE_TTL_SECONDS:
+            return False
+        if self.deals_expire_at is not None and datetime.utcnow() >= self.deals_expire_at:
+            return False
+        return True
+
+    def with_deal_flag(self, product: dict) -> dict:
+        """Return a response-ready copy of a product with its daily deal flag set."""
+        product_data = dict(product)
+        product_data["daily_deal"] = product["id"] in self.deal_product_ids
+        return product_data
+
+    def position_after(self, last_id: ObjectId) -> int:
+        """Index of the first product whose _id sorts after last_id."""
+        return bisect.bisect_right(self.object_ids, last_id)
+
+    def iter_matching(
+        self,
+        start: int = 0,
+        category: Optional[str] = None,
+        tier: Optional[str] = None,
+        vendor: Optional[str] = None,
+        in_stock: Optional[bool] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> Iterator[dict]:
+        """Yield products from position start on that match the filters GET /products used to send to Mongo."""
+        vendor_pattern = None
+        if vendor:
+            try:
+                vendor_pattern = re.compile(vendor, re.IGNORECASE)
+            except re.error:
+                vendor_pattern = re.compile(re.escape(vendor), re.IGNORECASE)
+
+        for index in range(start, len(self.products)):
+            product = self.products[index]
+            if category and product.get("category") != category:
+                continue
+            if tier and product.get("tier") != tier:
+                continue
+            if vendor_pattern and not vendor_pattern.search(product.get("vendor") or ""):
+                continue
+            if in_stock is not None and product.get("in_stock") != in_stock:
+                continue
+            price = product.get("price")
+            if min_price is not None and (price is None or price < min_price):
+                continue
+            if max_price is not None and (price is None or price > max_price):
+                continue
+            yield product
+
+class CatalogCache:
+    """Versioned in-process catalog snapshot, rebuilt when admin writes bump the version."""
+
+    def __init__(self):
+        self.version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.patches = 0
+        self.last_rebuild_ms = 0.0
+        self.max_rebuild_ms = 0.0
+        self.total_rebuild_ms = 0.0
+
+    async def get_snapshot(self) -> CatalogSnapshot:
+        """Return the current snapshot, rebuilding it if it is stale."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.is_fresh(self.version):
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        async with self._lock:
+            # Another request may have rebuilt it while we waited
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.is_fresh(self.version):
+                return snapshot
+            return await self._rebuild()
+
+    def invalidate(self):
+        """Bump the catalog version (call after every product write); the next reader rebuilds."""
+        self.version += 1
+
+    def patch_product(self, product_id: str, fields: dict):
+        """Apply a write to one product's fields (e.g. rating aggregates) without a rebuild.
+
+        Falls back to invalidate() when the product isn't in the current snapshot.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != self.version:
+            # Stale or missing: the next reader rebuilds from Mongo anyway
+            return
+        product = snapshot.by_id.get(str(product_id))
+        if product is None:
+            self.invalidate()
+            return
+        updated = {**product, **fields}
+        snapshot.products[snapshot.position_after(ObjectId(product_id)) - 1] = updated
+        snapshot.by_id[updated["id"]] = updated
+        self.patches += 1
+
+    async def _rebuild(self) -> CatalogSnapshot:
+        started = time.perf_counter()
+        version = self.version
+        now = datetime.utcnow()
+
+        products = await products_collection.find({}).sort("_id", 1).to_list(length=None)
+        current_deals = await daily_deals_collection.find(
+            {"valid_until": {"$gt": now}, "is_active": True},
+            {"product_id": 1, "valid_until": 1}
+        ).to_list(length=None)
+
+        deal_product_ids = {str(deal["product_id"]) for deal in current_deals}
+        deals_expire_at = min((deal["valid_until"] for deal in current_deals), default=None)
+
+        snapshot = CatalogSnapshot(
+            version=version,
+            products=[convert_object_id(product) for product in products],
+            deal_product_ids=deal_product_ids,
+            deals_expire_at=deals_expire_at
+        )
+        self._snapshot = snapshot
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.rebuilds += 1
+        self.last_rebuild_ms = elapsed_ms
+        self.max_rebuild_ms = max(self.max_rebuild_ms, elapsed_ms)
+        self.total_rebuild_ms += elapsed_ms
+        return snapshot
+
+    def stats(self) -> dict:
+        """Hit/miss/rebuild counters for the admin stats endpoint."""
+        lookups = self.hits + self.misses
+        snapshot = self._snapshot
+        return {
+            "version": self.version,
+            "snapshot_version": snapshot.version if snapshot else None,
+            "product_count": len(snapshot.products) if snapshot else 0,
+            "active_deals": len(snapshot.deal_product_ids) if snapshot else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "rebuilds": self.rebuilds,
+            "patches": self.patches,
+            "last_rebuild_ms": round(self.last_rebuild_ms, 2),
+            "max_rebuild_ms": round(self.max_rebuild_ms, 2),
+            "avg_rebuild_ms": round(self.total_rebuild_ms / self.rebuilds, 2) if self.rebuilds else 0.0,
+            "ttl_seconds": CATALOG_CACHE_TTL_SECONDS
+        }
+
+# Shared per-process cache
+catalog_cache = CatalogCache()
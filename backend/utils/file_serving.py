@@ -0,0 +1,156 @@
+import hashlib
+import hmac
+import mimetypes
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request, status
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Stored upload names never change content (blob keys are SHA-256, older uploads are
+# UUID-named), so public uploads are cacheable forever.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Signed /api/files links (ID and medical documents) expire after this many seconds
+FILE_URL_TTL_SECONDS = int(os.environ.get("FILE_URL_TTL_SECONDS", "900"))
+FILE_URL_SECRET = os.environ.get("FILE_URL_SECRET") or os.environ.get("SECRET_KEY", "your-secret-key-change-in-production")
+# Behind nginx, set to the internal location aliasing /app/uploads (e.g. "/protected-uploads/")
+# to hand the body to nginx's sendfile via X-Accel-Redirect
+UPLOADS_X_ACCEL_PREFIX = os.environ.get("UPLOADS_X_ACCEL_PREFIX")
+
+APP_ROOT = Path("/app")
+UPLOADS_ROOT = APP_ROOT / "uploads"
+FILE_CHUNK_SIZE = 256 * 1024
+
+BLOB_NAME_PATTERN = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]{1,8})?$")
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def file_etag(path: Path, stat_result: os.stat_result) -> str:
+    """Strong ETag: the content hash for blobs, inode change data for older uploads."""
+    match = BLOB_NAME_PATTERN.match(path.name)
+    if match:
+        return f'"{match.group(1)}"'
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single satisfiable byte range; None to send the whole file.
+
+    Raises 416 for a well-formed range that lies past the end of the file.
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    # Multiple ranges and malformed headers are allowed to fall back to a full 200
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            raise HTTPException(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers={"Content-Range": f"bytes */{size}"})
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+class RangeFileResponse(Response):
+    """Streams [start, end] of a file, handing it to the server's sendfile when it can.
+
+    Uses the ASGI zero-copy send extension when the server advertises it, otherwise
+    reads FILE_CHUNK_SIZE chunks on a worker thread.
+    """
+
+    def __init__(self, path: Path, start: int, end: int, status_code: int, headers: dict, media_type: str, head: bool):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.end = end
+        self.head = head
+        self.headers["content-length"] = str(end - start + 1 if end >= start else 0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.head or self.end < self.start:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.wrapped.fileno(),
+                    "offset": self.start,
+                    "count": remaining,
+                    "more_body": False
+                })
+                return
+            await f.seek(self.start)
+            while remaining > 0:
+                chunk = await f.read(min(FILE_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+async def serve_file(request: Request, path: Path, cache_control: str = IMMUTABLE_CACHE_CONTROL) -> Response:
+    """Serve a stored file with a strong ETag, 304s and single byte ranges."""
+    try:
+        stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+    size = stat_result.st_size
+    etag = file_etag(path, stat_result)
+    headers = {"etag": etag, "cache-control": cache_control, "accept-ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+    if UPLOADS_X_ACCEL_PREFIX and path.is_relative_to(UPLOADS_ROOT):
+        headers["x-accel-redirect"] = UPLOADS_X_ACCEL_PREFIX.rstrip("/") + "/" + str(path.relative_to(UPLOADS_ROOT))
+        return Response(headers=headers, media_type=media_type)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # A stale If-Range validator means the client's partial copy is outdated: send it all
+    if if_range is None or if_range.strip() == etag:
+        byte_range = parse_range(request.headers.get("range"), size)
+
+    head = request.method == "HEAD"
+    if byte_range is None:
+        return RangeFileResponse(path, 0, size - 1, status.HTTP_200_OK, headers, media_type, head)
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return RangeFileResponse(path, start, end, status.HTTP_206_PARTIAL_CONTENT, headers, media_type, head)
+
+def resolve_upload_path(file_path: str) -> Path:
+    """Absolute path of a stored upload path ("uploads/..."), refusing anything outside /app/uploads."""
+    path = (APP_ROOT / file_path).resolve()
+    if not path.is_relative_to(UPLOADS_ROOT.resolve()):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return path
+
+def file_signature(file_path: str, expires: int) -> str:
+    message = f"{file_path}:{expires}".encode()
+    return hmac.new(FILE_URL_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+def sign_file_path(file_path: str, ttl_seconds: int = FILE_URL_TTL_SECONDS) -> Tuple[int, str]:
+    expires = int(time.time()) + ttl_seconds
+    return expires, file_signature(file_path, expires)
+
+def verify_file_signature(file_path: str, expires: int, signature: str):
+    if expires < time.time() or not hmac.compare_digest(file_signature(file_path, expires), signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="File link is invalid or has expired")
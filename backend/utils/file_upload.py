@@ -1,8 +1,10 @@
+import asyncio
+import hashlib
 import os
 import uuid
 from pathlib import Path
 from fastapi import UploadFile, HTTPException
-from typing import List
+from typing import List, Optional, Union
 
 # Directory for storing uploaded documents
 UPLOAD_DIR = Path("/app/uploads")
@@ -12,6 +14,15 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.pdf'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
+# Byte limits per kind of upload, enforced while streaming (file.size may be missing)
+UPLOAD_MAX_BYTES = {
+    "id_document": MAX_FILE_SIZE,
+    "profile_photo": int(os.environ.get("UPLOAD_MAX_PHOTO_BYTES", str(10 * 1024 * 1024))),
+    "strain_image": int(os.environ.get("UPLOAD_MAX_IMAGE_BYTES", str(10 * 1024 * 1024))),
+    "deal_video": int(os.environ.get("UPLOAD_MAX_VIDEO_BYTES", str(500 * 1024 * 1024)))
+}
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
 def validate_file(file: UploadFile) -> bool:
     """Validate uploaded file type and size."""
     if not file.filename:
@@ -23,47 +34,85 @@ def validate_file(file: UploadFile) -> bool:
         return False
     
     # Check file size (if available)
-    if hasattr(file, 'size') and file.size > MAX_FILE_SIZE:
+    if getattr(file, 'size', None) is not None and file.size > MAX_FILE_SIZE:
         return False
     
     return True
 
-async def save_uploaded_file(file: UploadFile, folder: str) -> str:
-    """Save uploaded file and return the file path."""
+def _write_chunk(handle, digest, chunk: bytes):
+    # hashlib releases the GIL on large buffers, so hashing and writing both run off-loop
+    digest.update(chunk)
+    handle.write(chunk)
+
+def _finish_file(handle, temp_path: Path, destination: Path):
+    handle.flush()
+    os.fsync(handle.fileno())
+    handle.close()
+    os.replace(temp_path, destination)
+
+async def stream_upload(file: UploadFile, destination: Union[str, Path], kind: str) -> dict:
+    """Stream an upload to destination in chunks, off the event loop.
+
+    Writes to a temp file next to destination, rejects the upload with 413 as soon as it
+    passes UPLOAD_MAX_BYTES[kind], hashes it as it goes and renames it into place, so a
+    partial file is never visible. Returns {"path", "size", "sha256"}.
+    """
+    max_bytes = UPLOAD_MAX_BYTES[kind]
+    destination = Path(destination)
+    await asyncio.to_thread(destination.parent.mkdir, parents=True, exist_ok=True)
+    temp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    
+    handle = await asyncio.to_thread(open, temp_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size is {max_bytes // (1024 * 1024)}MB"
+                )
+            await asyncio.to_thread(_write_chunk, handle, digest, chunk)
+        await asyncio.to_thread(_finish_file, handle, temp_path, destination)
+    except BaseException:
+        handle.close()
+        await asyncio.to_thread(temp_path.unlink, missing_ok=True)
+        raise
+    
+    return {"path": str(destination), "size": size, "sha256": digest.hexdigest()}
+
+async def save_uploaded_file(file: UploadFile) -> str:
+    """Save an uploaded ID document to the private blob store and return its path."""
     if not validate_file(file):
         raise HTTPException(
             status_code=400,
             detail="Invalid file type or size. Allowed: JPG, PNG, PDF up to 5MB"
         )
     
-    # Create unique filename
-    file_ext = Path(file.filename).suffix.lower()
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    
-    # Create folder path
-    folder_path = UPLOAD_DIR / folder
-    folder_path.mkdir(exist_ok=True)
-    
-    # Save file
-    file_path = folder_path / unique_filename
-    
+    from utils.blob_store import private_blob_store
     try:
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        stored = await private_blob_store.put(file, "id_document")
         
         # Return relative path for database storage
-        return f"uploads/{folder}/{unique_filename}"
+        return stored["path"]
     
+    except HTTPException:
+        raise
     except Exception as e:
-        # Clean up file if save failed
-        if file_path.exists():
-            file_path.unlink()
         raise HTTPException(
             status_code=500,
             detail=f"Failed to save file: {str(e)}"
         )
 
+async def release_uploaded_file(file_path: Optional[str]):
+    """Give back the reference save_uploaded_file took, when its document is never written."""
+    from utils.blob_store import private_blob_store, blob_key_from_url
+    await private_blob_store.release(blob_key_from_url(file_path))
+
 def delete_file(file_path: str) -> bool:
     """Delete uploaded file."""
     try:
@@ -76,6 +125,7 @@ def delete_file(file_path: str) -> bool:
         return False
 
 def get_file_url(file_path: str) -> str:
-    """Generate URL for accessing uploaded file."""
-    # In production, you'd want to serve these through a secure endpoint
-    return f"/api/files/{file_path}"
\ No newline at end of file
+    """Generate a signed, expiring URL for a stored upload (served by routes/files.py)."""
+    from utils.file_serving import sign_file_path
+    expires, signature = sign_file_path(file_path)
+    return f"/api/files/{file_path}?expires={expires}&signature={signature}"
\ No newline at end of file
@@ -0,0 +1,217 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+from utils.auth import ACCESS_TOKEN_EXPIRE_MINUTES
+from utils.cart_store import CART_TTL_SECONDS
+from utils.database import db
+from utils.pickup_codes import PICKUP_CODE_RECYCLE_AFTER_SECONDS, PICKUP_CODE_RESERVATION_SECONDS
+
+# Every index the app relies on, per collection. Startup builds these in the background
+# and GET /admin/indexes reports drift against them; tests/test_index_coverage.py checks
+# that each query in routes/ and utils/ can use one. Add the index here when adding a
+# query on a new field, and keep options in sync (Mongo won't change them in place).
+INDEX_REGISTRY: Dict[str, List[dict]] = {
+    "users": [
+        {"keys": [("email", ASCENDING)], "unique": True}
+    ],
+    "admins": [
+        {"keys": [("email", ASCENDING)], "unique": True}
+    ],
+    "products": [
+        {"keys": [("category", ASCENDING)]},
+        {"keys": [("vendor", ASCENDING)]},
+        # Admin top-rated list
+        {"keys": [("rating_count", DESCENDING), ("_id", ASCENDING)]}
+    ],
+    "daily_deals": [
+        {"keys": [("id", ASCENDING)]},
+        {"keys": [("product_id", ASCENDING)]},
+        {"keys": [("valid_until", ASCENDING)]},
+        # Active deals and expired-deal cleanup
+        {"keys": [("expires_at", ASCENDING)]},
+        # Admin deal list, newest first
+        {"keys": [("created_at", DESCENDING)]}
+    ],
+    "wictionary": [
+        {"keys": [("id", ASCENDING)]},
+        {"keys": [("term", ASCENDING)]},
+        {"keys": [("category", ASCENDING)]}
+    ],
+    "transactions": [
+        {"keys": [("payment_code", ASCENDING)], "unique": True},
+        {"keys": [("user_id", ASCENDING)]},
+        {"keys": [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]},
+        # Profile history and wallet payments, newest first
+        {"keys": [("user_email", ASCENDING), ("created_at", DESCENDING)]},
+        {"keys": [("created_at", DESCENDING)]},
+        # Square payment webhooks
+        {"keys": [("square_payment_id", ASCENDING)]}
+    ],
+    "orders": [
+        {"keys": [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]}
+    ],
+    "ratings": [
+        {"keys": [("product_id", ASCENDING), ("user_id", ASCENDING)], "unique": True},
+        {"keys": [("product_id", ASCENDING)]},
+        {"keys": [("user_id", ASCENDING)]},
+        {"keys": [("product_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]}
+    ],
+    "square_transactions": [
+        # Daily report line items, paged by created_at
+        {"keys": [("payment_method", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]}
+    ],
+    "square_orders": [
+        {"keys": [("user_email", ASCENDING), ("created_at", DESCENDING)]},
+        {"keys": [("square_payment_id", ASCENDING)]},
+        {"keys": [("created_at", DESCENDING)]}
+    ],
+    "prepaid_orders": [
+        {"keys": [("pickup_code", ASCENDING)]},
+        {"keys": [("status", ASCENDING)]},
+        {"keys": [("created_at", DESCENDING)]}
+    ],
+    "cash_pickup_orders": [
+        {"keys": [("pickup_code", ASCENDING)]},
+        {"keys": [("status", ASCENDING)]},
+        {"keys": [("created_at", DESCENDING)]}
+    ],
+    "cash_pickups": [
+        {"keys": [("pickup_code", ASCENDING)]}
+    ],
+    "payment_transactions": [
+        {"keys": [("session_id", ASCENDING)]}
+    ],
+    "strains": [
+        {"keys": [("id", ASCENDING)]},
+        {"keys": [("category", ASCENDING), ("name", ASCENDING)]},
+        {"keys": [("name", ASCENDING)]}
+    ],
+    "delivery_signups": [
+        {"keys": [("email", ASCENDING)]}
+    ],
+    "daily_reports": [
+        {"keys": [("report_id", ASCENDING)]},
+        {"keys": [("report_date", DESCENDING)]}
+    ],
+    "sales_rollups": [
+        {"keys": [("granularity", ASCENDING), ("channel", ASCENDING), ("bucket", ASCENDING), ("status", ASCENDING)], "unique": True}
+    ],
+    "blobs": [
+        # Garbage collection of unreferenced blobs
+        {"keys": [("refcount", ASCENDING), ("zero_since", ASCENDING)]}
+    ],
+    "private_blobs": [
+        {"keys": [("refcount", ASCENDING), ("zero_since", ASCENDING)]}
+    ],
+    "token_revocations": [
+        # Revocations only matter while tokens issued before them can still be valid
+        {"keys": [("revoked_at", ASCENDING)], "expireAfterSeconds": ACCESS_TOKEN_EXPIRE_MINUTES * 60}
+    ],
+    "pickup_codes": [
+        # Picked-up codes are deleted (and so recycled) after PICKUP_CODE_RECYCLE_AFTER_SECONDS
+        {"keys": [("released_at", ASCENDING)], "expireAfterSeconds": PICKUP_CODE_RECYCLE_AFTER_SECONDS},
+        # Codes whose order never finishes are freed PICKUP_CODE_RESERVATION_SECONDS after allocation
+        {"keys": [("allocated_at", ASCENDING)], "expireAfterSeconds": PICKUP_CODE_RESERVATION_SECONDS}
+    ],
+    "carts": [
+        # Abandoned carts expire after CART_TTL_SECONDS of inactivity
+        {"keys": [("updated_at", ASCENDING)], "expireAfterSeconds": CART_TTL_SECONDS}
+    ]
+}
+
+# Options compared when reporting drift
+INDEX_OPTIONS = ("unique", "expireAfterSeconds")
+
+# Last background build, for GET /admin/indexes
+index_build_status = {"state": "not_started", "started_at": None, "finished_at": None, "errors": {}}
+_index_build_task: Optional[asyncio.Task] = None
+
+def index_model(spec: dict) -> IndexModel:
+    return IndexModel(spec["keys"], **{option: spec[option] for option in INDEX_OPTIONS if option in spec})
+
+def index_signature(keys: Iterable, options: dict) -> dict:
+    """Comparable form of an index: key list plus the options we manage."""
+    return {
+        "keys": [[field, int(direction)] if isinstance(direction, (int, float)) else [field, direction] for field, direction in keys],
+        **{option: options[option] for option in INDEX_OPTIONS if options.get(option) not in (None, False)}
+    }
+
+def index_supports(collection: str, fields: Iterable[str]) -> bool:
+    """True when a registry index (or _id) can drive a query filtering or sorting on fields."""
+    fields = set(fields)
+    if "_id" in fields:
+        return True
+    return any(spec["keys"][0][0] in fields for spec in INDEX_REGISTRY.get(collection, []))
+
+async def build_collection_indexes(name: str, specs: List[dict]):
+    await db[name].create_indexes([index_model(spec) for spec in specs])
+
+async def ensure_indexes() -> dict:
+    """Create every registry index; collections build concurrently, failures are per collection."""
+    index_build_status.update(state="building", started_at=datetime.utcnow(), finished_at=None, errors={})
+    names = list(INDEX_REGISTRY)
+    results = await asyncio.gather(
+        *[build_collection_indexes(name, INDEX_REGISTRY[name]) for name in names],
+        return_exceptions=True
+    )
+    errors = {name: str(result) for name, result in zip(names, results) if isinstance(result, Exception)}
+    index_build_status.update(
+        state="failed" if errors else "done",
+        finished_at=datetime.utcnow(),
+        errors=errors
+    )
+    return index_build_status
+
+async def _build_and_verify():
+    try:
+        await ensure_indexes()
+        for name, error in index_build_status["errors"].items():
+            print(f"Error building indexes on {name}: {error}")
+        drift = await index_drift()
+        if not drift["in_sync"]:
+            print(f"Index drift: {drift['collections']}")
+    except Exception as e:
+        index_build_status.update(state="failed", finished_at=datetime.utcnow())
+        print(f"Error building indexes: {str(e)}")
+
+def start_index_build() -> asyncio.Task:
+    """Build and verify indexes in the background so startup doesn't wait on them."""
+    global _index_build_task
+    if _index_build_task is None or _index_build_task.done():
+        index_build_status.update(state="pending", errors={})
+        _index_build_task = asyncio.create_task(_build_and_verify())
+    return _index_build_task
+
+async def index_drift() -> dict:
+    """Missing, extra and option-mismatched indexes per collection, compared with INDEX_REGISTRY."""
+    existing_names = set(await db.list_collection_names())
+    report = {}
+    for name in sorted(existing_names | set(INDEX_REGISTRY)):
+        expected = [index_signature(spec["keys"], spec) for spec in INDEX_REGISTRY.get(name, [])]
+        actual = []
+        if name in existing_names:
+            try:
+                async for index in db[name].list_indexes():
+                    if index["name"] != "_id_":
+                        actual.append(index_signature(index["key"].items(), index))
+            except PyMongoError as e:
+                report[name] = {"error": str(e)}
+                continue
+
+        expected_keys = [index["keys"] for index in expected]
+        actual_keys = [index["keys"] for index in actual]
+        missing = [index for index in expected if index["keys"] not in actual_keys]
+        extra = [index for index in actual if index["keys"] not in expected_keys]
+        mismatched = [
+            {"expected": index, "actual": actual[actual_keys.index(index["keys"])]}
+            for index in expected
+            if index["keys"] in actual_keys and actual[actual_keys.index(index["keys"])] != index
+        ]
+        if missing or extra or mismatched:
+            report[name] = {"missing": missing, "extra": extra, "mismatched": mismatched}
+
+    return {"in_sync": not report, "collections": report, "build": index_build_status}
@@ -0,0 +1,134 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from utils.database import db, users_collection, member_stats_collection
+
+# member_stats holds one document per member, keyed by the string form of users._id:
+#   {"_id": "<user id>", "order_count": int, "total_spent": float, "last_order": datetime, "updated_at": datetime}
+#
+# Purchases are counted once each: every payment path writes a transaction (prepaid
+# orders are the pickup side of a Square or wallet transaction), while cash pickups have
+# no transaction and are counted when the cash is collected.
+
+def _naive_utc(value) -> Optional[datetime]:
+    """Normalize stored timestamps (naive UTC, aware, or ISO strings) for $max comparisons."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value if isinstance(value, datetime) else None
+
+async def resolve_member_id(user_id=None, user_email: Optional[str] = None) -> Optional[str]:
+    """Return the member_stats key for a user given its id (ObjectId or string) or email."""
+    if user_id is not None and ObjectId.is_valid(str(user_id)):
+        return str(user_id)
+    if user_email:
+        user = await users_collection.find_one({"email": user_email}, {"_id": 1})
+        if user:
+            return str(user["_id"])
+    return None
+
+async def record_member_order(user_id=None, amount: float = 0, ordered_at=None, user_email: Optional[str] = None):
+    """Fold one purchase into the member's stats document.
+
+    Called from payment paths, so a stats failure is logged and never fails the purchase.
+    """
+    try:
+        member_id = await resolve_member_id(user_id, user_email)
+        if not member_id:
+            return
+        await member_stats_collection.update_one(
+            {"_id": member_id},
+            {
+                "$inc": {"order_count": 1, "total_spent": float(amount or 0)},
+                "$max": {"last_order": _naive_utc(ordered_at) or datetime.utcnow()},
+                "$set": {"updated_at": datetime.utcnow()}
+            },
+            upsert=True
+        )
+    except Exception as e:
+        print(f"Error updating member stats: {str(e)}")
+
+async def get_member_stats_map(user_ids: Iterable) -> Dict[str, dict]:
+    """Fetch stats for a page of members with one $in query, keyed by user id string."""
+    member_ids = list({str(user_id) for user_id in user_ids})
+    if not member_ids:
+        return {}
+    stats_cursor = member_stats_collection.find({"_id": {"$in": member_ids}})
+    return {stats["_id"]: stats for stats in await stats_cursor.to_list(length=len(member_ids))}
+
+async def backfill_member_stats() -> int:
+    """Rebuild member_stats from transactions and completed cash pickups.
+
+    Overwrites existing documents, so run it while payments are quiet. Returns the
+    number of members written.
+    """
+    totals: Dict[str, dict] = {}
+
+    def fold(member_id: str, order_count: int, total_spent: float, last_order):
+        entry = totals.setdefault(member_id, {"order_count": 0, "total_spent": 0.0, "last_order": None})
+        entry["order_count"] += order_count
+        entry["total_spent"] += total_spent or 0.0
+        last_order = _naive_utc(last_order)
+        if last_order and (entry["last_order"] is None or last_order > entry["last_order"]):
+            entry["last_order"] = last_order
+
+    # Transactions store user_id as an ObjectId (in-app) or a string (Square, wallets),
+    # and the amount as total (in-app, Square) or amount (wallets). Square payments
+    # still pending are counted when the webhook reports them completed.
+    transaction_pipeline = [
+        {"$match": {"user_id": {"$ne": None}, "$nor": [{"payment_method": "square", "status": "pending"}]}},
+        {"$group": {
+            "_id": {"$toString": "$user_id"},
+            "order_count": {"$sum": 1},
+            "total_spent": {"$sum": {"$ifNull": ["$total", "$amount"]}},
+            "last_order": {"$max": "$created_at"}
+        }}
+    ]
+    async for row in db.transactions.aggregate(transaction_pipeline):
+        if ObjectId.is_valid(row["_id"]):
+            fold(row["_id"], row["order_count"], row["total_spent"], row["last_order"])
+
+    # Cash pickups only carry a reliable email
+    pickup_pipeline = [
+        {"$match": {"status": "completed"}},
+        {"$group": {
+            "_id": "$user_email",
+            "order_count": {"$sum": 1},
+            "total_spent": {"$sum": "$total_amount"},
+            "last_order": {"$max": "$created_at"}
+        }}
+    ]
+    pickup_rows = await db.cash_pickup_orders.aggregate(pickup_pipeline).to_list(length=None)
+    emails = [row["_id"] for row in pickup_rows if row["_id"]]
+    if emails:
+        users_cursor = users_collection.find({"email": {"$in": emails}}, {"email": 1})
+        ids_by_email = {user["email"]: str(user["_id"]) for user in await users_cursor.to_list(length=None)}
+        for row in pickup_rows:
+            member_id = ids_by_email.get(row["_id"])
+            if member_id:
+                fold(member_id, row["order_count"], row["total_spent"], row["last_order"])
+
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"_id": member_id},
+            {"$set": {
+                "order_count": entry["order_count"],
+                "total_spent": round(entry["total_spent"], 2),
+                "last_order": entry["last_order"],
+                "updated_at": now
+            }},
+            upsert=True
+        )
+        for member_id, entry in totals.items()
+    ]
+    if operations:
+        await member_stats_collection.bulk_write(operations, ordered=False)
+    return len(operations)
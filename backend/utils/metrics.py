@@ -0,0 +1,209 @@
+import contextvars
+import os
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+# Requests issuing more Mongo commands than this are logged as likely N+1 loops
+METRICS_QUERY_WARN_THRESHOLD = int(os.environ.get("METRICS_QUERY_WARN_THRESHOLD", "50"))
+# When set, GET /api/metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_COMMAND_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+# Unmatched paths share one label so scanners can't blow up the series count
+UNMATCHED_ROUTE = "unmatched"
+
+class RequestDbStats:
+    """Mongo commands issued on behalf of one request."""
+    __slots__ = ("commands", "db_seconds")
+
+    def __init__(self):
+        self.commands = 0
+        self.db_seconds = 0.0
+
+# Motor runs pymongo calls on its executor inside a copy of the caller's context,
+# so the listener sees the stats object of the request that issued the command.
+current_request_db_stats: contextvars.ContextVar[Optional[RequestDbStats]] = contextvars.ContextVar(
+    "current_request_db_stats", default=None
+)
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = [str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for value in values]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self, kind: str = "counter") -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {kind}"]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+class Gauge(Counter):
+    def dec(self, *label_values: str, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def render(self, kind: str = "gauge") -> list:
+        return super().render(kind)
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self.values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        series[1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        label_names = self.labels + ("le",)
+        for label_values, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{format_labels(label_names, label_values + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, label_values)} {total:g}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Process-wide request and Mongo metrics, rendered in the Prometheus text format.
+
+    Updated from the event loop (middleware) and Motor's executor threads (command
+    listener), so every update takes the lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter("http_requests_total", "HTTP responses by route and status code.", ("method", "route", "status"))
+        self.latency = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"), LATENCY_BUCKETS)
+        self.in_progress = Gauge("http_requests_in_progress", "HTTP requests currently being served.", ("method",))
+        self.request_db_commands = Histogram(
+            "http_request_db_commands", "Mongo commands issued per HTTP request.", ("method", "route"), DB_COMMAND_BUCKETS
+        )
+        self.request_db_seconds = Histogram(
+            "http_request_db_seconds", "Time spent in Mongo per HTTP request.", ("method", "route"), LATENCY_BUCKETS
+        )
+        self.db_commands = Counter("mongo_commands_total", "Mongo commands by command name and outcome.", ("command", "outcome"))
+        self.db_seconds = Counter("mongo_command_seconds_total", "Time spent in Mongo commands by command name.", ("command",))
+
+    def request_started(self, method: str):
+        with self.lock:
+            self.in_progress.inc(method)
+
+    def request_finished(self, method: str, route: str, status_code: int, seconds: float, db_stats: RequestDbStats):
+        with self.lock:
+            self.in_progress.dec(method)
+            self.requests.inc(method, route, str(status_code))
+            self.latency.observe(seconds, method, route)
+            self.request_db_commands.observe(db_stats.commands, method, route)
+            self.request_db_seconds.observe(db_stats.db_seconds, method, route)
+
+    def command_finished(self, command: str, seconds: float, succeeded: bool):
+        with self.lock:
+            self.db_commands.inc(command, "success" if succeeded else "failure")
+            self.db_seconds.inc(command, amount=seconds)
+
+    def render(self) -> str:
+        with self.lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.in_progress, self.request_db_commands,
+                           self.request_db_seconds, self.db_commands, self.db_seconds):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Shared per-process metrics
+metrics = MetricsRegistry()
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts Mongo commands and their time, globally and against the current request."""
+
+    def started(self, event):
+        pass
+
+    def _finished(self, event, succeeded: bool):
+        seconds = event.duration_micros / 1_000_000
+        metrics.command_finished(event.command_name, seconds, succeeded)
+        stats = current_request_db_stats.get()
+        if stats is not None:
+            stats.commands += 1
+            stats.db_seconds += seconds
+
+    def succeeded(self, event):
+        self._finished(event, True)
+
+    def failed(self, event):
+        self._finished(event, False)
+
+# Registered on the Motor client in utils/database.py
+mongo_command_listener = MongoCommandListener()
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and Mongo usage per route template.
+
+    Each response carries its Mongo command count and DB time in a Server-Timing
+    header, which shows up in browser dev tools.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        db_stats = RequestDbStats()
+        token = current_request_db_stats.set(db_stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                server_timing = f'db;dur={db_stats.db_seconds * 1000:.1f};desc="{db_stats.commands} commands"'
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", server_timing.encode())]}
+            await send(message)
+
+        metrics.request_started(method)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            seconds = time.perf_counter() - started
+            current_request_db_stats.reset(token)
+            # FastAPI records the matched route on the scope; label by its template, not the raw path
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            metrics.request_finished(method, route, status_code, seconds, db_stats)
+            if db_stats.commands > METRICS_QUERY_WARN_THRESHOLD:
+                print(f"{method} {route} issued {db_stats.commands} Mongo commands ({db_stats.db_seconds * 1000:.0f} ms)")
@@ -0,0 +1,88 @@
+import base64
+import binascii
+from typing import Any, List, Optional, Tuple
+
+from bson import json_util
+from fastapi import HTTPException, Response, status
+
+# Response header carrying the opaque cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_value: Any, last_id: Any) -> str:
+    """Encode the (sort key, _id) of the last row on a page as an opaque cursor."""
+    raw = json_util.dumps([sort_value, last_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, last_id = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return sort_value, last_id
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def keyset_sort(sort_field: str, direction: int = -1) -> List[Tuple[str, int]]:
+    """Sort spec for a keyset page; _id breaks ties so the order is total."""
+    return [(sort_field, direction), ("_id", direction)]
+
+def keyset_filter(query: dict, sort_field: str, cursor: Optional[str], direction: int = -1) -> dict:
+    """Extend query so it only matches rows after the cursor position.
+
+    Rows missing sort_field (e.g. orders from before created_at was stored) sort as
+    null, below every value: last in a descending page, first in an ascending one.
+    Range operators never match null, so those rows get their own branches.
+    """
+    if not cursor:
+        return query
+
+    sort_value, last_id = decode_cursor(cursor)
+    op = "$lt" if direction < 0 else "$gt"
+    if sort_value is None:
+        branches = [{sort_field: None, "_id": {op: last_id}}]
+        if direction > 0:
+            branches.append({sort_field: {"$ne": None}})
+    else:
+        branches = [
+            {sort_field: {op: sort_value}},
+            {sort_field: sort_value, "_id": {op: last_id}}
+        ]
+        if direction < 0:
+            branches.append({sort_field: None})
+    after_cursor = {"$or": branches}
+    return {"$and": [query, after_cursor]} if query else after_cursor
+
+async def fetch_keyset_page(
+    collection,
+    query: dict,
+    sort_field: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    direction: int = -1
+) -> Tuple[List[dict], Optional[str]]:
+    """Fetch one page ordered by (sort_field, _id) and the cursor for the page after it.
+
+    When a cursor is given, skip is ignored; skip is kept for older clients only.
+    """
+    find_query = keyset_filter(query, sort_field, cursor, direction)
+    find_cursor = collection.find(find_query).sort(keyset_sort(sort_field, direction))
+    if not cursor and skip:
+        find_cursor = find_cursor.skip(skip)
+
+    # One extra row tells us whether another page exists
+    rows = await find_cursor.limit(limit + 1).to_list(length=limit + 1)
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.get(sort_field), last["_id"])
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    """Expose the next-page cursor without changing list response bodies."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,183 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import bcrypt
+
+# Password hashing scheme for new hashes: "bcrypt" or "pbkdf2_sha256". Stored hashes in
+# another scheme (or with a lower work factor) still verify and are rehashed on next login.
+PASSWORD_HASH_SCHEME = os.environ.get("PASSWORD_HASH_SCHEME", "bcrypt")
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get("PASSWORD_BCRYPT_ROUNDS", "12"))
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("PASSWORD_PBKDF2_ITERATIONS", "600000"))
+# KDF calls running at once; more logins wait their turn instead of starving the event loop
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "4"))
+
+# Hashes written before the KDF: hex SHA-256 of password + PASSWORD_SALT
+LEGACY_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+BCRYPT_PATTERN = re.compile(r"^\$2[aby]\$(\d{2})\$")
+PBKDF2_PREFIX = "$pbkdf2-sha256$"
+# bcrypt only uses the first 72 bytes; newer bcrypt releases raise instead of truncating
+BCRYPT_MAX_BYTES = 72
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode().rstrip("=")
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+def legacy_hash(password: str) -> str:
+    salt = os.environ.get('PASSWORD_SALT', 'statusxsmoakland_salt_2024')
+    return hashlib.sha256((password + salt).encode()).hexdigest()
+
+def is_legacy_hash(hashed_password: Optional[str]) -> bool:
+    return bool(hashed_password) and LEGACY_HASH_PATTERN.match(hashed_password) is not None
+
+def hash_password(password: str) -> str:
+    """Hash a password with the configured KDF (blocking; async code uses password_hasher)."""
+    if PASSWORD_HASH_SCHEME == "pbkdf2_sha256":
+        salt = os.urandom(16)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PASSWORD_PBKDF2_ITERATIONS)
+        return f"{PBKDF2_PREFIX}{PASSWORD_PBKDF2_ITERATIONS}${_b64(salt)}${_b64(digest)}"
+    if PASSWORD_HASH_SCHEME != "bcrypt":
+        raise ValueError(f"Unknown PASSWORD_HASH_SCHEME: {PASSWORD_HASH_SCHEME}")
+    return bcrypt.hashpw(password.encode()[:BCRYPT_MAX_BYTES], bcrypt.gensalt(PASSWORD_BCRYPT_ROUNDS)).decode()
+
+def verify_password(password: str, hashed_password: Optional[str]) -> bool:
+    """Check a password against a bcrypt, pbkdf2_sha256 or legacy SHA-256 hash (blocking)."""
+    if not hashed_password:
+        return False
+    if is_legacy_hash(hashed_password):
+        return hmac.compare_digest(legacy_hash(password), hashed_password)
+    if BCRYPT_PATTERN.match(hashed_password):
+        try:
+            return bcrypt.checkpw(password.encode()[:BCRYPT_MAX_BYTES], hashed_password.encode())
+        except ValueError:
+            return False
+    if hashed_password.startswith(PBKDF2_PREFIX):
+        try:
+            iterations, salt, digest = hashed_password[len(PBKDF2_PREFIX):].split("$")
+            computed = hashlib.pbkdf2_hmac("sha256", password.encode(), _unb64(salt), int(iterations))
+        except ValueError:
+            return False
+        return hmac.compare_digest(computed, _unb64(digest))
+    return False
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the hash is legacy, another scheme, or below the configured work factor."""
+    if PASSWORD_HASH_SCHEME == "bcrypt":
+        match = BCRYPT_PATTERN.match(hashed_password)
+        return match is None or int(match.group(1)) < PASSWORD_BCRYPT_ROUNDS
+    if hashed_password.startswith(PBKDF2_PREFIX):
+        iterations = hashed_password[len(PBKDF2_PREFIX):].split("$", 1)[0]
+        return not iterations.isdigit() or int(iterations) < PASSWORD_PBKDF2_ITERATIONS
+    return True
+
+class PasswordHasher:
+    """Runs the KDF on a bounded thread pool so logins don't block the event loop.
+
+    bcrypt and hashlib.pbkdf2_hmac release the GIL, so threads give real parallelism.
+    Calls past PASSWORD_HASH_WORKERS wait on a semaphore; stats() reports how long
+    they waited and how long the KDF itself took.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = asyncio.Semaphore(workers)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rehashed = 0
+        self._metrics = {}
+
+    def _record(self, operation: str, wait_ms: float, run_ms: float):
+        metric = self._metrics.setdefault(operation, {"calls": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0})
+        metric["calls"] += 1
+        metric["total_wait_ms"] += wait_ms
+        metric["max_wait_ms"] = max(metric["max_wait_ms"], wait_ms)
+        metric["total_ms"] += run_ms
+        metric["max_ms"] = max(metric["max_ms"], run_ms)
+        metric["last_ms"] = run_ms
+
+    async def _run(self, operation: str, func, *args):
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            self._record(operation, (started - queued_at) * 1000, (time.perf_counter() - started) * 1000)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Returns (matches, new_hash); new_hash is set when the stored hash should be replaced.
+
+        Legacy SHA-256 hashes are cheap to check, so they skip the pool; a match is then
+        rehashed with the configured KDF.
+        """
+        if is_legacy_hash(hashed_password):
+            started = time.perf_counter()
+            matches = verify_password(password, hashed_password)
+            self._record("verify_legacy", 0.0, (time.perf_counter() - started) * 1000)
+        else:
+            matches = await self._run("verify", verify_password, password, hashed_password)
+        if not matches or not needs_rehash(hashed_password):
+            return matches, None
+        return True, await self.hash(password)
+
+    async def rehash_stored(self, collection, document: dict, field: str, new_hash: Optional[str]):
+        """Persist a rehash, unless the stored hash changed since document was read."""
+        if not new_hash:
+            return
+        try:
+            result = await collection.update_one(
+                {"_id": document["_id"], field: document.get(field)},
+                {"$set": {field: new_hash}}
+            )
+            self.rehashed += result.modified_count
+        except Exception as e:
+            print(f"Error storing rehashed password: {str(e)}")
+
+    def stats(self) -> dict:
+        """Per-operation KDF latency and queueing for the admin stats endpoint."""
+        operations = {}
+        for operation, metric in self._metrics.items():
+            calls = metric["calls"]
+            operations[operation] = {
+                "calls": calls,
+                "avg_ms": round(metric["total_ms"] / calls, 2),
+                "max_ms": round(metric["max_ms"], 2),
+                "last_ms": round(metric["last_ms"], 2),
+                "avg_wait_ms": round(metric["total_wait_ms"] / calls, 2),
+                "max_wait_ms": round(metric["max_wait_ms"], 2)
+            }
+        return {
+            "scheme": PASSWORD_HASH_SCHEME,
+            "bcrypt_rounds": PASSWORD_BCRYPT_ROUNDS,
+            "pbkdf2_iterations": PASSWORD_PBKDF2_ITERATIONS,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rehashed": self.rehashed,
+            "operations": operations
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+# Shared per-process hasher
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS)
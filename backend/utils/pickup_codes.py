@@ -0,0 +1,122 @@
+import os
+import random
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
+
+from utils.database import pickup_codes_collection
+
+# Every pickup/payment code is reserved in pickup_codes (_id = code), so the unique
+# _id index is the single source of truth for uniqueness across all channels:
+#   {"_id": "P312345", "channel": "square", "window": 3, "allocated_at": datetime,
+#    "released_at": datetime (once the order has been picked up, cancelled or failed)}
+#
+# Codes are [prefix] + window digit + random digits. The window digit rotates every
+# PICKUP_CODE_WINDOW_HOURS, so a fresh window starts with an empty code space; codes
+# released on pickup are deleted by a TTL index after PICKUP_CODE_RECYCLE_AFTER_SECONDS
+# and become available again when their window comes back around. Orders that are
+# never picked up (user cash pickups, abandoned payments) don't release their code;
+# a second TTL index frees those reservations PICKUP_CODE_RESERVATION_SECONDS after
+# allocation. A later holder of the code wins lookups (utils/pickup_state.py).
+PICKUP_CODE_WINDOW_HOURS = int(os.environ.get("PICKUP_CODE_WINDOW_HOURS", "24"))
+PICKUP_CODE_RECYCLE_AFTER_SECONDS = int(os.environ.get("PICKUP_CODE_RECYCLE_AFTER_SECONDS", str(60 * 60 * 24)))
+PICKUP_CODE_RESERVATION_SECONDS = int(os.environ.get("PICKUP_CODE_RESERVATION_SECONDS", str(60 * 60 * 24 * 14)))
+PICKUP_CODE_MAX_ATTEMPTS = int(os.environ.get("PICKUP_CODE_MAX_ATTEMPTS", "25"))
+
+# Staff type in-app codes on a numeric keypad, so codes stay 6 digits after the prefix
+WINDOW_COUNT = 10
+RANDOM_DIGITS = 5
+
+class PickupCodeAllocator:
+    """Insert-and-retry allocator: no read-before-write, collisions surface as DuplicateKeyError."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.allocations = 0
+        self.collisions = 0
+
+    @staticmethod
+    def current_window(now: Optional[float] = None) -> int:
+        hours = int((now if now is not None else time.time()) // 3600)
+        return (hours // PICKUP_CODE_WINDOW_HOURS) % WINDOW_COUNT
+
+    @staticmethod
+    def candidate(prefix: str, window: int) -> str:
+        return f"{prefix}{window}{random.randrange(10 ** RANDOM_DIGITS):0{RANDOM_DIGITS}d}"
+
+    async def allocate(self, channel: str, prefix: str = "") -> str:
+        """Reserve and return a new code for channel (e.g. prefix "P" for prepaid orders)."""
+        window = self.current_window()
+        for _ in range(PICKUP_CODE_MAX_ATTEMPTS):
+            code = self.candidate(prefix, window)
+            try:
+                await self.collection.insert_one({
+                    "_id": code,
+                    "channel": channel,
+                    "window": window,
+                    "allocated_at": datetime.utcnow()
+                })
+                self.allocations += 1
+                return code
+            except DuplicateKeyError:
+                self.collisions += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not allocate a pickup code, please try again"
+        )
+
+    async def reserve(self, code: str, channel: str):
+        """Reserve a caller-chosen code; raises 409 if it is already in use."""
+        try:
+            await self.collection.insert_one({
+                "_id": code,
+                "channel": channel,
+                "window": None,
+                "allocated_at": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Pickup code already in use"
+            )
+
+    async def release(self, code: str):
+        """Mark a code's order as finished (picked up, cancelled, failed); the TTL index frees it for reuse later."""
+        await self.collection.update_one(
+            {"_id": code, "released_at": {"$exists": False}},
+            {"$set": {"released_at": datetime.utcnow()}}
+        )
+
+    async def discard(self, code: str):
+        """Free a code immediately, for allocations whose order was never written."""
+        await self.collection.delete_one({"_id": code})
+
+    async def insert_with_code(self, collection, document: dict, field: str, channel: str, prefix: str = "") -> str:
+        """Allocate a code into document[field] and insert the document.
+
+        Source collections with their own unique code index (transactions.payment_code)
+        may still hold a recycled code from an old order; those inserts retry with a
+        fresh code.
+        """
+        for _ in range(PICKUP_CODE_MAX_ATTEMPTS):
+            code = await self.allocate(channel, prefix)
+            document[field] = code
+            try:
+                await collection.insert_one(document)
+                return code
+            except DuplicateKeyError as e:
+                if field not in str(e):
+                    await self.discard(code)
+                    raise
+                # Keep the reservation released so the old order's code isn't handed out again soon
+                await self.release(code)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not allocate a pickup code, please try again"
+        )
+
+# Shared allocator
+pickup_codes = PickupCodeAllocator(pickup_codes_collection)
@@ -0,0 +1,166 @@
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from utils.database import db, pickup_index_collection
+from utils.sales_rollups import sale_time
+
+# Source documents per bulk_write (and per customer lookup) in backfill_pickup_index
+PICKUP_BACKFILL_BATCH_SIZE = int(os.environ.get("PICKUP_BACKFILL_BATCH_SIZE", "1000"))
+
+# pickup_index holds one document per pickup/payment code, so the counter resolves
+# a code with a single _id read whichever channel issued it:
+#   {"_id": "P312345", "channel": "prepaid_orders", "source_id": str, "status": str,
+#    "amount": float, "customer_email": str, "customer_name": str,
+#    "items": [{"name": str, "quantity": int}], "created_at": as stored on the source,
+#    "held_since": naive UTC datetime (the source's created_at, normalized), "updated_at": datetime}
+# Write paths call index_pickup when they store a coded document and
+# update_pickup_status when they change its status. A Square/wallet payment writes
+# both a transaction and a prepaid order under the same code; the prepaid order is
+# written last and is the entry staff complete at the counter. Codes are recycled, so
+# an entry always belongs to the newest document holding its code.
+
+# channel (source collection) -> where its code, amount and status live
+PICKUP_CHANNELS = {
+    "transactions": {"code_field": "payment_code", "amount_fields": ("total", "amount"), "status_field": "status"},
+    "prepaid_orders": {"code_field": "pickup_code", "amount_fields": ("total_amount",), "status_field": "status"},
+    "cash_pickup_orders": {"code_field": "pickup_code", "amount_fields": ("total_amount",), "status_field": "status"},
+    "cash_pickups": {"code_field": "pickup_code", "amount_fields": ("total_amount",), "status_field": "status"},
+}
+
+def _status_value(status) -> Optional[str]:
+    # Enum members (TransactionStatus) are stored by value
+    return getattr(status, "value", status)
+
+def _item_summary(items: Optional[List[dict]]) -> List[dict]:
+    return [
+        {"name": item.get("product_name") or item.get("name"), "quantity": item.get("quantity", 1)}
+        for item in items or []
+        if isinstance(item, dict)
+    ]
+
+def pickup_entry(channel: str, document: dict, customer_email: Optional[str] = None, customer_name: Optional[str] = None) -> dict:
+    spec = PICKUP_CHANNELS[channel]
+    amount = next((document[field] for field in spec["amount_fields"] if document.get(field) is not None), None)
+    return {
+        "channel": channel,
+        "source_id": str(document.get("_id")),
+        "status": _status_value(document.get(spec["status_field"])),
+        "amount": float(amount) if amount is not None else None,
+        "customer_email": customer_email or document.get("user_email"),
+        "customer_name": customer_name or document.get("user_name"),
+        "items": _item_summary(document.get("items")),
+        "created_at": document.get("created_at"),
+        # created_at is a datetime or an ISO string depending on the channel; this compares across them
+        "held_since": sale_time(document) or datetime.min,
+        "updated_at": datetime.utcnow()
+    }
+
+async def index_pickup(channel: str, document: dict, customer_email: Optional[str] = None, customer_name: Optional[str] = None):
+    """Point the document's code at it in pickup_index.
+
+    Called right after the source insert, so a failure is logged and never fails the order.
+    """
+    code = document.get(PICKUP_CHANNELS[channel]["code_field"])
+    if not code:
+        return
+    try:
+        await pickup_index_collection.update_one(
+            {"_id": code},
+            {"$set": pickup_entry(channel, document, customer_email, customer_name)},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"Error updating pickup index: {str(e)}")
+
+async def update_pickup_status(code: str, channel: str, status):
+    """Mirror a status change; ignored if the code now belongs to another channel's document."""
+    try:
+        await pickup_index_collection.update_one(
+            {"_id": code, "channel": channel},
+            {"$set": {"status": _status_value(status), "updated_at": datetime.utcnow()}}
+        )
+    except Exception as e:
+        print(f"Error updating pickup index: {str(e)}")
+
+async def lookup_pickup(code: str) -> Optional[dict]:
+    """Resolve a code typed at the counter (case-insensitively for P-codes) in one indexed read."""
+    code = code.strip()
+    candidates = list(dict.fromkeys([code, code.upper()]))
+    entries = await pickup_index_collection.find({"_id": {"$in": candidates}}).to_list(length=len(candidates))
+    if not entries:
+        return None
+    # Prefer the exact code if both spellings are indexed
+    entry = next((entry for entry in entries if entry["_id"] == code), entries[0])
+    entry["code"] = entry.pop("_id")
+    return entry
+
+def _backfill_projection(channel: str) -> dict:
+    """Only the fields pickup_entry reads."""
+    spec = PICKUP_CHANNELS[channel]
+    fields = [spec["code_field"], spec["status_field"], *spec["amount_fields"],
+              "user_id", "user_email", "user_name", "created_at", "items.product_name", "items.name", "items.quantity"]
+    return {field: 1 for field in fields}
+
+async def _index_batch(channel: str, documents: List[dict]):
+    code_field = PICKUP_CHANNELS[channel]["code_field"]
+
+    # Transactions only carry user_id; load the batch's customers in one query
+    customers = {}
+    if channel == "transactions":
+        user_ids = list({ObjectId(str(doc["user_id"])) for doc in documents if ObjectId.is_valid(str(doc.get("user_id")))})
+        if user_ids:
+            async for user in db.users.find({"_id": {"$in": user_ids}}, {"email": 1, "full_name": 1}):
+                customers[str(user["_id"])] = user
+
+    operations = []
+    for document in documents:
+        customer = customers.get(str(document.get("user_id")), {})
+        entry = pickup_entry(channel, document, customer.get("email"), customer.get("full_name"))
+        # Only replace an entry held since no later than this document; when a newer
+        # holder is already indexed, the upsert's insert hits the _id and is dropped
+        operations.append(UpdateOne(
+            {"_id": document[code_field], "$or": [
+                {"held_since": {"$lte": entry["held_since"]}}, {"held_since": {"$exists": False}}
+            ]},
+            {"$set": entry},
+            upsert=True
+        ))
+    try:
+        await pickup_index_collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]) or e.details.get("writeConcernErrors"):
+            raise
+
+async def backfill_pickup_index(channels: Optional[List[str]] = None) -> int:
+    """Rebuild pickup_index from the source collections; returns the number of documents replayed.
+
+    Each code ends up on its newest holder across all channels (by held_since), whatever
+    order the channels are replayed in. On equal times the channel later in
+    PICKUP_CHANNELS wins, so a transaction and prepaid order written in the same
+    millisecond resolve to the prepaid order. Sources are streamed and written in
+    PICKUP_BACKFILL_BATCH_SIZE batches, so memory stays flat however large the
+    collections are.
+    """
+    indexed = 0
+    for channel in channels or PICKUP_CHANNELS:
+        code_field = PICKUP_CHANNELS[channel]["code_field"]
+        cursor = db[channel].find(
+            {code_field: {"$nin": [None, ""]}}, _backfill_projection(channel)
+        ).sort("created_at", 1).batch_size(PICKUP_BACKFILL_BATCH_SIZE)
+
+        batch = []
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) >= PICKUP_BACKFILL_BATCH_SIZE:
+                await _index_batch(channel, batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            await _index_batch(channel, batch)
+            indexed += len(batch)
+    return indexed
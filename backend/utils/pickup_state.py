@@ -0,0 +1,100 @@
+from typing import Optional
+
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+
+from utils.database import db
+from utils.pickup_codes import pickup_codes
+from utils.pickup_index import update_pickup_status
+from utils.sales_rollups import move_sale
+
+# Pickup state machine: an order can be completed once, from any status that is not
+# final. The status guard sits in the find_one_and_update filter, so when two tablets
+# complete the same code at once exactly one update matches and the other gets a 400.
+PICKUP_FLOWS = {
+    "transactions": {
+        "code_field": "payment_code",
+        "final_statuses": ("picked_up", "cash_paid_in_store", "cancelled"),
+        "not_found_detail": "Transaction not found with this payment code",
+    },
+    "prepaid_orders": {
+        "code_field": "pickup_code",
+        "final_statuses": ("picked_up",),
+        "not_found_detail": "Pre-paid pickup code not found",
+    },
+    "cash_pickup_orders": {
+        "code_field": "pickup_code",
+        "final_statuses": ("completed",),
+        "not_found_detail": "Pickup code not found",
+    },
+}
+
+def _status_value(value) -> Optional[str]:
+    # Enum members (TransactionStatus) are stored by value
+    return getattr(value, "value", value)
+
+# Newest first, so a recycled code resolves to its latest holder
+NEWEST_FIRST = [("created_at", -1), ("_id", -1)]
+
+async def find_pickup_order(channel: str, code: str, projection: Optional[dict] = None) -> Optional[dict]:
+    """The order a code refers to now: its open order, else its newest one.
+
+    Codes are recycled (utils/pickup_codes.py), so completed orders of earlier
+    holders can still carry the same code.
+    """
+    flow = PICKUP_FLOWS[channel]
+    collection = db[channel]
+    code_field = flow["code_field"]
+    order = await collection.find_one(
+        {code_field: code, "status": {"$nin": list(flow["final_statuses"])}}, projection, sort=NEWEST_FIRST
+    )
+    if order is None:
+        order = await collection.find_one({code_field: code}, projection, sort=NEWEST_FIRST)
+    return order
+
+async def complete_pickup(
+    channel: str,
+    code: str,
+    new_status,
+    update_fields: dict,
+    guard: Optional[dict] = None,
+    guard_detail: str = "Order cannot be completed"
+) -> dict:
+    """Move the order with this code to new_status in one conditional update.
+
+    guard adds extra filter conditions (e.g. payment_method); an order that exists
+    but fails them raises 400 with guard_detail. Returns the updated order. The
+    update itself returns the previous state, which the sales rollups need to move
+    the order out of its old status bucket.
+    """
+    flow = PICKUP_FLOWS[channel]
+    collection = db[channel]
+    code_field = flow["code_field"]
+    final_statuses = list(flow["final_statuses"])
+
+    fields = dict(update_fields)
+    fields["status"] = new_status
+    previous = await collection.find_one_and_update(
+        {code_field: code, "status": {"$nin": final_statuses}, **(guard or {})},
+        {"$set": fields},
+        sort=NEWEST_FIRST,
+        return_document=ReturnDocument.BEFORE
+    )
+
+    if previous is None:
+        # Only the losing side pays for a second read, to explain why
+        order = await collection.find_one({code_field: code}, {"status": 1}, sort=NEWEST_FIRST)
+        if order is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=flow["not_found_detail"])
+        current_status = _status_value(order.get("status"))
+        if current_status in final_statuses:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Order already {current_status.replace('_', ' ')}"
+            )
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=guard_detail)
+
+    await move_sale(channel, previous, new_status)
+    await update_pickup_status(code, channel, new_status)
+    await pickup_codes.release(code)
+    return {**previous, **fields}
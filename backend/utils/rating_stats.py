@@ -0,0 +1,135 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+from utils.database import ratings_collection, products_collection
+
+# Products carry running rating aggregates so reads never scan the ratings collection:
+#   rating_sum, rating_count, rating_histogram {"1": n, ..., "5": n}
+# plus the denormalized rating (average, 1 decimal) and reviews (count) the storefront shows.
+#
+# Products from before the aggregates existed have no rating_count. Every rating write
+# calls ensure_rating_stats before touching the ratings collection, so a product gets
+# its aggregates rebuilt before any $inc can land on it; the rebuild only writes to
+# products still without rating_count, and the $inc only to products with it. The
+# rebuild therefore never counts a rating that is also $inc'd.
+
+RATING_VALUES = (1, 2, 3, 4, 5)
+
+def empty_histogram() -> dict:
+    return {str(value): 0 for value in RATING_VALUES}
+
+def rating_average(rating_sum: float, rating_count: int) -> float:
+    return round(rating_sum / rating_count, 1) if rating_count > 0 else 0.0
+
+RATING_FIELDS = {"rating_sum": 1, "rating_count": 1, "rating_histogram": 1, "rating": 1, "reviews": 1}
+
+async def ensure_rating_stats(product_id, product: Optional[dict] = None):
+    """Rebuild a pre-aggregate product's rating stats; call before writing one of its ratings.
+
+    Pass the product document when it is already loaded to skip the read.
+    """
+    if product is None:
+        product = await products_collection.find_one({"_id": ObjectId(product_id)}, {"rating_count": 1})
+    if product is not None and "rating_count" not in product:
+        await repair_rating_stats(product_id, only_missing=True)
+
+async def apply_rating_change(product_id, added: Optional[int] = None, removed: Optional[int] = None) -> Optional[dict]:
+    """Fold one rating change into the product's aggregates with a single $inc.
+
+    Pass added for a new rating, removed for a deleted one, and both for an edit
+    (old value as removed, new value as added). Returns the rating fields as this
+    write left them (unchanged ones for an edit to the same value), or None if the
+    product is gone or has no aggregates (see ensure_rating_stats).
+    """
+    product_id = ObjectId(product_id)
+    increments = defaultdict(int)
+    if added is not None:
+        increments["rating_sum"] += added
+        increments["rating_count"] += 1
+        increments[f"rating_histogram.{added}"] += 1
+    if removed is not None:
+        increments["rating_sum"] -= removed
+        increments["rating_count"] -= 1
+        increments[f"rating_histogram.{removed}"] -= 1
+    increments = {field: delta for field, delta in increments.items() if delta}
+    if not increments:
+        product = await products_collection.find_one({"_id": product_id, "rating_count": {"$exists": True}}, RATING_FIELDS)
+        return {field: product.get(field) for field in RATING_FIELDS} if product else None
+
+    product = await products_collection.find_one_and_update(
+        {"_id": product_id, "rating_count": {"$exists": True}},
+        {"$inc": increments},
+        projection={"rating_sum": 1, "rating_count": 1, "rating_histogram": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if product is None:
+        return None
+
+    # Only the writer that saw the latest counters sets the average; a later $inc
+    # will set it again from its own view
+    fields = {
+        "rating": rating_average(product["rating_sum"], product["rating_count"]),
+        "reviews": product["rating_count"],
+        "updated_at": datetime.utcnow()
+    }
+    await products_collection.update_one(
+        {"_id": product_id, "rating_sum": product["rating_sum"], "rating_count": product["rating_count"]},
+        {"$set": fields}
+    )
+    return {
+        "rating_sum": product["rating_sum"],
+        "rating_count": product["rating_count"],
+        "rating_histogram": product.get("rating_histogram"),
+        **fields
+    }
+
+async def repair_rating_stats(product_id=None, only_missing: bool = False) -> int:
+    """Recompute rating aggregates from the ratings collection.
+
+    Repairs one product, or every product when product_id is None. only_missing
+    leaves products that already have aggregates alone (see ensure_rating_stats).
+    Returns the number of products written.
+    """
+    match = {"product_id": ObjectId(product_id)} if product_id is not None else {}
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": {"product_id": "$product_id", "rating": "$rating"}, "count": {"$sum": 1}}}
+    ]
+
+    aggregates = {}
+    async for row in ratings_collection.aggregate(pipeline):
+        rating_value = row["_id"]["rating"]
+        if rating_value not in RATING_VALUES:
+            continue
+        entry = aggregates.setdefault(row["_id"]["product_id"], {"rating_sum": 0, "rating_count": 0, "rating_histogram": empty_histogram()})
+        entry["rating_sum"] += rating_value * row["count"]
+        entry["rating_count"] += row["count"]
+        entry["rating_histogram"][str(rating_value)] += row["count"]
+
+    if product_id is not None:
+        product_ids = [ObjectId(product_id)]
+    else:
+        # Also reset products whose ratings were all removed; never-rated products keep their seeded values
+        tracked_cursor = products_collection.find({"rating_count": {"$exists": True}}, {"_id": 1})
+        product_ids = set(aggregates) | {product["_id"] async for product in tracked_cursor}
+
+    now = datetime.utcnow()
+    operations = []
+    for pid in product_ids:
+        entry = aggregates.get(pid, {"rating_sum": 0, "rating_count": 0, "rating_histogram": empty_histogram()})
+        operations.append(UpdateOne(
+            {"_id": pid, **({"rating_count": {"$exists": False}} if only_missing else {})},
+            {"$set": {
+                **entry,
+                "rating": rating_average(entry["rating_sum"], entry["rating_count"]),
+                "reviews": entry["rating_count"],
+                "updated_at": now
+            }}
+        ))
+    if operations:
+        await products_collection.bulk_write(operations, ordered=False)
+    return len(operations)
@@ -0,0 +1,210 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from utils.database import db, sales_rollups_collection
+
+# sales_rollups holds one document per (granularity, bucket, channel, status):
+#   {"granularity": "hour" | "day", "bucket": datetime, "channel": str, "status": str,
+#    "count": int, "amount": float, "updated_at": datetime}
+# Buckets are naive UTC, truncated to the hour or day. Channels are the payment
+# collections below; each write path calls record_sale on insert and move_sale when
+# it changes a document's status, so reports read O(buckets) rollups instead of
+# scanning raw payments. A document is bucketed by its created_at, or its ObjectId's
+# generation time when created_at is missing; documents with neither are left out.
+
+GRANULARITIES = ("hour", "day")
+
+# channel -> how to read the amount and status of one of its documents
+ROLLUP_CHANNELS = {
+    "transactions": {"amount_fields": ("total", "amount"), "status_field": "status"},
+    "prepaid_orders": {"amount_fields": ("total_amount",), "status_field": "status"},
+    "cash_pickup_orders": {"amount_fields": ("total_amount",), "status_field": "status"},
+    "square_orders": {"amount_fields": ("total_amount",), "status_field": "status"},
+    "square_transactions": {"amount_fields": ("amount",), "status_field": "status"},
+    "payment_transactions": {"amount_fields": ("amount",), "status_field": "payment_status"},
+}
+
+def _as_utc(value) -> Optional[datetime]:
+    """Normalize stored timestamps (naive UTC, aware, or ISO strings) to naive UTC; None if unusable."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def sale_time(document: dict) -> Optional[datetime]:
+    """When a payment happened: created_at, else its ObjectId's generation time, else None."""
+    occurred_at = _as_utc(document.get("created_at"))
+    if occurred_at is None and isinstance(document.get("_id"), ObjectId):
+        occurred_at = _as_utc(document["_id"].generation_time)
+    return occurred_at
+
+def bucket_start(occurred_at: datetime, granularity: str) -> datetime:
+    occurred_at = _as_utc(occurred_at)
+    if granularity == "hour":
+        return occurred_at.replace(minute=0, second=0, microsecond=0)
+    return occurred_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _status_value(status) -> str:
+    # Enum members (TransactionStatus, PaymentMethod) are stored by value
+    return str(getattr(status, "value", status) or "unknown")
+
+def sale_amount(channel: str, document: dict) -> float:
+    for field in ROLLUP_CHANNELS[channel]["amount_fields"]:
+        if document.get(field) is not None:
+            return float(document[field])
+    return 0.0
+
+def sale_status(channel: str, document: dict) -> str:
+    return _status_value(document.get(ROLLUP_CHANNELS[channel]["status_field"]))
+
+def _bucket_updates(channel: str, status, occurred_at, count: int, amount: float) -> List[UpdateOne]:
+    now = datetime.utcnow()
+    return [
+        UpdateOne(
+            {
+                "granularity": granularity,
+                "bucket": bucket_start(occurred_at, granularity),
+                "channel": channel,
+                "status": _status_value(status)
+            },
+            {"$inc": {"count": count, "amount": amount}, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for granularity in GRANULARITIES
+    ]
+
+async def record_sale(channel: str, document: dict):
+    """Add a newly written payment document to its hour and day buckets.
+
+    Called from payment paths, so a rollup failure is logged and never fails the payment.
+    """
+    occurred_at = sale_time(document)
+    if occurred_at is None:
+        return
+    try:
+        await sales_rollups_collection.bulk_write(
+            _bucket_updates(channel, sale_status(channel, document), occurred_at, 1, sale_amount(channel, document)),
+            ordered=False
+        )
+    except Exception as e:
+        print(f"Error updating sales rollups: {str(e)}")
+
+async def move_sale(channel: str, document: dict, new_status):
+    """Move a payment document from its previous status bucket to new_status.
+
+    document is the state before the update (e.g. from find_one_and_update with
+    ReturnDocument.BEFORE), so it still carries the old status and created_at.
+    """
+    old_status = sale_status(channel, document)
+    occurred_at = sale_time(document)
+    if old_status == _status_value(new_status) or occurred_at is None:
+        return
+    try:
+        amount = sale_amount(channel, document)
+        await sales_rollups_collection.bulk_write(
+            _bucket_updates(channel, old_status, occurred_at, -1, -amount)
+            + _bucket_updates(channel, new_status, occurred_at, 1, amount),
+            ordered=False
+        )
+    except Exception as e:
+        print(f"Error updating sales rollups: {str(e)}")
+
+async def query_rollups(
+    channels: Optional[Iterable[str]] = None,
+    statuses: Optional[Iterable[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: str = "day"
+) -> List[dict]:
+    """Return rollup rows for [start, end) in bucket order."""
+    query = {"granularity": granularity}
+    if channels is not None:
+        query["channel"] = {"$in": list(channels)}
+    if statuses is not None:
+        query["status"] = {"$in": [_status_value(status) for status in statuses]}
+    if start is not None or end is not None:
+        query["bucket"] = {}
+        if start is not None:
+            query["bucket"]["$gte"] = bucket_start(start, granularity)
+        if end is not None:
+            query["bucket"]["$lt"] = end
+    cursor = sales_rollups_collection.find(query, {"_id": 0, "updated_at": 0}).sort([("bucket", 1), ("channel", 1), ("status", 1)])
+    return await cursor.to_list(length=None)
+
+async def summarize_rollups(
+    channels: Optional[Iterable[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Dict[str, dict]:
+    """Total count and amount per status over the day buckets in [start, end)."""
+    summary = defaultdict(lambda: {"count": 0, "amount": 0.0})
+    for row in await query_rollups(channels=channels, start=start, end=end, granularity="day"):
+        summary[row["status"]]["count"] += row["count"]
+        summary[row["status"]]["amount"] += row["amount"]
+    return dict(summary)
+
+async def backfill_sales_rollups(channels: Optional[Iterable[str]] = None) -> dict:
+    """Rebuild rollups for the given channels (all by default) from the raw collections.
+
+    Replaces the channels' existing rollups, so run it while payments are quiet.
+    Memory grows with the number of buckets, not documents. Returns
+    {"rows": rollup rows written, "skipped": documents with no usable time}.
+    """
+    channels = list(channels or ROLLUP_CHANNELS)
+    written = 0
+    skipped = 0
+    for channel in channels:
+        spec = ROLLUP_CHANNELS[channel]
+        projection = {field: 1 for field in spec["amount_fields"]}
+        projection.update({spec["status_field"]: 1, "created_at": 1})
+
+        totals = defaultdict(lambda: {"count": 0, "amount": 0.0})
+        async for document in db[channel].find({}, projection):
+            occurred_at = sale_time(document)
+            if occurred_at is None:
+                skipped += 1
+                continue
+            status = sale_status(channel, document)
+            amount = sale_amount(channel, document)
+            for granularity in GRANULARITIES:
+                key = (granularity, bucket_start(occurred_at, granularity), status)
+                totals[key]["count"] += 1
+                totals[key]["amount"] += amount
+
+        await sales_rollups_collection.delete_many({"channel": channel})
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"granularity": granularity, "bucket": bucket, "channel": channel, "status": status},
+                {"$set": {"count": entry["count"], "amount": round(entry["amount"], 2), "updated_at": now}},
+                upsert=True
+            )
+            for (granularity, bucket, status), entry in totals.items()
+        ]
+        if operations:
+            await sales_rollups_collection.bulk_write(operations, ordered=False)
+        written += len(operations)
+    return {"rows": written, "skipped": skipped}
+
+def day_range(day) -> tuple:
+    """[start, end) datetimes covering one calendar day."""
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+def rollup_count(summary: Dict[str, dict], *statuses: str) -> int:
+    """Count across the given statuses of a summarize_rollups result (all statuses if none given)."""
+    return sum(entry["count"] for status, entry in summary.items() if not statuses or status in statuses)
+
+def rollup_amount(summary: Dict[str, dict], *statuses: str) -> float:
+    """Amount across the given statuses of a summarize_rollups result (all statuses if none given)."""
+    return round(sum(entry["amount"] for status, entry in summary.items() if not statuses or status in statuses), 2)
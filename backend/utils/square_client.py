@@ -0,0 +1,63 @@
+import os
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import httpx
+
+# The Square SDK is imported on first use, so it stays off the startup path
+if TYPE_CHECKING:
+    from square import AsyncSquare
+
+# Square calls go through one pooled async HTTP client per process, so a slow
+# payment only holds a connection, never the event loop
+SQUARE_TIMEOUT_SECONDS = float(os.environ.get("SQUARE_TIMEOUT_SECONDS", "15"))
+SQUARE_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("SQUARE_CONNECT_TIMEOUT_SECONDS", "5"))
+SQUARE_MAX_CONNECTIONS = int(os.environ.get("SQUARE_MAX_CONNECTIONS", "20"))
+SQUARE_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("SQUARE_MAX_KEEPALIVE_CONNECTIONS", "10"))
+
+_clients: Dict[Tuple[Optional[str], str, Optional[str]], "AsyncSquare"] = {}
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(SQUARE_TIMEOUT_SECONDS, connect=SQUARE_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=SQUARE_MAX_CONNECTIONS,
+                max_keepalive_connections=SQUARE_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+    return _http_client
+
+def get_square_client(default_environment: str = "production") -> "AsyncSquare":
+    """Return the shared async Square client for the configured token and environment.
+
+    SQUARE_BASE_URL overrides the environment's URL, e.g. to point at
+    benchmarks/fake_square_server.py during load tests.
+    """
+    access_token = os.environ.get("SQUARE_ACCESS_TOKEN")
+    environment = os.environ.get("SQUARE_ENVIRONMENT", default_environment)
+    base_url = os.environ.get("SQUARE_BASE_URL")
+
+    key = (access_token, environment, base_url)
+    client = _clients.get(key)
+    if client is None or _http_client is None or _http_client.is_closed:
+        from square import AsyncSquare
+        from square.environment import SquareEnvironment
+        client = AsyncSquare(
+            token=access_token,
+            environment=SquareEnvironment.SANDBOX if environment == "sandbox" else SquareEnvironment.PRODUCTION,
+            base_url=base_url,
+            timeout=SQUARE_TIMEOUT_SECONDS,
+            httpx_client=_get_http_client()
+        )
+        _clients[key] = client
+    return client
+
+async def close_square_client():
+    """Close the pooled connections (called on app shutdown)."""
+    global _http_client
+    _clients.clear()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+from fastapi import Request
+
+from utils.database import users_collection, admins_collection, token_revocations_collection
+
+# Entitlements are the few user fields authorization checks read. They are cached
+# per email for a short TTL and dropped on profile, verification and tier updates;
+# the TTL bounds staleness for updates made by other workers.
+USER_ENTITLEMENTS_TTL_SECONDS = float(os.environ.get("USER_ENTITLEMENTS_TTL_SECONDS", "30"))
+USER_ENTITLEMENTS_MAX_ENTRIES = int(os.environ.get("USER_ENTITLEMENTS_MAX_ENTRIES", "10000"))
+# How often each worker reloads token_revocations (the lag before a revocation applies everywhere)
+TOKEN_REVOCATION_REFRESH_SECONDS = float(os.environ.get("TOKEN_REVOCATION_REFRESH_SECONDS", "15"))
+# Admin accounts are re-read at least this often, so a deactivated or deleted admin's
+# tokens stop working within it (admins are deactivated directly in the database)
+ADMIN_ACCOUNT_TTL_SECONDS = float(os.environ.get("ADMIN_ACCOUNT_TTL_SECONDS", "10"))
+ADMIN_ACCOUNT_MAX_ENTRIES = 1000
+
+USER_ENTITLEMENT_FIELDS = {"is_verified": 1, "id_verification.verification_status": 1, "membership_tier": 1, "wictionary_access": 1}
+
+def entitlements_from_user(user: Optional[dict], admin: Optional[dict] = None) -> dict:
+    return {
+        "user_id": user["_id"] if user else None,
+        "is_verified": bool(user and user.get("is_verified", False)),
+        "verification_status": (user or {}).get("id_verification", {}).get("verification_status", "pending"),
+        "membership_tier": (user or {}).get("membership_tier"),
+        "wictionary_access": bool(user and user.get("wictionary_access", False)),
+        # Deactivated admins keep their document but lose the role
+        "role": admin.get("role", "admin") if admin and admin.get("is_active", True) else None
+    }
+
+class EntitlementCache:
+    """Bounded LRU of email -> (entitlements, expires_at)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, email: str) -> Optional[dict]:
+        entry = self._entries.get(email)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                del self._entries[email]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(email)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, email: str, entitlements: dict):
+        self._entries[email] = (entitlements, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(email)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, email: Optional[str] = None):
+        """Drop one user's entitlements, or all of them."""
+        if email is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(email, None)
+
+entitlements_cache = EntitlementCache(USER_ENTITLEMENTS_MAX_ENTRIES, USER_ENTITLEMENTS_TTL_SECONDS)
+# email -> admin document, or {} for "not an admin"
+admin_accounts_cache = EntitlementCache(ADMIN_ACCOUNT_MAX_ENTRIES, ADMIN_ACCOUNT_TTL_SECONDS)
+
+def invalidate_user(email: Optional[str] = None):
+    """Call after writing a user's profile, verification status or membership tier, or an admin account."""
+    entitlements_cache.invalidate(email)
+    admin_accounts_cache.invalidate(email)
+
+async def get_admin_account(email: str) -> Optional[dict]:
+    """The admin document for email (cached for ADMIN_ACCOUNT_TTL_SECONDS); None if not an admin.
+
+    Callers check is_active themselves; the document is shared, so copy it before changing it.
+    """
+    admin = admin_accounts_cache.get(email)
+    if admin is None:
+        admin = await admins_collection.find_one({"email": email}, {"password_hash": 0}) or {}
+        admin_accounts_cache.put(email, admin)
+    return admin or None
+
+async def is_active_admin(email: str) -> bool:
+    admin = await get_admin_account(email)
+    return bool(admin) and admin.get("is_active", True)
+
+async def get_user_entitlements(email: str, request: Optional[Request] = None) -> Optional[dict]:
+    """Cached entitlements for email; None if it is neither a user nor an admin."""
+    entitlements = entitlements_cache.get(email)
+    if entitlements is not None:
+        return entitlements
+
+    # A user document already loaded for this request carries every entitlement field
+    user = getattr(request.state, "user", None) if request is not None else None
+    if user is not None and user.get("email") == email:
+        admin = await admins_collection.find_one({"email": email}, {"role": 1, "is_active": 1})
+    else:
+        user, admin = await asyncio.gather(
+            users_collection.find_one({"email": email}, USER_ENTITLEMENT_FIELDS),
+            admins_collection.find_one({"email": email}, {"role": 1, "is_active": 1})
+        )
+    if user is None and admin is None:
+        return None
+
+    entitlements = entitlements_from_user(user, admin)
+    entitlements_cache.put(email, entitlements)
+    return entitlements
+
+async def get_user_id(email: str, request: Optional[Request] = None):
+    """The user's _id from the entitlements cache; None if there is no such user."""
+    entitlements = await get_user_entitlements(email, request)
+    return entitlements["user_id"] if entitlements else None
+
+async def load_request_user(request: Request, email: str) -> Optional[dict]:
+    """Load the user document at most once per request.
+
+    The document is shared by every dependency and the handler of the request, so
+    callers that need to change it must copy it first.
+    """
+    user = getattr(request.state, "user", None)
+    if user is not None and user.get("email") == email:
+        return user
+    user = await users_collection.find_one({"email": email})
+    request.state.user = user
+    return user
+
+class ClaimRevocations:
+    """Server-side list of users whose signed tier/verified/admin claims are stale.
+
+    token_revocations holds {"_id": email, "revoked_at": datetime}; tokens issued at or
+    before revoked_at fall back to database entitlements. Each worker keeps the list in
+    memory and reloads it every TOKEN_REVOCATION_REFRESH_SECONDS, so checks cost no
+    round trip per request.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._revoked: Dict[str, float] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self):
+        async with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < TOKEN_REVOCATION_REFRESH_SECONDS:
+                return
+            revoked = {}
+            async for revocation in self.collection.find({}, {"revoked_at": 1}):
+                revoked[revocation["_id"]] = (revocation["revoked_at"] - datetime(1970, 1, 1)).total_seconds()
+            self._revoked = revoked
+            self._loaded_at = time.monotonic()
+
+    async def is_revoked(self, claims: dict) -> bool:
+        await self.refresh()
+        revoked_at = self._revoked.get(claims.get("sub"))
+        return revoked_at is not None and claims.get("iat", 0) <= revoked_at
+
+    async def revoke(self, email: str):
+        revoked_at = datetime.utcnow()
+        await self.collection.update_one({"_id": email}, {"$set": {"revoked_at": revoked_at}}, upsert=True)
+        self._revoked[email] = (revoked_at - datetime(1970, 1, 1)).total_seconds()
+
+claim_revocations = ClaimRevocations(token_revocations_collection)
+
+async def revoke_user_claims(email: str):
+    """Stop trusting claims in this user's existing tokens (tier downgrades, verification changes)."""
+    invalidate_user(email)
+    try:
+        await claim_revocations.revoke(email)
+    except Exception as e:
+        print(f"Error revoking token claims: {str(e)}")
+
+async def get_claim_entitlements(claims: dict) -> Optional[dict]:
+    """Entitlements signed into the token when they grant premium or admin access.
+
+    Claims only ever grant: anything else (old tokens, basic tier, revoked claims) falls
+    back to get_user_entitlements, so upgrades apply without a new token and downgrades
+    need revoke_user_claims. Claims carry no user id, so user_id is None on the token path.
+    """
+    grants_access = claims.get("tier") == "premium" or claims.get("is_admin")
+    if grants_access and not await claim_revocations.is_revoked(claims):
+        # The admin claim outlives the account; only an existing, active admin keeps the role
+        if claims.get("is_admin") and not await is_active_admin(claims["sub"]):
+            return await get_user_entitlements(claims["sub"])
+        return {
+            "user_id": None,
+            "is_verified": bool(claims.get("verified", False)),
+            "verification_status": None,
+            "membership_tier": claims.get("tier"),
+            "wictionary_access": claims.get("tier") == "premium",
+            "role": "admin" if claims.get("is_admin") else None
+        }
+    return await get_user_entitlements(claims["sub"])
@@ -1,20 +1,21 @@
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Request
 from utils.auth import verify_token
-from utils.database import users_collection
+from utils.user_context import get_user_entitlements, load_request_user
 
-async def require_verified_user(current_user_email: str = Depends(verify_token)):
+async def require_verified_user(request: Request, current_user_email: str = Depends(verify_token)):
     """Middleware to ensure user is verified before allowing transactions."""
-    user = await users_collection.find_one({"email": current_user_email})
+    # Answered from the entitlements cache, so a cache hit costs no database read
+    entitlements = await get_user_entitlements(current_user_email, request)
     
-    if not user:
+    if not entitlements or entitlements["user_id"] is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
     # Check if user is verified
-    if not user.get("is_verified", False):
-        verification_status = user.get("id_verification", {}).get("verification_status", "pending")
+    if not entitlements["is_verified"]:
+        verification_status = entitlements["verification_status"]
         
         if verification_status == "rejected":
             raise HTTPException(
@@ -34,7 +35,7 @@ async def require_verified_user(current_user_email: str = Depends(verify_token))
     
     return current_user_email
 
-async def get_verified_user_data(current_user_email: str = Depends(require_verified_user)):
-    """Get verified user data for transactions."""
-    user = await users_collection.find_one({"email": current_user_email})
+async def get_verified_user_data(request: Request, current_user_email: str = Depends(require_verified_user)):
+    """Get verified user data for transactions (loaded once per request)."""
+    user = await load_request_user(request, current_user_email)
     return user
\ No newline at end of file
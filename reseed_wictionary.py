@@ -12,7 +12,8 @@ from pathlib import Path
 backend_path = Path(__file__).parent / "backend"
 sys.path.insert(0, str(backend_path))
 
-from utils.database import DatabaseManager, wictionary_collection
+from utils.database import wictionary_collection
+from utils.seed import DatabaseSeeder
 
 async def reseed_wictionary():
     """Manually reseed the wictionary collection."""
@@ -29,7 +30,7 @@ async def reseed_wictionary():
     
     # Reseed with comprehensive data
     print("🌱 Seeding comprehensive strain definitions...")
-    await DatabaseManager.seed_wictionary()
+    await DatabaseSeeder.seed_wictionary()
     
     # Check new count
     new_count = await wictionary_collection.count_documents({})
@@ -0,0 +1,8 @@
+import pytest
+
+from tests.mongo_harness import open_backend
+
+@pytest.fixture(scope="module")
+def backend():
+    """A throwaway database the app modules imported so far are pointed at (see mongo_harness.py)."""
+    yield from open_backend()
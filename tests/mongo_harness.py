@@ -0,0 +1,122 @@
+"""
+Throwaway Mongo database for tests that drive app code.
+
+open_backend() points every Motor database and collection held by first-party
+modules (and their singletons) at a fresh database: a uniquely named one on the
+MongoDB in MONGO_URL, dropped afterwards, or mongomock-motor when no server is
+reachable. The app's own database in utils/database.py is never touched.
+mongomock operations are reported to the metrics listener as the commands they
+stand for, so per-request command counts work on both.
+
+Tests use the `backend` fixture from conftest.py and run coroutines with run().
+"""
+
+import asyncio
+import contextvars
+import os
+import sys
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+if str(BACKEND) not in sys.path:
+    sys.path.append(str(BACKEND))
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+
+from utils.metrics import mongo_command_listener
+
+FIRST_PARTY_PACKAGES = ("server", "routes", "utils", "models")
+
+# Motor binds a client to the first loop it runs on, so every test uses this one
+loop = asyncio.new_event_loop()
+
+def run(coro):
+    return loop.run_until_complete(coro)
+
+def _mongo_client():
+    return AsyncIOMotorClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=1000, event_listeners=[mongo_command_listener])
+
+async def _mongo_available(client) -> bool:
+    try:
+        await client.admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+# Nested mongomock calls (find_one -> find) are one command
+_in_mock_command = contextvars.ContextVar("in_mock_command", default=False)
+
+MOCK_COMMANDS = {
+    "find": "find", "find_one": "find", "aggregate": "aggregate", "count_documents": "aggregate",
+    "distinct": "distinct", "insert_one": "insert", "insert_many": "insert", "update_one": "update",
+    "update_many": "update", "replace_one": "update", "delete_one": "delete", "delete_many": "delete",
+    "find_one_and_update": "findAndModify", "find_one_and_replace": "findAndModify",
+    "find_one_and_delete": "findAndModify", "bulk_write": "bulkWrite"
+}
+
+def _report_mock_commands(monkeypatch):
+    """Report mongomock operations to the metrics listener as the commands they stand for."""
+    from mongomock.collection import Collection
+
+    def counted(method, command_name):
+        def wrapper(*args, **kwargs):
+            if _in_mock_command.get():
+                return method(*args, **kwargs)
+            token = _in_mock_command.set(True)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _in_mock_command.reset(token)
+                mongo_command_listener.succeeded(SimpleNamespace(command_name=command_name, duration_micros=0))
+        return wrapper
+
+    for method_name, command_name in MOCK_COMMANDS.items():
+        monkeypatch.setattr(Collection, method_name, counted(getattr(Collection, method_name), command_name))
+
+def _point_app_at(monkeypatch, database):
+    """Swap the Motor database and collections held by app modules and their singletons."""
+    for module_name, module in list(sys.modules.items()):
+        if module is None or module_name.split(".")[0] not in FIRST_PARTY_PACKAGES:
+            continue
+        holders = [module] + [
+            value for value in vars(module).values()
+            if hasattr(value, "__dict__") and not isinstance(value, (type, type(sys)))
+            and not callable(value) and not isinstance(value, (AsyncIOMotorDatabase, AsyncIOMotorCollection))
+        ]
+        for holder in holders:
+            for attribute, value in list(vars(holder).items()):
+                if isinstance(value, AsyncIOMotorDatabase):
+                    monkeypatch.setattr(holder, attribute, database)
+                elif isinstance(value, AsyncIOMotorCollection):
+                    monkeypatch.setattr(holder, attribute, database[value.name])
+
+def open_backend():
+    """Generator behind the `backend` fixture: yields SimpleNamespace(kind, db), then cleans up.
+
+    Import the app modules under test before the fixture runs; modules imported
+    later still hold the real database.
+    """
+    monkeypatch = pytest.MonkeyPatch()
+    client = _mongo_client()
+    if run(_mongo_available(client)):
+        database = client[f"statusxsmoakland_test_{uuid.uuid4().hex[:8]}"]
+        kind = "mongodb"
+    else:
+        mongomock_motor = pytest.importorskip("mongomock_motor", reason="no MongoDB at MONGO_URL and mongomock-motor not installed")
+        database = mongomock_motor.AsyncMongoMockClient()["statusxsmoakland_test"]
+        _report_mock_commands(monkeypatch)
+        kind = "mongomock"
+    _point_app_at(monkeypatch, database)
+    try:
+        yield SimpleNamespace(kind=kind, db=database)
+    finally:
+        monkeypatch.undo()
+        if kind == "mongodb":
+            run(client.drop_database(database.name))
+        client.close()
@@ -0,0 +1,60 @@
+"""
+Admin tokens stop working once the admin is deactivated or deleted, even though the
+token still carries a valid signed is_admin claim.
+
+    python -m pytest tests/test_admin_auth.py
+"""
+
+import uuid
+from datetime import datetime
+
+import httpx
+import pytest
+
+from tests.mongo_harness import run
+from server import app
+from utils.auth import create_access_token
+from utils.user_context import admin_accounts_cache
+
+# One endpoint behind verify_admin_token, one behind get_admin_data
+ADMIN_PATHS = ["/api/admin/sales-rollups", "/api/admin-auth/profile"]
+
+async def _seed_admin(db, is_active: bool = True) -> str:
+    email = f"admin-{uuid.uuid4().hex[:8]}@auth.test"
+    await db.admins.insert_one({
+        "email": email, "username": email.split("@")[0], "full_name": "Auth Test", "role": "admin",
+        "is_active": is_active, "password_hash": "unused", "created_at": datetime.utcnow()
+    })
+    return email
+
+async def _get(path: str, email: str) -> int:
+    token = create_access_token({"sub": email, "type": "admin", "is_admin": True})
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        response = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+    return response.status_code
+
+@pytest.mark.parametrize("path", ADMIN_PATHS)
+def test_active_admin_is_accepted(backend, path):
+    email = run(_seed_admin(backend.db))
+    assert run(_get(path, email)) == 200
+
+@pytest.mark.parametrize("path", ADMIN_PATHS)
+def test_deactivated_admin_with_valid_token_is_refused(backend, path):
+    email = run(_seed_admin(backend.db, is_active=False))
+    assert run(_get(path, email)) == 403
+
+@pytest.mark.parametrize("path", ADMIN_PATHS)
+def test_admin_deactivated_after_login_is_refused_once_the_cache_expires(backend, path):
+    email = run(_seed_admin(backend.db))
+    assert run(_get(path, email)) == 200
+
+    run(backend.db.admins.update_one({"email": email}, {"$set": {"is_active": False}}))
+    # Stands in for ADMIN_ACCOUNT_TTL_SECONDS passing
+    admin_accounts_cache.invalidate(email)
+    assert run(_get(path, email)) == 403
+
+def test_deleted_admin_is_refused(backend):
+    email = run(_seed_admin(backend.db))
+    run(backend.db.admins.delete_one({"email": email}))
+    admin_accounts_cache.invalidate(email)
+    assert run(_get(ADMIN_PATHS[0], email)) == 403
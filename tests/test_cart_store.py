@@ -0,0 +1,77 @@
+"""
+Cart backends behave the same; MongoCartStore does every item change as one
+atomic update and retries when a concurrent request created the line first.
+
+    python -m pytest tests/test_cart_store.py
+"""
+
+import uuid
+
+import pytest
+
+from tests.mongo_harness import run
+from utils.cart_store import CartStore, InMemoryCartStore, MongoCartStore
+
+def _email() -> str:
+    return f"cart-{uuid.uuid4().hex[:8]}@cart.test"
+
+@pytest.fixture(params=["memory", "mongo"])
+def store(request, backend) -> CartStore:
+    return InMemoryCartStore() if request.param == "memory" else MongoCartStore(backend.db.carts)
+
+def test_cart_store_is_abstract():
+    with pytest.raises(TypeError):
+        CartStore()
+
+def test_add_merges_lines_and_set_remove_clear(store):
+    email = _email()
+    run(store.add_item(email, "a", 1))
+    run(store.add_item(email, "b", 2))
+    run(store.add_item(email, "a", 3))
+    assert run(store.get_items(email)) == [{"product_id": "a", "quantity": 4}, {"product_id": "b", "quantity": 2}]
+
+    assert run(store.set_quantity(email, "b", 7))
+    assert not run(store.set_quantity(email, "missing", 1))
+    assert run(store.remove_item(email, "a"))
+    assert not run(store.remove_item(email, "a"))
+    assert run(store.get_items(email)) == [{"product_id": "b", "quantity": 7}]
+
+    run(store.clear(email))
+    assert run(store.get_items(email)) == []
+
+def test_mongo_cart_is_one_document_per_user(backend):
+    store, email = MongoCartStore(backend.db.carts), _email()
+    run(store.add_item(email, "a", 2))
+    run(store.add_item(email, "a", 1))
+    run(store.add_item(email, "b", 1))
+    run(store.remove_item(email, "b"))
+
+    cart = run(backend.db.carts.find_one({"_id": email}))
+    assert cart["items"] == [{"product_id": "a", "quantity": 3}]
+    assert cart["updated_at"] is not None
+
+class _RacingCollection:
+    """Creates the same line from "another request" just before the first $push upsert."""
+
+    def __init__(self, collection, user_email: str, product_id: str, quantity: int):
+        self.collection = collection
+        self.competing_line = {"_id": user_email, "items": [{"product_id": product_id, "quantity": quantity}]}
+        self.upserts = 0
+
+    async def update_one(self, filter, update, upsert=False):
+        if upsert and self.upserts == 0:
+            self.upserts += 1
+            await self.collection.insert_one(self.competing_line)
+        return await self.collection.update_one(filter, update, upsert=upsert)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+def test_mongo_add_retries_the_increment_after_a_duplicate_key(backend):
+    email = _email()
+    racing = _RacingCollection(backend.db.carts, email, "a", 2)
+
+    run(MongoCartStore(racing).add_item(email, "a", 3))
+
+    # Both requests' quantities land on one line
+    assert run(backend.db.carts.find_one({"_id": email}))["items"] == [{"product_id": "a", "quantity": 5}]
@@ -0,0 +1,28 @@
+"""
+Dashboard rating totals come from the per-product aggregates, not a pass over ratings.
+
+    python -m pytest tests/test_dashboard_stats.py
+"""
+
+from tests.mongo_harness import run
+from routes.admin import compute_dashboard_stats
+
+def test_rating_totals_are_summed_from_products(backend):
+    run(backend.db.products.insert_many([
+        {"name": "A", "in_stock": True, "rating_sum": 9, "rating_count": 2},
+        {"name": "B", "in_stock": False, "rating_sum": 4, "rating_count": 2},
+        # Never rated, or from before the aggregates existed
+        {"name": "C", "in_stock": True}
+    ]))
+    # Ratings are not read: a stray document here must not change the totals
+    run(backend.db.ratings.insert_one({"product_id": "A", "user_id": "x", "rating": 1}))
+
+    stats = run(compute_dashboard_stats())
+
+    assert stats["ratings"] == {"total_ratings": 4, "avg_rating_all_products": 3.25}
+    assert stats["inventory"] == {"total_products": 3, "out_of_stock": 1}
+
+def test_no_ratings_reports_zero(backend):
+    run(backend.db.products.update_many({}, {"$set": {"rating_sum": 0, "rating_count": 0}}))
+
+    assert run(compute_dashboard_stats())["ratings"] == {"total_ratings": 0, "avg_rating_all_products": 0.0}
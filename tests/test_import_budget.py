@@ -0,0 +1,70 @@
+"""
+Startup import budget: `import server` stays fast and keeps heavy SDKs and seed data
+off the boot path.
+
+Runs `python -X importtime -c "import server"` in a subprocess (best of a few runs)
+and checks the total against SERVER_IMPORT_BUDGET_MS and each first-party module's
+own import time against MODULE_SELF_BUDGET_MS. Set IMPORT_TIME_REPORT to a file
+path to write the per-module cumulative times as JSON, e.g. as a CI artifact to
+diff between commits.
+
+    python -m pytest tests/test_import_budget.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+RUNS = 3
+# Measured around 0.5 s on a developer laptop; generous for slow CI machines
+SERVER_IMPORT_BUDGET_MS = float(os.environ.get("SERVER_IMPORT_BUDGET_MS", "1500"))
+# Own (not cumulative) time of any one routes/utils/models module; large literals blow this
+MODULE_SELF_BUDGET_MS = float(os.environ.get("MODULE_SELF_BUDGET_MS", "60"))
+# Loaded on first use only
+LAZY_MODULES = ["square", "emergentintegrations", "stripe", "utils.seed"]
+FIRST_PARTY_PREFIXES = ("routes.", "utils.", "models.")
+
+def measure_import() -> dict:
+    """{module: (self_us, cumulative_us)} for one cold `import server`."""
+    env = {**os.environ, "MONGO_URL": os.environ.get("MONGO_URL", "mongodb://localhost:27017")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+def test_server_import_budget():
+    runs = [measure_import() for _ in range(RUNS)]
+    best = min(runs, key=lambda modules: modules["server"][1])
+
+    report_path = os.environ.get("IMPORT_TIME_REPORT")
+    if report_path:
+        Path(report_path).write_text(json.dumps(
+            {name: cumulative / 1000 for name, (_, cumulative) in sorted(best.items(), key=lambda item: -item[1][1])},
+            indent=2
+        ))
+
+    imported_lazy = [name for name in LAZY_MODULES if name in best]
+    assert not imported_lazy, f"Imported at startup, should load on first use: {imported_lazy}"
+
+    total_ms = best["server"][1] / 1000
+    assert total_ms <= SERVER_IMPORT_BUDGET_MS, f"import server took {total_ms:.0f} ms (budget {SERVER_IMPORT_BUDGET_MS:.0f} ms)"
+
+    slow_modules = {
+        name: round(min(run[name][0] for run in runs if name in run) / 1000, 1)
+        for name in best
+        if name.startswith(FIRST_PARTY_PREFIXES)
+    }
+    over_budget = {name: ms for name, ms in slow_modules.items() if ms > MODULE_SELF_BUDGET_MS}
+    assert not over_budget, f"Modules over {MODULE_SELF_BUDGET_MS:.0f} ms of their own import time: {over_budget}"
@@ -0,0 +1,137 @@
+"""
+Every Mongo query in backend/routes and backend/utils can use an index from
+utils/indexes.INDEX_REGISTRY.
+
+Queries are found statically: calls like users_collection.find_one({...}) or
+db.strains.find({...}).sort("name") whose filter is a dict literal. Filters built
+in variables are not checked, and empty filters are full listings by design.
+
+    python -m pytest tests/test_index_coverage.py
+"""
+
+import ast
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.append(str(BACKEND))
+
+from utils.indexes import INDEX_REGISTRY, index_supports
+
+QUERY_METHODS = {
+    "find", "find_one", "find_one_and_update", "find_one_and_delete", "find_one_and_replace",
+    "update_one", "update_many", "delete_one", "delete_many", "replace_one", "count_documents", "distinct"
+}
+
+# (collection, field) pairs deliberately left unindexed
+UNINDEXED = {
+    ("strains", "availability"): "admin stats count over the small strain catalog",
+    ("delivery_signups", "is_active"): "admin list; nearly every signup is active",
+    ("users", "id_verification.requires_medical"): "admin verification stats count",
+    ("sales_rollups", "channel"): "offline rollup rebuild (backfill_sales_rollups.py)"
+}
+
+def collection_variables() -> dict:
+    """users_collection -> "users", from the assignments in utils/database.py."""
+    tree = ast.parse((BACKEND / "utils" / "database.py").read_text())
+    names = {}
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Attribute)
+                and isinstance(node.value.value, ast.Name) and node.value.value.id == "db"):
+            names[node.targets[0].id] = node.value.attr
+    return names
+
+COLLECTION_VARIABLES = collection_variables()
+
+def collection_name(node):
+    if isinstance(node, ast.Name):
+        return COLLECTION_VARIABLES.get(node.id)
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "db":
+        return node.attr
+    if (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "db"
+            and isinstance(node.slice, ast.Constant)):
+        return node.slice.value
+    return None
+
+def filter_fields(node: ast.Dict) -> list:
+    """Top-level field names of a filter literal; $or/$and branches are returned as tuples."""
+    fields = []
+    for key, value in zip(node.keys, node.values):
+        if not (isinstance(key, ast.Constant) and isinstance(key.value, str)):
+            continue
+        if key.value in ("$or", "$and") and isinstance(value, ast.List):
+            fields.append(tuple(tuple(filter_fields(branch)) for branch in value.elts if isinstance(branch, ast.Dict)))
+        elif not key.value.startswith("$"):
+            fields.append(key.value)
+    return fields
+
+def sort_fields(call: ast.Call) -> list:
+    if not call.args:
+        return []
+    spec = call.args[0]
+    if isinstance(spec, ast.Constant) and isinstance(spec.value, str):
+        return [spec.value]
+    if isinstance(spec, ast.List):
+        return [element.elts[0].value for element in spec.elts
+                if isinstance(element, ast.Tuple) and isinstance(element.elts[0], ast.Constant)]
+    return []
+
+def query_shapes():
+    """(collection, filter fields, sort fields, location) for every literal query."""
+    for folder in ("routes", "utils"):
+        for path in sorted((BACKEND / folder).glob("*.py")):
+            tree = ast.parse(path.read_text())
+            sorts = {}
+            for node in ast.walk(tree):
+                if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                        and node.func.attr == "sort" and isinstance(node.func.value, ast.Call)):
+                    sorts[id(node.func.value)] = sort_fields(node)
+            for node in ast.walk(tree):
+                if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                        and node.func.attr in QUERY_METHODS):
+                    continue
+                collection = collection_name(node.func.value)
+                if collection is None:
+                    continue
+                query = node.args[0] if node.args else None
+                if query is not None and not isinstance(query, ast.Dict):
+                    continue
+                fields = filter_fields(query) if query is not None else []
+                yield collection, fields, sorts.get(id(node), []), f"{folder}/{path.name}:{node.lineno}"
+
+def supported(collection: str, fields: list, sort: list) -> bool:
+    plain = [field for field in fields if isinstance(field, str)]
+    if index_supports(collection, plain + sort[:1]):
+        return True
+    if any((collection, field) in UNINDEXED for field in plain):
+        return True
+    # An $or is index-driven only when every branch is
+    branches = [field for field in fields if isinstance(field, tuple)]
+    return bool(branches) and all(
+        all(supported(collection, list(branch), []) for branch in group) for group in branches
+    )
+
+def test_scanner_finds_queries():
+    shapes = list(query_shapes())
+    assert len(shapes) > 100
+    assert any(collection == "users" and fields == ["email"] for collection, fields, _, _ in shapes)
+
+def test_every_query_can_use_an_index():
+    unsupported = [
+        f"{location}: {collection} filter={fields} sort={sort}"
+        for collection, fields, sort, location in query_shapes()
+        if (fields or sort) and not supported(collection, fields, sort)
+    ]
+    assert not unsupported, "Queries without a supporting index in INDEX_REGISTRY:\n" + "\n".join(unsupported)
+
+def test_unindexed_allowances_are_still_needed():
+    used = {(collection, field) for collection, fields, _, _ in query_shapes() for field in fields if isinstance(field, str)}
+    stale = [pair for pair in UNINDEXED if pair not in used or index_supports(pair[0], [pair[1]])]
+    assert not stale, f"Remove from UNINDEXED: {stale}"
+
+def test_registry_has_no_duplicate_indexes():
+    for collection, specs in INDEX_REGISTRY.items():
+        keys = [tuple(spec["keys"]) for spec in specs]
+        assert len(keys) == len(set(keys)), collection
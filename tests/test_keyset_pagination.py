@@ -0,0 +1,40 @@
+"""
+Keyset pages cover every row, including rows without the sort field.
+
+Orders from before created_at was stored sort as null; cursors must still reach
+them in both directions.
+
+    python -m pytest tests/test_keyset_pagination.py
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.mongo_harness import run
+from utils.pagination import fetch_keyset_page
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+async def _all_pages(collection, direction: int) -> list:
+    seen, cursor = [], None
+    while True:
+        rows, cursor = await fetch_keyset_page(collection, {"user": 1}, "created_at", 3, cursor=cursor, direction=direction)
+        seen.extend(row["_id"] for row in rows)
+        if not cursor:
+            return seen
+
+@pytest.mark.parametrize("direction", [-1, 1])
+def test_pages_reach_undated_rows(direction):
+    collection = mongomock_motor.AsyncMongoMockClient()["pagination_test"]["orders"]
+    started = datetime(2024, 1, 1)
+    rows = [{"_id": i, "user": 1, "created_at": started + timedelta(hours=i % 4)} for i in range(8)]
+    # Legacy rows: created_at missing or stored as null
+    rows += [{"_id": i, "user": 1, **({"created_at": None} if i % 2 else {})} for i in range(8, 12)]
+    run(collection.insert_many(rows))
+
+    seen = run(_all_pages(collection, direction))
+
+    assert sorted(seen) == list(range(12))
+    undated = [row_id for row_id in seen if row_id >= 8]
+    assert seen[-4:] == undated if direction < 0 else seen[:4] == undated
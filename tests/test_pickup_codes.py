@@ -0,0 +1,79 @@
+"""
+Pickup codes are released when their order fails, not only when it is picked up.
+
+    python -m pytest tests/test_pickup_codes.py
+"""
+
+import json
+import uuid
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from tests.mongo_harness import run
+from server import app
+from routes.cash_pickups import CashPickupOrder, UserCashPickupRequest, create_cash_pickup_order, create_user_cash_pickup
+
+async def _post_webhook(payment_id: str, payment_status: str) -> int:
+    body = {"type": "payment.updated", "data": {"object": {"payment": {"id": payment_id, "status": payment_status}}}}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        response = await client.post("/api/square/webhook", content=json.dumps(body))
+    return response.status_code
+
+async def _seed_pending_square_order(db) -> tuple:
+    code, payment_id = "P" + uuid.uuid4().hex[:6].upper(), f"sq-{uuid.uuid4().hex[:8]}"
+    await db.pickup_codes.insert_one({"_id": code, "channel": "square", "window": 0, "allocated_at": datetime.utcnow()})
+    await db.transactions.insert_one({
+        "_id": str(uuid.uuid4()), "user_id": "user-1", "payment_code": code, "total": 12.0,
+        "payment_method": "square", "status": "pending", "square_payment_id": payment_id,
+        "created_at": datetime.utcnow()
+    })
+    await db.square_orders.insert_one({"square_payment_id": payment_id, "total_amount": 1200, "status": "pending"})
+    return code, payment_id
+
+@pytest.mark.parametrize("payment_status", ["FAILED", "CANCELED"])
+def test_failed_square_payment_releases_its_code(backend, payment_status):
+    code, payment_id = run(_seed_pending_square_order(backend.db))
+
+    assert run(_post_webhook(payment_id, payment_status)) == 200
+    # Square retries webhooks; the second delivery changes nothing
+    assert run(_post_webhook(payment_id, payment_status)) == 200
+
+    transaction = run(backend.db.transactions.find_one({"square_payment_id": payment_id}))
+    assert getattr(transaction["status"], "value", transaction["status"]) == "cancelled"
+    assert run(backend.db.square_orders.find_one({"square_payment_id": payment_id}))["status"] == "cancelled"
+    assert "released_at" in run(backend.db.pickup_codes.find_one({"_id": code}))
+
+def test_pending_square_payment_keeps_its_code(backend):
+    code, payment_id = run(_seed_pending_square_order(backend.db))
+
+    assert run(_post_webhook(payment_id, "APPROVED")) == 200
+
+    assert "released_at" not in run(backend.db.pickup_codes.find_one({"_id": code}))
+
+def test_user_cash_pickup_that_fails_to_save_frees_its_code(backend):
+    # A unique index the order can't satisfy stands in for a failed insert
+    run(backend.db.cash_pickups.create_index("total_amount", unique=True))
+    run(backend.db.cash_pickups.insert_one({"total_amount": 9.5}))
+    codes_before = run(backend.db.pickup_codes.count_documents({}))
+    request = UserCashPickupRequest(items=[], total_amount=9.5, user_name="Test", user_email="cash@pickup.test")
+
+    with pytest.raises(HTTPException):
+        run(create_user_cash_pickup(request, {"id": "user-1"}))
+
+    assert run(backend.db.pickup_codes.count_documents({})) == codes_before
+
+def test_admin_cash_pickup_that_fails_to_save_frees_its_code(backend):
+    run(backend.db.cash_pickup_orders.create_index("order_id", unique=True))
+    run(backend.db.cash_pickup_orders.insert_one({"order_id": "taken"}))
+    code = uuid.uuid4().hex[:6]
+    order = CashPickupOrder(user_id="user-1", user_email="cash@pickup.test", pickup_code=code, order_id="taken",
+                            items=[], total_amount=9.5, created_at=datetime.utcnow().isoformat())
+
+    with pytest.raises(HTTPException):
+        run(create_cash_pickup_order(order, "admin@pickup.test"))
+
+    # The code can be reserved again straight away
+    assert run(backend.db.pickup_codes.find_one({"_id": code})) is None
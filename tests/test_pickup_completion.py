@@ -0,0 +1,97 @@
+"""
+Concurrent pickup completion: 50 tablets completing one code, exactly one wins.
+
+Runs in the throwaway database from tests/mongo_harness.py: a server at MONGO_URL
+when one is reachable (a real race), otherwise mongomock-motor.
+
+    MONGO_URL=mongodb://localhost:27017 python -m pytest tests/test_pickup_completion.py
+"""
+
+import asyncio
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from tests.mongo_harness import run
+from utils.pickup_state import complete_pickup, find_pickup_order
+
+CONCURRENT_COMPLETIONS = 50
+
+async def _race(db, channel: str, document: dict, code: str, new_status: str, update_fields: dict):
+    await db[channel].insert_one(document)
+    results = await asyncio.gather(
+        *[complete_pickup(channel, code, new_status, update_fields) for _ in range(CONCURRENT_COMPLETIONS)],
+        return_exceptions=True
+    )
+    stored = await db[channel].find_one({"_id": document["_id"]})
+    return results, stored
+
+def _assert_single_winner(results, detail: str):
+    winners = [result for result in results if isinstance(result, dict)]
+    losers = [result for result in results if isinstance(result, HTTPException)]
+    assert len(winners) == 1
+    assert len(losers) == CONCURRENT_COMPLETIONS - 1
+    assert all(loser.status_code == 400 and loser.detail == detail for loser in losers)
+
+def test_prepaid_pickup_completes_once(backend):
+    code = "P" + uuid.uuid4().hex[:6].upper()
+    order = {
+        "_id": str(uuid.uuid4()),
+        "pickup_code": code,
+        "order_id": "order-1",
+        "items": [],
+        "total_amount": 42.0,
+        "status": "ready_for_pickup",
+        "created_at": datetime.utcnow().isoformat()
+    }
+    results, stored = run(_race(backend.db, "prepaid_orders", order, code, "picked_up", {"completed_by": "tablet"}))
+
+    _assert_single_winner(results, "Order already picked up")
+    assert stored["status"] == "picked_up"
+
+def test_cash_pickup_completes_once(backend):
+    code = uuid.uuid4().hex[:6]
+    order = {
+        "_id": str(uuid.uuid4()),
+        "pickup_code": code,
+        "order_id": "order-2",
+        "items": [],
+        "total_amount": 20.0,
+        "status": "pending_pickup",
+        "created_at": datetime.utcnow().isoformat()
+    }
+    results, stored = run(_race(backend.db, "cash_pickup_orders", order, code, "completed", {"cash_received": 20.0}))
+
+    _assert_single_winner(results, "Order already completed")
+    assert stored["status"] == "completed"
+
+def test_transaction_pickup_completes_once(backend):
+    code = uuid.uuid4().hex[:6]
+    transaction = {
+        "_id": str(uuid.uuid4()),
+        "payment_code": code,
+        "items": [],
+        "total": 15.0,
+        "payment_method": "in_app",
+        "status": "paid_in_app",
+        "created_at": datetime.utcnow()
+    }
+    results, stored = run(_race(backend.db, "transactions", transaction, code, "picked_up", {"admin_who_processed": "tablet"}))
+
+    _assert_single_winner(results, "Order already picked up")
+    assert stored["status"] == "picked_up"
+
+def test_recycled_code_resolves_to_the_open_order(backend):
+    code = uuid.uuid4().hex[:6]
+    earlier = {"_id": str(uuid.uuid4()), "pickup_code": code, "order_id": "old", "total_amount": 5.0,
+               "status": "completed", "created_at": "2024-01-01T10:00:00"}
+    current = {"_id": str(uuid.uuid4()), "pickup_code": code, "order_id": "new", "total_amount": 8.0,
+               "status": "pending_pickup", "created_at": "2024-01-03T10:00:00"}
+    run(backend.db.cash_pickup_orders.insert_many([current, earlier]))
+
+    assert run(find_pickup_order("cash_pickup_orders", code))["order_id"] == "new"
+    completed = run(complete_pickup("cash_pickup_orders", code, "completed", {"cash_received": 8.0}))
+    assert completed["order_id"] == "new"
+    # With no open order left, the lookup shows the newest one
+    assert run(find_pickup_order("cash_pickup_orders", code))["order_id"] == "new"
@@ -0,0 +1,63 @@
+"""
+backfill_pickup_index points each code at its newest holder across every channel.
+
+    python -m pytest tests/test_pickup_index.py
+"""
+
+import uuid
+from datetime import datetime
+
+from tests.mongo_harness import run
+from utils.pickup_index import backfill_pickup_index, lookup_pickup
+
+def _code() -> str:
+    return "P" + uuid.uuid4().hex[:6].upper()
+
+def test_recycled_code_resolves_to_its_newest_holder_in_any_channel(backend):
+    code = _code()
+    # The current holder is a transaction; cash_pickup_orders, replayed after
+    # transactions, still has the code's earlier holder (ISO string created_at)
+    run(backend.db.transactions.insert_one({
+        "_id": str(uuid.uuid4()), "payment_code": code, "total": 30.0, "status": "paid_in_app",
+        "created_at": datetime(2024, 1, 11, 9, 0)
+    }))
+    run(backend.db.cash_pickup_orders.insert_one({
+        "_id": str(uuid.uuid4()), "pickup_code": code, "total_amount": 5.0, "status": "completed",
+        "created_at": "2024-01-01T10:00:00"
+    }))
+
+    run(backfill_pickup_index())
+
+    entry = run(lookup_pickup(code))
+    assert entry["channel"] == "transactions"
+    assert entry["amount"] == 30.0
+
+def test_newer_holder_in_an_earlier_channel_survives_a_rerun(backend):
+    code = _code()
+    run(backend.db.cash_pickup_orders.insert_one({
+        "_id": str(uuid.uuid4()), "pickup_code": code, "total_amount": 5.0, "status": "completed",
+        "created_at": "2024-01-01T10:00:00"
+    }))
+    run(backend.db.prepaid_orders.insert_one({
+        "_id": str(uuid.uuid4()), "pickup_code": code, "total_amount": 18.0, "status": "paid",
+        "created_at": "2024-01-11T09:00:00+00:00"
+    }))
+
+    run(backfill_pickup_index())
+    run(backfill_pickup_index(["cash_pickup_orders"]))
+
+    assert run(lookup_pickup(code))["channel"] == "prepaid_orders"
+
+def test_payment_pair_written_together_resolves_to_the_prepaid_order(backend):
+    code, created_at = _code(), datetime(2024, 2, 1, 12, 0)
+    run(backend.db.transactions.insert_one({
+        "_id": str(uuid.uuid4()), "payment_code": code, "total": 12.0, "status": "paid", "created_at": created_at
+    }))
+    run(backend.db.prepaid_orders.insert_one({
+        "_id": str(uuid.uuid4()), "pickup_code": code, "total_amount": 12.0, "status": "ready_for_pickup",
+        "created_at": created_at.isoformat()
+    }))
+
+    run(backfill_pickup_index())
+
+    assert run(lookup_pickup(code))["channel"] == "prepaid_orders"
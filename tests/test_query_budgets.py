@@ -0,0 +1,161 @@
+"""
+Per-endpoint Mongo query budgets and N+1 detection.
+
+Each endpoint in QUERY_BUDGETS must issue at most its budgeted number of Mongo
+commands per request, and the same number whether it returns one item or many: a
+count that grows with the result is a query inside a loop.
+
+Requests run in process through httpx's ASGI transport. Commands are counted by
+the listener behind /api/metrics (utils/metrics.py) and read back from the
+response's Server-Timing header. The app talks to the throwaway database from
+tests/mongo_harness.py: a server at MONGO_URL, or mongomock-motor without one.
+
+    MONGO_URL=mongodb://localhost:27017 python -m pytest tests/test_query_budgets.py
+"""
+
+import re
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from tests.mongo_harness import run
+from server import app
+from utils.auth import create_access_token
+
+# Warm-request command budgets (auth caches filled), as "<route module>.<handler>"
+QUERY_BUDGETS = {
+    # load user + orders page (+ one $in for items without a stored product name)
+    "orders.get_user_orders": 3,
+    # admin + products aggregate with recent reviews + reviewer names
+    "admin.get_product_rating_stats": 3,
+    # admin + users aggregate with ratings + product names
+    "admin.get_user_rating_history": 3,
+    # cart + products on it
+    "cart.get_cart": 2
+}
+
+# mongomock can't run these endpoints' pipelines; they are only checked against a server
+SERVER_ONLY = {
+    "admin.get_product_rating_stats": "$lookup with a sub-pipeline is not implemented in mongomock"
+}
+
+SERVER_TIMING_PATTERN = re.compile(r'db;dur=[\d.]+;desc="(\d+) commands"')
+
+async def _count_commands(method: str, path: str, token: str) -> int:
+    """Commands issued by the second of two identical requests (the first fills auth caches)."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        headers = {"Authorization": f"Bearer {token}"}
+        for _ in range(2):
+            response = await client.request(method, path, headers=headers)
+            assert response.status_code == 200, f"{path}: {response.status_code} {response.text[:300]}"
+    match = SERVER_TIMING_PATTERN.search(response.headers.get("server-timing", ""))
+    assert match, f"{path}: no Server-Timing header (is MetricsMiddleware installed?)"
+    return int(match.group(1))
+
+async def _seed_member(db, email: str) -> dict:
+    user = {
+        "username": email.split("@")[0], "email": email, "full_name": "Budget Test",
+        "membership_tier": "premium", "is_verified": True, "verification_status": "approved",
+        "wictionary_access": True, "created_at": datetime.utcnow()
+    }
+    user["_id"] = (await db.users.insert_one(user)).inserted_id
+    return user
+
+async def _seed_products(db, count: int) -> list:
+    products = [
+        {"name": f"Budget Product {i}", "category": "flower", "price": 20.0 + i, "image": "/img.png",
+         "vendor": "Budget", "tier": "za", "in_stock": True,
+         "rating_sum": 0, "rating_count": 0, "rating_histogram": {str(value): 0 for value in range(1, 6)}}
+        for i in range(count)
+    ]
+    result = await db.products.insert_many(products)
+    return result.inserted_ids
+
+async def _seed_ratings(db, users: list, product_ids: list):
+    now = datetime.utcnow()
+    ratings = []
+    for i, user in enumerate(users):
+        for j, product_id in enumerate(product_ids):
+            ratings.append({
+                "product_id": product_id, "user_id": user["_id"], "rating": 1 + (i + j) % 5,
+                "review": f"Review {i}-{j}", "experience": None,
+                "created_at": now - timedelta(minutes=i * len(product_ids) + j), "updated_at": now
+            })
+    await db.ratings.insert_many(ratings)
+    for product_id in product_ids:
+        await db.products.update_one({"_id": product_id}, {"$set": {"rating_count": len(users), "rating_sum": 3 * len(users)}})
+
+def _member_token(email: str) -> str:
+    return create_access_token({"sub": email, "tier": "premium", "verified": True})
+
+def _admin_token(email: str) -> str:
+    return create_access_token({"sub": email, "type": "admin", "is_admin": True})
+
+# Each scenario seeds `size` result rows and returns (method, path, token) for the request
+
+async def orders_scenario(db, size: int):
+    user = await _seed_member(db, f"orders-{size}-{uuid.uuid4().hex[:6]}@budget.test")
+    product_ids = await _seed_products(db, 3)
+    now = datetime.utcnow()
+    await db.orders.insert_many([
+        {"user_id": user["_id"], "status": "pending", "total": 30.0, "payment_method": "cash",
+         "created_at": now - timedelta(minutes=i), "updated_at": now,
+         # Half of the orders predate stored product names, so the items lookup is exercised
+         "items": [{"product_id": product_id, "quantity": 1, "price": 10.0, **({"product_name": "Stored"} if i % 2 else {})}
+                   for product_id in product_ids]}
+        for i in range(size)
+    ])
+    return "GET", "/api/orders/?limit=100", _member_token(user["email"])
+
+async def cart_scenario(db, size: int):
+    user = await _seed_member(db, f"cart-{size}-{uuid.uuid4().hex[:6]}@budget.test")
+    product_ids = await _seed_products(db, size)
+    await db.carts.insert_one({
+        "_id": user["email"], "updated_at": datetime.utcnow(),
+        "items": [{"product_id": str(product_id), "quantity": 1} for product_id in product_ids]
+    })
+    return "GET", "/api/cart/", _member_token(user["email"])
+
+async def _admin(db) -> str:
+    email = f"admin-{uuid.uuid4().hex[:6]}@budget.test"
+    await db.admins.insert_one({"email": email, "username": "budget-admin", "role": "admin", "is_active": True})
+    return _admin_token(email)
+
+async def rating_stats_scenario(db, size: int):
+    await db.products.delete_many({})
+    await db.ratings.delete_many({})
+    users = [await _seed_member(db, f"rater-{i}-{uuid.uuid4().hex[:6]}@budget.test") for i in range(6)]
+    await _seed_ratings(db, users, await _seed_products(db, size))
+    return "GET", "/api/admin/ratings/stats?limit=100", await _admin(db)
+
+async def rating_history_scenario(db, size: int):
+    await db.users.delete_many({})
+    await db.ratings.delete_many({})
+    users = [await _seed_member(db, f"history-{i}-{uuid.uuid4().hex[:6]}@budget.test") for i in range(size)]
+    await _seed_ratings(db, users, await _seed_products(db, 6))
+    return "GET", "/api/admin/ratings/users?limit=50", await _admin(db)
+
+SCENARIOS = {
+    "orders.get_user_orders": orders_scenario,
+    "admin.get_product_rating_stats": rating_stats_scenario,
+    "admin.get_user_rating_history": rating_history_scenario,
+    "cart.get_cart": cart_scenario
+}
+
+@pytest.mark.parametrize("endpoint", sorted(QUERY_BUDGETS))
+def test_endpoint_query_budget(backend, endpoint):
+    if backend.kind == "mongomock" and endpoint in SERVER_ONLY:
+        pytest.skip(SERVER_ONLY[endpoint])
+
+    scenario = SCENARIOS[endpoint]
+    small = run(_count_commands(*run(scenario(backend.db, 1))))
+    large = run(_count_commands(*run(scenario(backend.db, 12))))
+
+    assert large == small, f"{endpoint}: {small} commands for 1 result but {large} for 12 (query in a loop?)"
+    assert large <= QUERY_BUDGETS[endpoint], f"{endpoint}: {large} commands, budget {QUERY_BUDGETS[endpoint]}"
+
+def test_every_budget_has_a_scenario():
+    assert set(QUERY_BUDGETS) == set(SCENARIOS)
@@ -0,0 +1,68 @@
+"""
+Rating aggregates on products: $inc deltas, histogram buckets and the one-off
+rebuild of products from before the aggregates existed.
+
+    python -m pytest tests/test_rating_stats.py
+"""
+
+from bson import ObjectId
+
+from tests.mongo_harness import run
+from utils.rating_stats import apply_rating_change, empty_histogram, ensure_rating_stats, repair_rating_stats
+
+def _new_product(db, **fields) -> ObjectId:
+    return run(db.products.insert_one({"name": "Test strain", "rating": 0.0, "reviews": 0, **fields})).inserted_id
+
+def _tracked_product(db) -> ObjectId:
+    return _new_product(db, rating_sum=0, rating_count=0, rating_histogram=empty_histogram())
+
+def _stats(db, product_id) -> dict:
+    return run(db.products.find_one({"_id": product_id}))
+
+def test_new_edited_and_deleted_ratings_move_sum_count_and_histogram(backend):
+    product_id = _tracked_product(backend.db)
+
+    run(apply_rating_change(product_id, added=5))
+    run(apply_rating_change(product_id, added=3))
+    fields = run(apply_rating_change(product_id, added=2, removed=5))
+
+    assert (fields["rating_sum"], fields["rating_count"]) == (5, 2)
+    assert fields["rating_histogram"] == {"1": 0, "2": 1, "3": 1, "4": 0, "5": 0}
+    assert (fields["rating"], fields["reviews"]) == (2.5, 2)
+
+    run(apply_rating_change(product_id, removed=3))
+    product = _stats(backend.db, product_id)
+    assert (product["rating_sum"], product["rating_count"], product["rating"], product["reviews"]) == (2, 1, 2.0, 1)
+    assert product["rating_histogram"] == {"1": 0, "2": 1, "3": 0, "4": 0, "5": 0}
+
+def test_edit_to_the_same_value_returns_the_unchanged_fields(backend):
+    product_id = _tracked_product(backend.db)
+    run(apply_rating_change(product_id, added=4))
+
+    fields = run(apply_rating_change(product_id, added=4, removed=4))
+
+    assert fields is not None
+    assert (fields["rating_sum"], fields["rating_count"], fields["rating"], fields["reviews"]) == (4, 1, 4.0, 1)
+    assert fields["rating_histogram"]["4"] == 1
+
+def test_untracked_product_is_rebuilt_once_then_incremented(backend):
+    product_id = _new_product(backend.db, rating=4.5, reviews=2)
+    run(backend.db.ratings.insert_many([
+        {"product_id": product_id, "user_id": "a", "rating": 4},
+        {"product_id": product_id, "user_id": "b", "rating": 5}
+    ]))
+    # Without aggregates there is nothing to $inc
+    assert run(apply_rating_change(product_id, added=1)) is None
+
+    run(ensure_rating_stats(product_id))
+    # The rating route writes the new rating after ensure_rating_stats, then increments
+    run(backend.db.ratings.insert_one({"product_id": product_id, "user_id": "c", "rating": 3}))
+    run(apply_rating_change(product_id, added=3))
+    # A rebuild that started before the increment must not overwrite it
+    run(repair_rating_stats(product_id, only_missing=True))
+    run(ensure_rating_stats(product_id))
+
+    product = _stats(backend.db, product_id)
+    assert (product["rating_sum"], product["rating_count"]) == (12, 3)
+    assert product["rating_histogram"] == {"1": 0, "2": 0, "3": 1, "4": 1, "5": 1}
+    assert (product["rating"], product["reviews"]) == (4.0, 3)
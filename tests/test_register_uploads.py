@@ -0,0 +1,60 @@
+"""
+A registration that fails after its ID documents were stored gives their blob
+references back, so the garbage collector can remove the files.
+
+    python -m pytest tests/test_register_uploads.py
+"""
+
+import io
+import uuid
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from pymongo.errors import DuplicateKeyError
+
+from tests.mongo_harness import run
+from routes.auth import register
+from utils import blob_store as blob_store_module
+from utils.blob_store import private_blob_store
+
+@pytest.fixture
+def private_root(tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    monkeypatch.setattr(blob_store_module, "UPLOAD_DIR", uploads)
+    monkeypatch.setattr(private_blob_store, "root", uploads / "private")
+    monkeypatch.setattr(private_blob_store, "staging_dir", uploads / "private" / ".staging")
+
+def _upload(name: str) -> UploadFile:
+    return UploadFile(io.BytesIO(f"{name}-{uuid.uuid4().hex}".encode()), filename=name)
+
+def _register(email: str, username: str, id_back: UploadFile):
+    return register(
+        username=username, email=email, password="correct horse", full_name="Blob Test",
+        date_of_birth="1990-01-01", re_entry_code="1234", membership_tier="basic",
+        is_law_enforcement=False, parent_email=None,
+        id_front=_upload("front.jpg"), id_back=id_back, medical_document=None
+    )
+
+def _referenced_blobs(db) -> int:
+    return run(db.private_blobs.count_documents({"refcount": {"$gt": 0}}))
+
+def test_failed_user_insert_releases_stored_documents(backend, private_root):
+    # Another registration took the username between the checks and the insert
+    run(backend.db.users.create_index("username", unique=True))
+    run(backend.db.users.insert_one({"username": "taken", "email": "first@register.test"}))
+    referenced = _referenced_blobs(backend.db)
+
+    with pytest.raises(DuplicateKeyError):
+        run(_register("second@register.test", "taken", _upload("back.png")))
+
+    assert _referenced_blobs(backend.db) == referenced
+
+def test_failed_second_upload_releases_the_first(backend, private_root):
+    referenced = _referenced_blobs(backend.db)
+
+    with pytest.raises(HTTPException) as error:
+        run(_register("third@register.test", "third", _upload("back.exe")))
+
+    assert error.value.status_code == 400
+    assert _referenced_blobs(backend.db) == referenced
+    assert run(backend.db.users.find_one({"email": "third@register.test"})) is None